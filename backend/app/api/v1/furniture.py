@@ -1,5 +1,7 @@
 """家具检测 API 路由"""
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, status
+from fastapi import (
+    APIRouter, BackgroundTasks, Depends, UploadFile, File, Form, HTTPException, status
+)
 from typing import Optional
 import uuid
 from datetime import datetime
@@ -9,35 +11,55 @@ from app.models.schemas import (
     FurnitureDetectionResponse,
     FurnitureDetectionReport,
     MaterialData,
-    RiskAssessment,
     VisualCue,
-    MaterialType,
-    RiskLevel
+    MaterialType
 )
 from app.services.image_service import ImageService
 from app.services.qwen_vl import QwenVLService
-from app.services.knowledge_base import KnowledgeBaseService
+from app.services.kb_records import DEFAULT_RISK_ASSESSMENT
+from app.services.knowledge_base import KnowledgeBaseService, get_knowledge_base
+from app.services.report_store import get_report_store
+from app.services.share_prerender import get_share_prerender_worker, track_detection
 
 router = APIRouter(prefix="/furniture", tags=["家具检测"])
 
 # 初始化服务
 image_service = ImageService()
 qwen_service = QwenVLService()
-knowledge_service = KnowledgeBaseService()
+report_store = get_report_store()
+prerender_worker = get_share_prerender_worker()
+
 
+async def _persist_report(report_id: str, report: dict) -> None:
+    """保存检测报告并提交分享卡片预渲染（响应发送后在后台执行）"""
+    try:
+        await report_store.save(report_id, report)
+    except Exception as e:
+        logger.error(f"检测报告保存失败，报告 ID: {report_id}: {e}")
+        return
+    prerender_worker.submit(report_id, report)
 
-@router.post("/detect", response_model=FurnitureDetectionResponse)
+
+@router.post(
+    "/detect",
+    response_model=FurnitureDetectionResponse,
+    dependencies=[Depends(track_detection)]
+)
 async def detect_furniture(
+    background_tasks: BackgroundTasks,
     image: UploadFile = File(..., description="家具图片"),
-    disclaimer_accepted: bool = Form(..., description="是否接受免责声明")
+    disclaimer_accepted: bool = Form(..., description="是否接受免责声明"),
+    knowledge_service: KnowledgeBaseService = Depends(get_knowledge_base)
 ):
     """家具材料检测端点
 
     上传家具图片，返回材料识别和健康风险评估结果。
 
     Args:
+        background_tasks: 后台任务（响应后保存报告、预渲染分享卡片）
         image: 上传的图片文件
         disclaimer_accepted: 用户是否已接受免责声明
+        knowledge_service: 材料知识库（进程内共享实例）
 
     Returns:
         FurnitureDetectionResponse: 检测结果
@@ -69,16 +91,12 @@ async def detect_furniture(
 
         logger.info(f"开始处理图片: {image.filename}")
 
-        # 1. 压缩并上传图片到 OSS
-        compressed_data = image_service.compress_image(image_data)
-        image_url = await image_service.upload_to_oss(
-            compressed_data,
-            image.filename or "furniture.jpg"
-        )
+        # 1. 上传原图、按视觉模型缩放策略压缩的送检图与缩略图到 OSS
+        uploads = await image_service.upload_with_derivatives(image_data)
 
         # 2. 调用 Qwen-VL 分析图片
         logger.info("调用 Qwen-VL 分析图片...")
-        analysis_result = await qwen_service.analyze_furniture(image_url)
+        analysis_result = await qwen_service.analyze_furniture(uploads.vlm_image_url)
 
         # 3. 解析分析结果
         furniture_type = analysis_result.get('furniture_type', '未知家具')
@@ -111,42 +129,32 @@ async def detect_furniture(
             )
             materials.append(material)
 
-        # 5. 查询知识库获取风险评估
+        # 5. 查询知识库获取风险评估（加载时已构建并校验，直接复用）
+        #    精确/模糊匹配均未命中的子类型一次批量走语义检索
         logger.info("查询知识库获取风险评估...")
-        risk_data = None
-        for mat in materials_data:
-            sub_type = mat.get('sub_type')
-            kb_material = knowledge_service.search_by_sub_type(sub_type)
-            if kb_material:
-                risk_data = kb_material.get('risk_assessment')
+        risk_assessment = None
+        sub_types = [mat.get('sub_type') for mat in materials_data]
+        resolved = await knowledge_service.resolve_sub_types(sub_types)
+        for sub_type, match in zip(sub_types, resolved):
+            if match:
+                logger.info(
+                    f"子类型 '{sub_type}' 匹配知识库 '{match.sub_type}' "
+                    f"({match.method}, 置信度 {match.confidence})"
+                )
+                risk_assessment = match.material.risk_assessment
                 break
 
         # 如果知识库中没有找到，使用默认风险评估
-        if not risk_data:
-            risk_data = {
-                'risk_level': '中风险',
-                'risk_score': 50,
-                'harmful_substances': ['未知'],
-                'sensitive_groups': ['婴幼儿', '孕妇', '呼吸道敏感人群'],
-                'health_impacts': ['建议咨询专业人士'],
-                'recommendations': ['定期通风', '保持室内空气流通']
-            }
-
-        # 6. 创建风险评估对象
-        risk_assessment = RiskAssessment(
-            risk_level=RiskLevel(risk_data['risk_level']),
-            risk_score=risk_data['risk_score'],
-            harmful_substances=risk_data.get('harmful_substances', []),
-            sensitive_groups=risk_data.get('sensitive_groups', []),
-            health_impacts=risk_data.get('health_impacts', []),
-            recommendations=risk_data.get('recommendations', [])
-        )
+        if risk_assessment is None:
+            risk_assessment = DEFAULT_RISK_ASSESSMENT
 
-        # 7. 生成检测报告
+        # 6. 生成检测报告
         report = FurnitureDetectionReport(
             report_id=str(uuid.uuid4()),
             timestamp=datetime.now(),
-            image_url=image_url,
+            image_url=uploads.image_url,
+            vlm_image_url=uploads.vlm_image_url,
+            thumbnail_urls=uploads.thumbnail_urls,
             furniture_type=furniture_type,
             materials=materials,
             risk_assessment=risk_assessment,
@@ -155,6 +163,13 @@ async def detect_furniture(
 
         logger.info(f"检测完成，报告 ID: {report.report_id}")
 
+        # 7. 异步保存报告并预渲染分享卡片，不占用响应时间
+        background_tasks.add_task(
+            _persist_report,
+            report.report_id,
+            report.model_dump(mode="json")
+        )
+
         return FurnitureDetectionResponse(
             success=True,
             data=report,
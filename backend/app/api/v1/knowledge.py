@@ -0,0 +1,62 @@
+"""材料知识问答 API 路由"""
+from fastapi import APIRouter, Depends
+from loguru import logger
+
+from app.models.schemas import (
+    KnowledgeAnswer,
+    KnowledgeQuestionRequest,
+    KnowledgeQuestionResponse,
+    KnowledgeSource
+)
+from app.services.knowledge_qa import KnowledgeQAService, get_knowledge_qa
+
+router = APIRouter(prefix="/knowledge", tags=["材料问答"])
+
+
+@router.post("/ask", response_model=KnowledgeQuestionResponse)
+async def ask_question(
+    request: KnowledgeQuestionRequest,
+    qa_service: KnowledgeQAService = Depends(get_knowledge_qa)
+):
+    """材料知识问答
+
+    基于材料知识集合与知识库风险数据回答问题，相似问题直接返回缓存的回答。
+
+    Args:
+        request: 问答请求
+        qa_service: 材料问答服务（进程内共享实例）
+
+    Returns:
+        KnowledgeQuestionResponse: 问答结果
+    """
+    try:
+        entry, cached = await qa_service.answer(request.question)
+    except Exception as e:
+        logger.exception(f"材料问答失败: {e}")
+        return KnowledgeQuestionResponse(
+            success=False,
+            data=None,
+            error=f"回答失败: {str(e)}"
+        )
+
+    return KnowledgeQuestionResponse(
+        success=True,
+        data=KnowledgeAnswer(
+            question=request.question,
+            answer=entry.answer,
+            sources=[KnowledgeSource(**source) for source in entry.sources],
+            material_ids=sorted(entry.material_ids),
+            cached=cached
+        ),
+        error=None
+    )
+
+
+@router.get("/metrics")
+async def knowledge_metrics(qa_service: KnowledgeQAService = Depends(get_knowledge_qa)):
+    """材料问答缓存指标
+
+    Returns:
+        缓存条数、命中次数与命中率（当前进程）
+    """
+    return qa_service.cache.metrics()
@@ -1,28 +1,33 @@
 """分享卡片 API 路由"""
-from fastapi import APIRouter, HTTPException, status
-from typing import Dict
-import uuid
-from datetime import datetime, timedelta
+import asyncio
+import hashlib
+from typing import Dict, Literal, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
 from loguru import logger
-from PIL import Image, ImageDraw, ImageFont
-import io
 
 from app.models.schemas import (
     ShareCardRequest,
     ShareCardResponse,
     ShareCardData
 )
-from app.services.image_service import ImageService
-from app.services.qwen_vl import QwenVLService
+from app.core.config import get_settings
+from app.services.share_card_service import ShareCardService
+from app.services.report_store import get_report_store
+from app.services.card_cache import get_card_image_cache
+from app.services.share_prerender import get_share_prerender_worker
 
 router = APIRouter(prefix="/share", tags=["分享卡片"])
 
 # 初始化服务
-image_service = ImageService()
-qwen_service = QwenVLService()
+share_card_service = ShareCardService()
+report_store = get_report_store()
+prerender_worker = get_share_prerender_worker()
+card_image_cache = get_card_image_cache()
+settings = get_settings()
 
-# 临时存储检测报告（实际应用中应使用数据库）
-reports_cache: Dict[str, dict] = {}
+# 正在渲染的卡片，同一张卡片的并发首次请求共用一次渲染
+_rendering: Dict[Tuple[str, str], asyncio.Task] = {}
 
 
 @router.post("/generate", response_model=ShareCardResponse)
@@ -38,8 +43,22 @@ async def generate_share_card(request: ShareCardRequest):
         ShareCardResponse: 分享卡片数据
     """
     try:
-        # 从缓存中获取报告（实际应用中从数据库获取）
-        report = reports_cache.get(request.report_id)
+        # 优先返回预渲染（或之前生成）的卡片
+        cached_card = await report_store.get_share_card(
+            request.report_id,
+            request.template_style
+        )
+        prerender_worker.record_lookup(hit=cached_card is not None)
+        if cached_card is not None:
+            logger.info(f"命中已生成的分享卡片，报告 ID: {request.report_id}")
+            return ShareCardResponse(
+                success=True,
+                data=ShareCardData.model_validate(cached_card),
+                error=None
+            )
+
+        # 从报告存储中获取报告
+        report = await report_store.get(request.report_id)
         if not report:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -48,51 +67,24 @@ async def generate_share_card(request: ShareCardRequest):
 
         logger.info(f"开始生成分享卡片，报告 ID: {request.report_id}")
 
-        # 1. 生成金句
-        material_info = {
-            'material_type': report['materials'][0]['material_type'],
-            'sub_type': report['materials'][0]['sub_type']
-        }
-        risk_level = report['risk_assessment']['risk_level']
-
-        catchphrase = await qwen_service.generate_catchphrase(
-            material_info,
-            risk_level
-        )
-
-        # 2. 生成小程序二维码
-        miniprogram_path = f"/pages/report/report?id={request.report_id}"
-        qr_code_url = await image_service.generate_and_upload_qr_code(
-            miniprogram_path
-        )
-
-        # 3. 生成分享卡片图片
-        card_image_data = await _generate_card_image(
+        card_data, degraded = await share_card_service.generate(
             report,
-            catchphrase,
+            request.report_id,
             request.template_style
         )
 
-        # 4. 上传卡片图片
-        card_image_url = await image_service.upload_to_oss(
-            card_image_data,
-            f"share_card_{request.report_id}.jpg"
-        )
-
-        # 5. 创建分享卡片数据
-        card_data = ShareCardData(
-            card_id=str(uuid.uuid4()),
-            report_id=request.report_id,
-            card_image_url=card_image_url,
-            qr_code_url=qr_code_url,
-            catchphrase=catchphrase,
-            template_style=request.template_style,
-            created_at=datetime.now(),
-            expires_at=datetime.now() + timedelta(days=7)
-        )
-
         logger.info(f"分享卡片生成完成，卡片 ID: {card_data.card_id}")
 
+        # 使用了降级结果（默认金句、缺少二维码）的卡片不保存，下次请求重新生成
+        if degraded:
+            logger.warning(f"分享卡片使用了降级结果，不保存，报告 ID: {request.report_id}")
+        else:
+            await report_store.save_share_card(
+                request.report_id,
+                request.template_style,
+                card_data.model_dump(mode="json")
+            )
+
         return ShareCardResponse(
             success=True,
             data=card_data,
@@ -110,92 +102,98 @@ async def generate_share_card(request: ShareCardRequest):
         )
 
 
-async def _generate_card_image(
-    report: dict,
-    catchphrase: str,
-    template_style: str
-) -> bytes:
-    """生成分享卡片图片
+async def _render_card_image(report_id: str, report: dict, template_style: str) -> Tuple[bytes, bool]:
+    """渲染卡片图片，未使用降级结果时写入缓存
+
+    Returns:
+        (卡片图片数据, 是否使用了降级结果)
+    """
+    # 复用已生成卡片的金句，使图片与 /share/generate 返回的卡片一致
+    card = await report_store.get_share_card(report_id, template_style)
+    catchphrase = card['catchphrase'] if card else None
+
+    data, degraded = await share_card_service.render_card(report, report_id, template_style, catchphrase)
+    if degraded:
+        logger.warning(f"分享卡片图片使用了降级结果，不缓存，报告 ID: {report_id}，风格: {template_style}")
+    else:
+        await card_image_cache.set(report_id, template_style, data)
+        logger.info(f"分享卡片图片已渲染并缓存，报告 ID: {report_id}，风格: {template_style}")
+    return data, degraded
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """判断 If-None-Match 是否命中（弱比较，忽略 W/ 前缀）"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+@router.get("/cards/{report_id}.jpg")
+async def get_share_card_image(
+    report_id: str,
+    request: Request,
+    style: Literal["modern", "classic", "minimal"] = Query("modern", description="卡片模板风格")
+):
+    """直接返回分享卡片图片
+
+    首次请求时渲染并缓存，之后直接返回缓存内容；支持 ETag / If-None-Match，
+    客户端与 CDN 可以缓存图片。
 
     Args:
-        report: 检测报告数据
-        catchphrase: 金句
-        template_style: 模板风格
+        report_id: 报告 ID
+        request: 请求对象
+        style: 卡片模板风格
 
     Returns:
-        卡片图片数据
+        卡片图片 (image/jpeg)，未修改时返回 304
     """
-    try:
-        # 创建画布
-        width, height = 750, 1334  # 标准分享卡片尺寸
-
-        # 根据模板风格选择背景色
-        bg_colors = {
-            'modern': '#F5F7FA',
-            'classic': '#FFF8E1',
-            'minimal': '#FFFFFF'
-        }
-        bg_color = bg_colors.get(template_style, '#F5F7FA')
-
-        # 创建图片
-        img = Image.new('RGB', (width, height), bg_color)
-        draw = ImageDraw.Draw(img)
-
-        # 绘制标题
-        title = "家具健康检测报告"
-        # 使用默认字体（实际应用中应使用自定义字体）
+    # 先确认报告存在（报告过期或 ID 无效时不返回缓存的图片）
+    report = await report_store.get(report_id)
+    if not report:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"未找到报告 ID: {report_id}"
+        )
+
+    data = await card_image_cache.get(report_id, style)
+    degraded = False
+    if data is None:
+        key = (report_id, style)
+        task = _rendering.get(key)
+        if task is None:
+            task = asyncio.create_task(_render_card_image(report_id, report, style))
+            _rendering[key] = task
+            task.add_done_callback(lambda _: _rendering.pop(key, None))
         try:
-            title_font = ImageFont.truetype("arial.ttf", 48)
-            text_font = ImageFont.truetype("arial.ttf", 32)
-            small_font = ImageFont.truetype("arial.ttf", 24)
-        except:
-            title_font = ImageFont.load_default()
-            text_font = ImageFont.load_default()
-            small_font = ImageFont.load_default()
-
-        # 绘制标题
-        draw.text((width // 2, 100), title, fill='#333333', font=title_font, anchor='mm')
-
-        # 绘制金句
-        draw.text((width // 2, 200), catchphrase, fill='#FF6B6B', font=text_font, anchor='mm')
-
-        # 绘制材料信息
-        y_offset = 300
-        materials = report.get('materials', [])
-        if materials:
-            material = materials[0]
-            material_text = f"材料类型: {material['material_type']}"
-            draw.text((100, y_offset), material_text, fill='#666666', font=text_font)
-
-            sub_type_text = f"子类型: {material['sub_type']}"
-            draw.text((100, y_offset + 60), sub_type_text, fill='#666666', font=text_font)
-
-            confidence_text = f"置信度: {material['confidence']}%"
-            draw.text((100, y_offset + 120), confidence_text, fill='#666666', font=text_font)
-
-        # 绘制风险评估
-        y_offset = 550
-        risk = report.get('risk_assessment', {})
-        risk_text = f"风险等级: {risk.get('risk_level', '未知')}"
-        draw.text((100, y_offset), risk_text, fill='#FF6B6B', font=text_font)
-
-        # 绘制建议
-        y_offset = 650
-        recommendations = risk.get('recommendations', [])
-        if recommendations:
-            draw.text((100, y_offset), "健康建议:", fill='#333333', font=text_font)
-            for i, rec in enumerate(recommendations[:3]):  # 最多显示3条
-                draw.text((100, y_offset + 60 + i * 50), f"• {rec}", fill='#666666', font=small_font)
-
-        # 绘制底部信息
-        footer_text = "扫码查看完整报告"
-        draw.text((width // 2, height - 100), footer_text, fill='#999999', font=small_font, anchor='mm')
-
-        # 转换为字节
-        output = io.BytesIO()
-        img.save(output, format='JPEG', quality=90)
-        return output.getvalue()
+            # shield: 单个客户端断开不会取消其他请求共用的渲染
+            data, degraded = await asyncio.shield(task)
+        except Exception as e:
+            logger.exception(f"分享卡片图片渲染失败: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"生成失败: {str(e)}"
+            )
 
-    except Exception as e:
-        logger.error(f"生成卡片图片失败: {e}")
-        raise
+    etag = f'"{hashlib.sha256(data).hexdigest()}"'
+    headers = {
+        "ETag": etag,
+        # 降级的图片不允许客户端与 CDN 缓存，下次请求重新渲染
+        "Cache-Control": "no-store" if degraded else f"public, max-age={settings.SHARE_CARD_MAX_AGE}",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=data, media_type="image/jpeg", headers=headers)
+
+
+@router.get("/metrics")
+async def share_metrics():
+    """分享卡片预渲染指标
+
+    Returns:
+        队列、渲染次数及 /share/generate 命中率（当前进程）
+    """
+    return prerender_worker.get_metrics()
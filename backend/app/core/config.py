@@ -33,12 +33,50 @@ class Settings(BaseSettings):
     OSS_ENDPOINT: str = "oss-cn-hangzhou.aliyuncs.com"
     OSS_BUCKET_NAME: str = "furniture-health-detector"
     OSS_IMAGE_EXPIRE_DAYS: int = 7
+    OSS_LIFECYCLE_CHECK_ON_STARTUP: bool = True
+    OSS_DEDUP_MAX_AGE_HOURS: int = 24  # 已存在对象超过该时长则重新上传以刷新生命周期
+    OSS_KNOWN_OBJECTS_CACHE_SIZE: int = 10000
 
     # 图片处理配置
     MAX_IMAGE_SIZE_MB: int = 10
     IMAGE_QUALITY: int = 85
+    IMAGE_MIN_QUALITY: int = 40  # 按目标字节数搜索质量时的下限
+    IMAGE_TARGET_BYTES: int = 0  # 压缩目标字节数，0 表示不限制
+    IMAGE_OUTPUT_FORMAT: str = "JPEG"  # JPEG 或 WEBP
+    IMAGE_DERIVATIVE_SIZES: List[int] = [128, 512, 1024]  # 缩略图长边像素
+    IMAGE_DERIVATIVE_FORMAT: str = "JPEG"  # JPEG 或 WEBP
     MIN_IMAGE_RESOLUTION: int = 800
 
+    # 送检图片缩放策略（Qwen-VL: 14px patch，2x2 合并，每个视觉 token 覆盖 28x28 像素）
+    VLM_IMAGE_MAX_LONG_EDGE: int = 1344  # 长边上限，0 表示不限制
+    VLM_IMAGE_MAX_PIXELS: int = 1003520  # 总像素上限 (1280 个 token)，0 表示不限制
+    VLM_IMAGE_PATCH_SIZE: int = 28
+
+    # 二维码缓存
+    QR_CACHE_DIR: str = "cache/qrcodes"
+    QR_MEMORY_CACHE_SIZE: int = 1024
+    QR_URL_CACHE_SECONDS: int = 3600  # 已签名 URL 的复用时长
+
+    # 分享卡片
+    CARD_FONT_PATH: str = ""  # 中文字体路径，留空则自动查找系统字体
+    CARD_QR_IMAGE_CACHE_SIZE: int = 256  # 已解码二维码图片的缓存条数
+    SHARE_CATCHPHRASE_TIMEOUT: float = 8.0  # 各步骤超时（秒）
+    SHARE_QR_TIMEOUT: float = 3.0
+    SHARE_RENDER_TIMEOUT: float = 5.0
+    SHARE_UPLOAD_TIMEOUT: float = 10.0
+
+    # 检测完成后预渲染默认风格的分享卡片
+    SHARE_PRERENDER_ENABLED: bool = True
+    SHARE_PRERENDER_STYLE: str = "modern"
+    SHARE_PRERENDER_QUEUE_SIZE: int = 100  # 队列满时丢弃，不阻塞检测
+    SHARE_PRERENDER_IDLE_POLL: float = 0.2  # 有检测请求时等待的轮询间隔（秒）
+    SHARE_PRERENDER_MAX_WAIT: float = 10.0  # 每张卡片最多为检测请求让出的时间（秒）
+
+    # 分享卡片图片直出 (GET /share/cards/{report_id}.jpg)
+    SHARE_CARD_CACHE_BACKEND: str = "disk"  # disk / redis
+    SHARE_CARD_CACHE_DIR: str = "cache/share_cards"
+    SHARE_CARD_MAX_AGE: int = 86400  # Cache-Control max-age（秒）
+
     # API 调用配置
     QWEN_VL_MAX_RETRIES: int = 3
     QWEN_VL_RETRY_DELAY: float = 1.0
@@ -48,6 +86,42 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "logs/app.log"
 
+    # 材料知识库
+    KNOWLEDGE_BASE_PATH: str = "app/data/knowledge_base.json"
+    KNOWLEDGE_BASE_WATCH_INTERVAL: float = 5.0  # 文件变更检查间隔（秒），0 表示不监听
+    # 编译快照（python compile_knowledge_base.py 生成），缺失或过期时回退到 JSON，留空不使用
+    KNOWLEDGE_BASE_SNAPSHOT_PATH: str = "data/knowledge_base.snap"
+
+    # 语义检索（ChromaDB 知识集合，由仓库根目录的 import_*knowledge.py 导入），子类型精确/模糊匹配均未命中时使用
+    SEMANTIC_SEARCH_ENABLED: bool = True
+    SEMANTIC_SEARCH_BACKEND: str = "chroma"  # chroma / numpy（内存映射向量索引，python build_vector_index.py 生成）
+    SEMANTIC_SEARCH_PERSIST_DIR: str = "../chroma_db"
+    SEMANTIC_SEARCH_COLLECTIONS: List[str] = [
+        "furniture_knowledge",
+        "furniture_knowledge_pro",
+        "furniture_knowledge_polymer"
+    ]
+    SEMANTIC_SEARCH_EMBEDDING_MODEL: str = ""  # 留空使用 ChromaDB 默认模型（与导入脚本一致）
+    SEMANTIC_SEARCH_CACHE_SIZE: int = 1024  # 查询向量缓存条数
+    SEMANTIC_SEARCH_TIMEOUT: float = 0.3  # 延迟预算（秒），超时按未命中处理
+    SEMANTIC_SEARCH_WORKERS: int = 2  # 推理与检索线程数，全部占用时跳过检索
+    SEMANTIC_SEARCH_TOP_K: int = 5
+    SEMANTIC_SEARCH_MIN_SIMILARITY: float = 0.5
+    SEMANTIC_SEARCH_INDEX_DIR: str = "data/vector_index"  # numpy 后端的索引目录
+    SEMANTIC_SEARCH_NPROBE: int = 0  # numpy 后端 IVF 检索的聚类数，0 表示精确检索
+
+    # 材料问答（POST /api/v1/knowledge/ask），相似问题命中语义缓存时不调用大模型
+    QA_CACHE_MAX_ENTRIES: int = 2048
+    QA_CACHE_TTL_SECONDS: float = 86400  # 回答有效期（秒）；知识库材料变更时相关回答立即失效
+    QA_CACHE_UNGROUNDED_TTL_SECONDS: float = 3600  # 没有知识库材料依据的回答的有效期（秒），知识条目重新导入时立即失效
+    QA_CACHE_SIMILARITY_THRESHOLD: float = 0.92  # 与缓存问题的最低余弦相似度
+    QA_RETRIEVAL_TOP_K: int = 4  # 作为回答依据的知识条目数
+    QA_MAX_TOKENS: int = 800
+
+    # 检测报告存储: sqlite (默认) / mongodb / redis，保存时长与 OSS_IMAGE_EXPIRE_DAYS 一致
+    REPORT_STORE_BACKEND: str = "sqlite"
+    REPORT_STORE_SQLITE_PATH: str = "data/reports.db"
+
     # Redis 配置 (可选)
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
@@ -1,6 +1,6 @@
 """数据模型定义"""
-from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional, Literal
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import Dict, List, Optional, Literal
 from datetime import datetime
 from enum import Enum
 
@@ -44,7 +44,12 @@ class MaterialData(BaseModel):
 
 
 class RiskAssessment(BaseModel):
-    """风险评估"""
+    """风险评估
+
+    知识库加载时构建，检测报告直接引用同一实例，因此冻结为只读。
+    """
+    model_config = ConfigDict(frozen=True)
+
     risk_level: RiskLevel = Field(..., description="风险等级")
     risk_score: float = Field(..., ge=0, le=100, description="风险评分 (0-100)")
     harmful_substances: List[str] = Field(
@@ -72,7 +77,15 @@ class FurnitureDetectionReport(BaseModel):
         default_factory=datetime.now,
         description="检测时间"
     )
-    image_url: str = Field(..., description="原始图片 URL")
+    image_url: str = Field(..., description="原始图片 URL（原始分辨率）")
+    vlm_image_url: str = Field(
+        default="",
+        description="送入视觉模型的缩放图片 URL"
+    )
+    thumbnail_urls: Dict[str, str] = Field(
+        default_factory=dict,
+        description="缩略图 URL，键为长边像素（如 '128'、'512'、'1024'）"
+    )
     furniture_type: str = Field(..., description="家具类型，如'椅子'、'沙发'")
     materials: List[MaterialData] = Field(..., description="检测到的材料列表")
     risk_assessment: RiskAssessment = Field(..., description="风险评估")
@@ -139,3 +152,31 @@ class ShareCardResponse(BaseModel):
     success: bool = Field(..., description="是否成功")
     data: Optional[ShareCardData] = Field(None, description="分享卡片数据")
     error: Optional[str] = Field(None, description="错误信息")
+
+
+class KnowledgeQuestionRequest(BaseModel):
+    """材料问答请求"""
+    question: str = Field(..., min_length=1, max_length=200, description="关于家具材料的问题")
+
+
+class KnowledgeSource(BaseModel):
+    """回答引用的知识条目"""
+    id: str = Field(..., description="知识条目 ID")
+    collection: str = Field(..., description="所属知识集合")
+    similarity: float = Field(..., description="与问题的相似度")
+
+
+class KnowledgeAnswer(BaseModel):
+    """材料问答结果"""
+    question: str = Field(..., description="问题")
+    answer: str = Field(..., description="回答")
+    sources: List[KnowledgeSource] = Field(default_factory=list, description="回答引用的知识条目")
+    material_ids: List[str] = Field(default_factory=list, description="回答所依据的知识库材料 ID")
+    cached: bool = Field(False, description="是否命中回答缓存")
+
+
+class KnowledgeQuestionResponse(BaseModel):
+    """材料问答响应"""
+    success: bool = Field(..., description="是否成功")
+    data: Optional[KnowledgeAnswer] = Field(None, description="问答结果")
+    error: Optional[str] = Field(None, description="错误信息")
@@ -0,0 +1,229 @@
+"""材料问答语义缓存"""
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+
+class CachedAnswer(NamedTuple):
+    """缓存的回答"""
+    question: str
+    answer: str
+    sources: List[Dict]
+    material_ids: FrozenSet[str]  # 回答所依据的知识库材料，材料变更时失效
+    question_materials: FrozenSet[str]  # 问题本身提到的材料
+    source_ids: FrozenSet[str]  # 回答所依据的知识条目（集合/ID），条目重新导入后失效
+    created_at: float
+    expires_at: float
+
+
+def normalize_question(question: str) -> str:
+    """规范化问题文本（全角转半角、小写、去除空白与末尾标点），用作精确匹配键"""
+    text = "".join(unicodedata.normalize("NFKC", question or "").lower().split())
+    return text.rstrip("?？!！。.~～")
+
+
+class SemanticAnswerCache:
+    """按问题向量相似度命中的问答缓存
+
+    - 规范化后完全相同的问题直接按文本命中，不需要计算向量
+    - 其余问题与缓存中的问题向量做一次矩阵乘法，余弦相似度达到阈值、且问题提到的
+      材料相同时命中（避免"刨花板安全吗"命中"密度板安全吗"的回答）
+    - 容量满时淘汰最久未使用的条目，超过 TTL 的条目在查找时失效（可按条目指定更短的 TTL）
+    - 知识库材料变更时按材料 ID、知识条目重新导入时按条目 ID 使回答失效
+
+    向量存放在预分配的矩阵中，按槽位复用，查找不需要重新拼接矩阵。
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 86400, threshold: float = 0.92):
+        """
+        Args:
+            max_entries: 最大缓存条数
+            ttl_seconds: 回答有效期（秒）
+            threshold: 命中所需的最低余弦相似度
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, CachedAnswer]" = OrderedDict()  # 槽位 -> 回答，按使用顺序
+        self._by_text: Dict[str, int] = {}
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+        self._matrix: Optional[np.ndarray] = None  # 槽位 x 维度
+        self._has_vector = np.zeros(max_entries, dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_by_text(self, question: str) -> Optional[CachedAnswer]:
+        """按规范化文本查找，不需要向量（未命中不计数，调用方随后应调用 get）"""
+        with self._lock:
+            slot = self._by_text.get(normalize_question(question))
+            entry = self._use(slot) if slot is not None else None
+            if entry is not None:
+                self.hits += 1
+            return entry
+
+    def get(
+        self,
+        question: str,
+        vector: Optional[Sequence] = None,
+        question_materials: Iterable[str] = ()
+    ) -> Optional[CachedAnswer]:
+        """查找缓存的回答，文本未命中时按向量相似度查找
+
+        Args:
+            question: 问题
+            vector: 问题向量，为空时只做文本匹配
+            question_materials: 问题提到的知识库材料 ID，向量命中要求与缓存条目一致
+
+        Returns:
+            命中的回答，未命中返回 None
+        """
+        with self._lock:
+            slot = self._by_text.get(normalize_question(question))
+            if slot is None and vector is not None and self._matrix is not None:
+                slot = self._nearest(self._normalize(vector), frozenset(question_materials))
+            entry = self._use(slot) if slot is not None else None
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def put(
+        self,
+        question: str,
+        answer: str,
+        sources: List[Dict],
+        material_ids: Iterable[str],
+        vector: Optional[Sequence] = None,
+        question_materials: Iterable[str] = (),
+        source_ids: Iterable[str] = (),
+        ttl_seconds: Optional[float] = None
+    ) -> CachedAnswer:
+        """缓存回答
+
+        Args:
+            question: 问题
+            answer: 回答
+            sources: 回答引用的知识条目
+            material_ids: 回答所依据的知识库材料 ID
+            vector: 问题向量，为空时只能按文本命中
+            question_materials: 问题提到的知识库材料 ID
+            source_ids: 回答所依据的知识条目键
+            ttl_seconds: 本条回答的有效期（秒），为空时使用缓存的 TTL，不超过缓存的 TTL
+
+        Returns:
+            缓存的条目
+        """
+        key = normalize_question(question)
+        question_materials = frozenset(question_materials)
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        now = time.time()
+        entry = CachedAnswer(
+            question, answer, sources,
+            frozenset(material_ids) | question_materials, question_materials,
+            frozenset(source_ids), now, now + ttl
+        )
+        with self._lock:
+            if key in self._by_text:
+                self._remove(self._by_text[key])
+            if not self._free_slots:
+                self._remove(next(iter(self._entries)))
+            slot = self._free_slots.pop()
+            if vector is not None:
+                normalized = self._normalize(vector)
+                if self._matrix is None or self._matrix.shape[1] != len(normalized):
+                    # 首次写入（或嵌入模型维度变化）时分配矩阵
+                    self._matrix = np.zeros((self.max_entries, len(normalized)), dtype=np.float32)
+                    self._has_vector[:] = False
+                self._matrix[slot] = normalized
+                self._has_vector[slot] = True
+            self._entries[slot] = entry
+            self._by_text[key] = slot
+        return entry
+
+    def invalidate_materials(self, material_ids: Iterable[str]) -> int:
+        """使依据指定材料的回答失效
+
+        Args:
+            material_ids: 发生变更的知识库材料 ID
+
+        Returns:
+            失效的条数
+        """
+        changed = frozenset(material_ids)
+        return self._invalidate(lambda entry: bool(entry.material_ids & changed))
+
+    def invalidate_sources(self, source_ids: Iterable[str]) -> int:
+        """使依据指定知识条目的回答失效
+
+        Args:
+            source_ids: 重新导入后新增、删除或内容变化的知识条目键
+
+        Returns:
+            失效的条数
+        """
+        changed = frozenset(source_ids)
+        return self._invalidate(lambda entry: bool(entry.source_ids & changed))
+
+    def _invalidate(self, is_stale: Callable[[CachedAnswer], bool]) -> int:
+        with self._lock:
+            stale = [slot for slot, entry in self._entries.items() if is_stale(entry)]
+            for slot in stale:
+                self._remove(slot)
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            for slot in list(self._entries):
+                self._remove(slot)
+
+    def metrics(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def _nearest(self, vector: np.ndarray, question_materials: FrozenSet[str]) -> Optional[int]:
+        """相似度达到阈值且问题材料一致的最相似槽位"""
+        if len(vector) != self._matrix.shape[1]:
+            return None
+        scores = self._matrix @ vector
+        scores[~self._has_vector] = -1.0
+        candidates = np.flatnonzero(scores >= self.threshold)
+        for slot in candidates[np.argsort(-scores[candidates])].tolist():
+            if self._entries[slot].question_materials == question_materials:
+                return slot
+        return None
+
+    def _use(self, slot: int) -> Optional[CachedAnswer]:
+        """返回槽位中的回答并标记为最近使用，已过期时移除"""
+        entry = self._entries[slot]
+        if time.time() > entry.expires_at:
+            self._remove(slot)
+            return None
+        self._entries.move_to_end(slot)
+        return entry
+
+    def _remove(self, slot: int) -> None:
+        entry = self._entries.pop(slot)
+        key = normalize_question(entry.question)
+        if self._by_text.get(key) == slot:
+            del self._by_text[key]
+        self._has_vector[slot] = False
+        self._free_slots.append(slot)
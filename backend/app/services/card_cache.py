@@ -0,0 +1,137 @@
+"""分享卡片图片缓存"""
+import asyncio
+import hashlib
+import os
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+
+from app.core.config import get_settings
+
+
+class CardImageCache(ABC):
+    """分享卡片图片字节缓存接口，按 (report_id, template_style) 存取"""
+
+    def __init__(self, ttl_seconds: int):
+        """初始化缓存
+
+        Args:
+            ttl_seconds: 缓存保存时长（秒）
+        """
+        self.ttl_seconds = ttl_seconds
+
+    @abstractmethod
+    async def get(self, report_id: str, template_style: str) -> Optional[bytes]:
+        """获取卡片图片
+
+        Args:
+            report_id: 报告 ID
+            template_style: 模板风格
+
+        Returns:
+            图片数据，不存在或已过期时返回 None
+        """
+
+    @abstractmethod
+    async def set(self, report_id: str, template_style: str, data: bytes) -> None:
+        """保存卡片图片
+
+        Args:
+            report_id: 报告 ID
+            template_style: 模板风格
+            data: 图片数据
+        """
+
+
+class DiskCardImageCache(CardImageCache):
+    """本地磁盘卡片缓存（同机多进程共享）"""
+
+    def __init__(self, cache_dir: str, ttl_seconds: int):
+        """初始化磁盘缓存
+
+        Args:
+            cache_dir: 缓存目录
+            ttl_seconds: 缓存保存时长（秒）
+        """
+        super().__init__(ttl_seconds)
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, report_id: str, template_style: str) -> Path:
+        # report_id 来自 URL，按原始值哈希作为文件名：防止路径穿越，不同 ID 也不会冲突
+        digest = hashlib.sha256(report_id.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{digest}_{template_style}.jpg"
+
+    def _read(self, path: Path) -> Optional[bytes]:
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl_seconds:
+                path.unlink(missing_ok=True)
+                return None
+            return path.read_bytes()
+        except OSError:
+            return None
+
+    def _write(self, path: Path, data: bytes) -> None:
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+    async def get(self, report_id: str, template_style: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._read, self._path(report_id, template_style))
+
+    async def set(self, report_id: str, template_style: str, data: bytes) -> None:
+        await asyncio.to_thread(self._write, self._path(report_id, template_style), data)
+
+
+class RedisCardImageCache(CardImageCache):
+    """Redis 卡片缓存（多实例共享）"""
+
+    KEY_PREFIX = "share_card_image:"
+
+    def __init__(self, host: str, port: int, db: int, ttl_seconds: int):
+        """初始化 Redis 缓存
+
+        Args:
+            host: Redis 主机
+            port: Redis 端口
+            db: Redis 数据库编号
+            ttl_seconds: 缓存保存时长（秒）
+        """
+        super().__init__(ttl_seconds)
+        import redis.asyncio as redis
+
+        self.client = redis.Redis(host=host, port=port, db=db)
+
+    async def get(self, report_id: str, template_style: str) -> Optional[bytes]:
+        return await self.client.get(f"{self.KEY_PREFIX}{report_id}:{template_style}")
+
+    async def set(self, report_id: str, template_style: str, data: bytes) -> None:
+        await self.client.set(
+            f"{self.KEY_PREFIX}{report_id}:{template_style}",
+            data,
+            ex=self.ttl_seconds
+        )
+
+
+@lru_cache()
+def get_card_image_cache() -> CardImageCache:
+    """根据 SHARE_CARD_CACHE_BACKEND 创建卡片图片缓存单例"""
+    settings = get_settings()
+    ttl_seconds = settings.OSS_IMAGE_EXPIRE_DAYS * 24 * 3600
+    backend = settings.SHARE_CARD_CACHE_BACKEND.lower()
+
+    if backend == "disk":
+        cache = DiskCardImageCache(settings.SHARE_CARD_CACHE_DIR, ttl_seconds)
+    elif backend == "redis":
+        cache = RedisCardImageCache(
+            settings.REDIS_HOST, settings.REDIS_PORT, settings.REDIS_DB, ttl_seconds
+        )
+    else:
+        raise ValueError(f"不支持的卡片缓存后端: {settings.SHARE_CARD_CACHE_BACKEND}")
+
+    logger.info(f"分享卡片图片缓存后端: {backend}")
+    return cache
@@ -0,0 +1,194 @@
+"""分享卡片渲染服务"""
+import io
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Optional
+
+from loguru import logger
+from PIL import Image, ImageDraw, ImageFont
+
+from app.core.config import get_settings
+
+
+# 标准分享卡片尺寸
+CARD_WIDTH, CARD_HEIGHT = 750, 1334
+
+# 模板风格配置
+CARD_STYLES: Dict[str, Dict[str, str]] = {
+    'modern': {'background': '#F5F7FA'},
+    'classic': {'background': '#FFF8E1'},
+    'minimal': {'background': '#FFFFFF'},
+}
+DEFAULT_STYLE = 'modern'
+
+# 字号
+TITLE_FONT_SIZE = 48
+TEXT_FONT_SIZE = 32
+SMALL_FONT_SIZE = 24
+
+# 常见系统中文字体（按顺序尝试，CARD_FONT_PATH 优先）
+FONT_CANDIDATES = [
+    "msyh.ttc",
+    "simhei.ttf",
+    "/System/Library/Fonts/PingFang.ttc",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+    "arial.ttf",
+]
+
+# 二维码区域（位于底部说明文字上方，与 ImageService 默认二维码尺寸一致）
+QR_CODE_SIZE = 300
+QR_CODE_TOP = CARD_HEIGHT - 140 - QR_CODE_SIZE
+
+
+@lru_cache(maxsize=None)
+def load_font(size: int) -> ImageFont.ImageFont:
+    """加载指定字号的字体（进程内缓存）
+
+    Args:
+        size: 字号
+
+    Returns:
+        字体对象，所有候选字体均不可用时使用 Pillow 默认字体
+    """
+    font_path = get_settings().CARD_FONT_PATH
+    candidates = ([font_path] if font_path else []) + FONT_CANDIDATES
+    for candidate in candidates:
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+
+    logger.warning(f"未找到可用字体，使用默认字体 (字号 {size})")
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:
+        # Pillow < 10.1 的默认字体不支持字号
+        return ImageFont.load_default()
+
+
+class CardRenderer:
+    """分享卡片渲染器
+
+    背景、标题、底部说明等静态图层在初始化时按风格预渲染，每次请求只复制
+    底图并绘制动态文字、粘贴二维码。
+    """
+
+    def __init__(self):
+        """初始化渲染器并预渲染所有风格的静态图层"""
+        self.title_font = load_font(TITLE_FONT_SIZE)
+        self.text_font = load_font(TEXT_FONT_SIZE)
+        self.small_font = load_font(SMALL_FONT_SIZE)
+
+        self._base_layers: Dict[str, Image.Image] = {
+            style: self._render_base_layer(config['background'])
+            for style, config in CARD_STYLES.items()
+        }
+        self._qr_lock = threading.Lock()
+        self._qr_images: "OrderedDict[bytes, Image.Image]" = OrderedDict()
+        self._qr_cache_size = get_settings().CARD_QR_IMAGE_CACHE_SIZE
+
+        logger.info(f"分享卡片模板预渲染完成: {', '.join(self._base_layers)}")
+
+    def _render_base_layer(self, background: str) -> Image.Image:
+        """渲染静态图层（背景、标题、底部说明）"""
+        img = Image.new('RGB', (CARD_WIDTH, CARD_HEIGHT), background)
+        draw = ImageDraw.Draw(img)
+
+        draw.text(
+            (CARD_WIDTH // 2, 100), "家具健康检测报告",
+            fill='#333333', font=self.title_font, anchor='mm'
+        )
+        draw.text(
+            (CARD_WIDTH // 2, CARD_HEIGHT - 100), "扫码查看完整报告",
+            fill='#999999', font=self.small_font, anchor='mm'
+        )
+        return img
+
+    def render(
+        self,
+        report: dict,
+        catchphrase: str,
+        template_style: str = DEFAULT_STYLE,
+        qr_code: Optional[bytes] = None
+    ) -> bytes:
+        """渲染分享卡片
+
+        Args:
+            report: 检测报告数据
+            catchphrase: 金句
+            template_style: 模板风格
+            qr_code: 二维码 PNG 数据，提供时合成到卡片底部
+
+        Returns:
+            卡片图片数据 (JPEG)
+        """
+        base = self._base_layers.get(template_style, self._base_layers[DEFAULT_STYLE])
+        img = base.copy()
+        draw = ImageDraw.Draw(img)
+
+        # 绘制金句
+        draw.text(
+            (CARD_WIDTH // 2, 200), catchphrase,
+            fill='#FF6B6B', font=self.text_font, anchor='mm'
+        )
+
+        # 绘制材料信息
+        y_offset = 300
+        materials = report.get('materials', [])
+        if materials:
+            material = materials[0]
+            draw.text((100, y_offset), f"材料类型: {material['material_type']}", fill='#666666', font=self.text_font)
+            draw.text((100, y_offset + 60), f"子类型: {material['sub_type']}", fill='#666666', font=self.text_font)
+            draw.text((100, y_offset + 120), f"置信度: {material['confidence']}%", fill='#666666', font=self.text_font)
+
+        # 绘制风险评估
+        y_offset = 550
+        risk = report.get('risk_assessment', {})
+        draw.text((100, y_offset), f"风险等级: {risk.get('risk_level', '未知')}", fill='#FF6B6B', font=self.text_font)
+
+        # 绘制建议
+        y_offset = 650
+        recommendations = risk.get('recommendations', [])
+        if recommendations:
+            draw.text((100, y_offset), "健康建议:", fill='#333333', font=self.text_font)
+            for i, rec in enumerate(recommendations[:3]):  # 最多显示3条
+                draw.text((100, y_offset + 60 + i * 50), f"• {rec}", fill='#666666', font=self.small_font)
+
+        # 合成二维码
+        if qr_code:
+            qr_image = self._load_qr_image(qr_code)
+            left = (CARD_WIDTH - qr_image.width) // 2
+            top = QR_CODE_TOP + (QR_CODE_SIZE - qr_image.height) // 2
+            img.paste(qr_image, (left, top))
+
+        output = io.BytesIO()
+        img.save(output, format='JPEG', quality=90)
+        return output.getvalue()
+
+    def _load_qr_image(self, qr_code: bytes) -> Image.Image:
+        """解码二维码图片（按内容缓存，二维码内容确定时复用）"""
+        with self._qr_lock:
+            qr_image = self._qr_images.get(qr_code)
+            if qr_image is not None:
+                self._qr_images.move_to_end(qr_code)
+        if qr_image is not None:
+            return qr_image
+
+        qr_image = Image.open(io.BytesIO(qr_code)).convert('RGB')
+        if max(qr_image.size) > QR_CODE_SIZE:
+            # 超出区域时用最近邻缩小，保持模块边缘清晰
+            qr_image = qr_image.resize((QR_CODE_SIZE, QR_CODE_SIZE), Image.Resampling.NEAREST)
+
+        with self._qr_lock:
+            self._qr_images[qr_code] = qr_image
+            while len(self._qr_images) > self._qr_cache_size:
+                self._qr_images.popitem(last=False)
+        return qr_image
+
+
+@lru_cache()
+def get_card_renderer() -> CardRenderer:
+    """获取分享卡片渲染器单例"""
+    return CardRenderer()
@@ -0,0 +1,146 @@
+"""本地嵌入模型（不依赖 ChromaDB）
+
+默认模型与 ChromaDB 的 DefaultEmbeddingFunction 相同：all-MiniLM-L6-v2 的 ONNX 版本，
+模型文件与 ChromaDB 共用同一缓存目录，分词、截断、均值池化与归一化方式一致，
+因此查询向量与导入脚本写入的向量可以直接比较。numpy 检索后端只需
+onnxruntime 与 tokenizers，不必在 worker 中安装或导入 ChromaDB。
+"""
+import tarfile
+import threading
+from pathlib import Path
+from typing import List, Sequence
+
+import numpy as np
+from loguru import logger
+
+ONNX_MODEL_NAME = "all-MiniLM-L6-v2"
+ONNX_MODEL_URL = "https://chroma-onnx-models.s3.amazonaws.com/all-MiniLM-L6-v2/onnx.tar.gz"
+# 与 ChromaDB 相同的缓存位置，已由导入脚本下载过的模型直接复用
+ONNX_MODEL_DIR = Path.home() / ".cache" / "chroma" / "onnx_models" / ONNX_MODEL_NAME
+# 与 ChromaDB（及 sentence-transformers）一致的最大序列长度
+MAX_SEQUENCE_LENGTH = 256
+
+
+class OnnxMiniLMEmbedding:
+    """all-MiniLM-L6-v2 ONNX 本地推理（首次调用时加载，模型不存在时下载）"""
+
+    def __init__(
+        self,
+        model_dir: Path = ONNX_MODEL_DIR,
+        intra_op_threads: int = 0,
+        batch_size: int = 32
+    ):
+        """
+        Args:
+            model_dir: 模型缓存目录（解压后的模型位于其下的 onnx/）
+            intra_op_threads: onnxruntime 单次推理的线程数，0 表示由 onnxruntime 决定
+            batch_size: 每批推理的文本数
+        """
+        self.model_dir = Path(model_dir)
+        self.intra_op_threads = intra_op_threads
+        self.batch_size = batch_size
+        self._tokenizer = None
+        self._session = None
+        self._lock = threading.Lock()
+
+    def _download(self) -> None:
+        import httpx
+
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+        archive = self.model_dir / "onnx.tar.gz"
+        tmp_path = archive.with_suffix(".tmp")
+        logger.info(f"下载嵌入模型: {ONNX_MODEL_URL}")
+        with httpx.stream("GET", ONNX_MODEL_URL, follow_redirects=True, timeout=60) as response:
+            response.raise_for_status()
+            with open(tmp_path, "wb") as f:
+                for chunk in response.iter_bytes():
+                    f.write(chunk)
+        tmp_path.replace(archive)
+        with tarfile.open(archive, "r:gz") as tar:
+            tar.extractall(self.model_dir)
+
+    def _load(self) -> None:
+        if self._session is not None:
+            return
+        with self._lock:
+            if self._session is not None:
+                return
+            import onnxruntime
+            from tokenizers import Tokenizer
+
+            model_path = self.model_dir / "onnx"
+            if not (model_path / "model.onnx").exists():
+                self._download()
+
+            tokenizer = Tokenizer.from_file(str(model_path / "tokenizer.json"))
+            tokenizer.enable_truncation(max_length=MAX_SEQUENCE_LENGTH)
+            tokenizer.enable_padding(pad_id=0, pad_token="[PAD]", length=MAX_SEQUENCE_LENGTH)
+
+            options = onnxruntime.SessionOptions()
+            if self.intra_op_threads > 0:
+                options.intra_op_num_threads = self.intra_op_threads
+            self._tokenizer = tokenizer
+            self._session = onnxruntime.InferenceSession(
+                str(model_path / "model.onnx"),
+                sess_options=options,
+                providers=["CPUExecutionProvider"]
+            )
+            logger.info(f"嵌入模型已加载: {model_path}")
+
+    def _forward(self, texts: List[str]) -> np.ndarray:
+        encoded = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encoded], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+        hidden = self._session.run(None, {
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+            "token_type_ids": np.zeros_like(input_ids),
+        })[0]
+        # 按注意力掩码做均值池化，再 L2 归一化
+        mask = attention_mask[:, :, None].astype(hidden.dtype)
+        embeddings = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return (embeddings / np.maximum(norms, 1e-12)).astype(np.float32)
+
+    def __call__(self, texts: Sequence[str]) -> List[List[float]]:
+        self._load()
+        texts = list(texts)
+        if not texts:
+            return []
+        batches = [
+            self._forward(texts[i:i + self.batch_size])
+            for i in range(0, len(texts), self.batch_size)
+        ]
+        return np.concatenate(batches).tolist()
+
+
+class SentenceTransformerEmbedding:
+    """sentence-transformers 模型（与 ChromaDB 的 SentenceTransformerEmbeddingFunction 一致）"""
+
+    def __init__(self, model_name: str, device: str = "cpu"):
+        """
+        Args:
+            model_name: sentence-transformers 模型名
+            device: 推理设备
+        """
+        from sentence_transformers import SentenceTransformer
+
+        self._model = SentenceTransformer(model_name, device=device)
+
+    def __call__(self, texts: Sequence[str]) -> List[List[float]]:
+        return self._model.encode(list(texts), convert_to_numpy=True).tolist()
+
+
+def load_embedding_model(model_name: str = "", intra_op_threads: int = 0):
+    """创建本地嵌入模型
+
+    Args:
+        model_name: sentence-transformers 模型名，留空使用 all-MiniLM-L6-v2 ONNX 模型
+        intra_op_threads: ONNX 推理线程数，0 表示由 onnxruntime 决定
+
+    Returns:
+        嵌入函数（文本列表 -> 向量列表）
+    """
+    if not model_name:
+        return OnnxMiniLMEmbedding(intra_op_threads=intra_op_threads)
+    return SentenceTransformerEmbedding(model_name)
@@ -1,19 +1,114 @@
 """图片处理服务"""
 import io
 import os
-from typing import Optional, Tuple
-from datetime import datetime, timedelta
+import math
+import time
+import asyncio
+import threading
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
 from pathlib import Path
 from loguru import logger
-from PIL import Image
+from PIL import Image, ImageOps
 import qrcode
 import oss2
 from app.core.config import get_settings
 
 
+# OSS 生命周期规则（上传的图片到期后自动删除）
+LIFECYCLE_RULE_ID = 'auto-delete-furniture-images'
+LIFECYCLE_RULE_PREFIX = 'furniture/'
+
+# EXIF 方向标签
+EXIF_ORIENTATION_TAG = 0x0112
+
+# 支持的输出格式 {格式: (扩展名, Content-Type)}
+IMAGE_FORMATS = {
+    'JPEG': ('.jpg', 'image/jpeg'),
+    'WEBP': ('.webp', 'image/webp'),
+}
+
+# 二维码默认边框宽度（模块数），渲染与缓存键共用
+QR_BORDER = 2
+
+
+class ImageUploads(NamedTuple):
+    """送检图片的上传结果"""
+    image_url: str  # 原始分辨率图片（方向已校正、去除元数据）
+    vlm_image_url: str  # 按视觉模型缩放策略缩放的图片
+    thumbnail_urls: Dict[str, str]  # {长边像素: 缩略图 URL}
+
+
+def qr_cache_key(data: str, size: int, border: int) -> str:
+    """二维码缓存键（内容与渲染参数的哈希）"""
+    return hashlib.sha256(f"{data}|{size}|{border}".encode('utf-8')).hexdigest()
+
+
+def compute_vlm_size(
+    width: int,
+    height: int,
+    max_long_edge: int,
+    max_pixels: int,
+    patch_size: int
+) -> Tuple[int, int]:
+    """计算送入视觉模型的图片尺寸
+
+    等比例缩小到长边与总像素上限以内（不放大），再将宽高向下对齐到
+    patch 网格。上限为 0 表示不限制。
+
+    Args:
+        width: 原始宽度
+        height: 原始高度
+        max_long_edge: 长边上限
+        max_pixels: 总像素上限
+        patch_size: 模型每个视觉 token 覆盖的像素边长
+
+    Returns:
+        (width, height)
+    """
+    scale = 1.0
+    if max_long_edge:
+        scale = min(scale, max_long_edge / max(width, height))
+    if max_pixels:
+        scale = min(scale, math.sqrt(max_pixels / (width * height)))
+
+    new_width = width * scale
+    new_height = height * scale
+    if patch_size:
+        new_width = max(patch_size, int(new_width) // patch_size * patch_size)
+        new_height = max(patch_size, int(new_height) // patch_size * patch_size)
+    return int(new_width), int(new_height)
+
+
+def estimate_vision_tokens(width: int, height: int, patch_size: int) -> int:
+    """估算图片占用的视觉 token 数"""
+    return max(1, width // patch_size) * max(1, height // patch_size)
+
+
 class ImageService:
     """图片处理服务类"""
 
+    # 已校验的生命周期过期天数（进程内缓存，None 表示尚未校验）
+    _lifecycle_verified_days: Optional[int] = None
+
+    # 已存储对象表 {对象名: 写入时间戳}，进程内共享
+    _known_objects: "OrderedDict[str, float]" = OrderedDict()
+    _known_objects_lock = threading.Lock()
+
+    # 二维码缓存 {内容哈希: PNG 数据} / {内容哈希: (签名 URL, 复用截止时间戳)}
+    _qr_image_cache: "OrderedDict[str, bytes]" = OrderedDict()
+    _qr_url_cache: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+
+    # 上传统计
+    upload_stats: Dict[str, int] = {
+        'put_count': 0,
+        'put_bytes': 0,
+        'dedup_hits': 0,
+        'dedup_bytes': 0,
+        'head_count': 0,
+    }
+
     def __init__(self):
         """初始化图片服务"""
         self.settings = get_settings()
@@ -40,9 +135,12 @@ class ImageService:
     ) -> str:
         """上传图片到阿里云 OSS
 
+        对象名由内容哈希生成，相同内容只存储一份；对象已存在且未临近
+        过期时跳过 put_object，直接返回签名 URL。
+
         Args:
             file_data: 图片二进制数据
-            file_name: 文件名
+            file_name: 文件名（仅用于确定扩展名）
             content_type: 内容类型
             expire_days: 过期天数，默认使用配置中的值
 
@@ -50,16 +148,29 @@ class ImageService:
             图片 URL
         """
         try:
-            # 生成唯一的文件路径
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            object_name = f"furniture/{timestamp}_{file_name}"
+            object_name = self.build_object_name(file_data, file_name)
 
             # 设置过期时间
             if expire_days is None:
                 expire_days = self.settings.OSS_IMAGE_EXPIRE_DAYS
+            expire_seconds = expire_days * 24 * 3600
+
+            stored_at = await asyncio.to_thread(
+                self._find_stored_object, object_name, expire_seconds
+            )
+            if stored_at is not None:
+                stats = ImageService.upload_stats
+                stats['dedup_hits'] += 1
+                stats['dedup_bytes'] += len(file_data)
+                # 签名有效期不超过对象剩余的生命周期
+                remaining = expire_seconds - int(time.time() - stored_at)
+                url = self.bucket.sign_url('GET', object_name, remaining)
+                logger.info(f"对象已存在，跳过上传: {object_name}")
+                return url
 
-            # 上传文件
-            result = self.bucket.put_object(
+            # 上传文件（在线程中执行，避免阻塞事件循环）
+            result = await asyncio.to_thread(
+                self.bucket.put_object,
                 object_name,
                 file_data,
                 headers={
@@ -68,14 +179,14 @@ class ImageService:
             )
 
             if result.status == 200:
+                self._remember_object(object_name, time.time())
+                stats = ImageService.upload_stats
+                stats['put_count'] += 1
+                stats['put_bytes'] += len(file_data)
+
                 # 生成带签名的访问 URL (有效期为配置的过期天数)
-                expire_seconds = expire_days * 24 * 3600
                 url = self.bucket.sign_url('GET', object_name, expire_seconds)
                 logger.info(f"图片上传成功: {object_name}")
-
-                # 设置生命周期规则（7天后自动删除）
-                self._set_lifecycle_rule(expire_days)
-
                 return url
             else:
                 raise Exception(f"上传失败，状态码: {result.status}")
@@ -84,87 +195,274 @@ class ImageService:
             logger.error(f"图片上传到 OSS 失败: {e}")
             raise
 
-    def _set_lifecycle_rule(self, expire_days: int) -> None:
-        """设置 OSS 生命周期规则
+    async def upload_with_derivatives(
+        self,
+        image_data: bytes,
+        sizes: Optional[List[int]] = None,
+        image_format: Optional[str] = None
+    ) -> ImageUploads:
+        """上传送检图片的原图、视觉模型输入图及多尺寸缩略图
+
+        只解码一次：原图保持原始分辨率（方向已校正、去除元数据），视觉模型
+        输入图按视觉模型缩放策略由原图缩放，缩略图由大到小逐级缩放；
+        编码与上传并行执行。
 
         Args:
-            expire_days: 过期天数
+            image_data: 原始图片数据
+            sizes: 缩略图长边像素列表，默认使用配置中的值
+            image_format: 缩略图输出格式 JPEG 或 WEBP，默认使用配置中的值
+
+        Returns:
+            原图、视觉模型输入图与缩略图的 URL
         """
+        if sizes is None:
+            sizes = self.settings.IMAGE_DERIVATIVE_SIZES
+        derivative_format = (
+            image_format or self.settings.IMAGE_DERIVATIVE_FORMAT
+        ).upper()
+        main_format = self.settings.IMAGE_OUTPUT_FORMAT.upper()
+
+        img, vlm_img, derivatives = await asyncio.to_thread(
+            self._decode_with_derivatives, image_data, sizes
+        )
+
+        # 原图不按字节预算压缩，保留原始分辨率的细节
+        original_task = asyncio.to_thread(
+            self.encode_image, img, target_bytes=0, image_format=main_format
+        )
+        vlm_task = asyncio.to_thread(self.encode_image, vlm_img, image_format=main_format)
+        derivative_tasks = [
+            asyncio.to_thread(
+                self.encode_image, derivative,
+                target_bytes=0, image_format=derivative_format
+            )
+            for _, derivative in derivatives
+        ]
+        encoded = await asyncio.gather(original_task, vlm_task, *derivative_tasks)
+
+        # 相同内容只上传一次（例如原图已小于缩略图尺寸）
+        formats = [main_format, main_format] + [derivative_format] * len(derivatives)
+        unique: Dict[bytes, int] = {}
+        uploads = []
+        for data, fmt in zip(encoded, formats):
+            if data not in unique:
+                unique[data] = len(uploads)
+                extension, content_type = IMAGE_FORMATS[fmt]
+                uploads.append(self.upload_to_oss(
+                    data,
+                    f"furniture{extension}",
+                    content_type=content_type
+                ))
+        upload_urls = await asyncio.gather(*uploads)
+        urls = [upload_urls[unique[data]] for data in encoded]
+
+        logger.info(
+            f"原图 {img.width}x{img.height}、送检图 {vlm_img.width}x{vlm_img.height} 及 "
+            f"{len(derivatives)} 个缩略图上传完成 "
+            f"({', '.join(str(edge) for edge, _ in derivatives)})"
+        )
+        return ImageUploads(urls[0], urls[1], {
+            str(edge): url
+            for (edge, _), url in zip(derivatives, urls[2:])
+        })
+
+    def _decode_with_derivatives(
+        self,
+        image_data: bytes,
+        sizes: List[int]
+    ) -> Tuple[Image.Image, Image.Image, List[Tuple[int, Image.Image]]]:
+        """全尺寸解码一次，由原图缩放出视觉模型输入图与逐级缩略图
+
+        Returns:
+            (原图, 视觉模型输入图, [(长边像素, 缩略图)])
+        """
+        img = self.decode_image(image_data)
+        target = self.vlm_target_size(*img.size)
+        vlm_img = img if img.size == target else img.resize(target, Image.Resampling.LANCZOS)
+
+        # 逐级缩放：每个尺寸从上一级结果缩小，比每次从原图缩放更快
+        derivatives = []
+        current = img
+        for edge in sorted(set(sizes), reverse=True):
+            if max(current.size) > edge:
+                current = current.copy()
+                current.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+            derivatives.append((edge, current))
+        return img, vlm_img, derivatives
+
+    @staticmethod
+    def build_object_name(file_data: bytes, file_name: str) -> str:
+        """根据内容哈希生成对象名
+
+        Args:
+            file_data: 文件二进制数据
+            file_name: 原始文件名（保留扩展名）
+
+        Returns:
+            形如 furniture/<sha256><ext> 的对象名
+        """
+        digest = hashlib.sha256(file_data).hexdigest()
+        suffix = Path(file_name).suffix.lower()
+        return f"{LIFECYCLE_RULE_PREFIX}{digest}{suffix}"
+
+    def _find_stored_object(
+        self,
+        object_name: str,
+        expire_seconds: int
+    ) -> Optional[float]:
+        """检查对象是否已存储且可复用
+
+        先查进程内已知对象表，未命中时发送 HEAD 请求。对象写入时间超过
+        OSS_DEDUP_MAX_AGE_HOURS 时视为不可复用，需重新上传以刷新生命周期。
+
+        Args:
+            object_name: 对象名
+            expire_seconds: 对象生命周期（秒）
+
+        Returns:
+            对象写入时间戳，不存在或需要刷新时返回 None
+        """
+        # 至少保留一半生命周期，保证返回的签名 URL 有足够的有效期
+        max_age = min(
+            self.settings.OSS_DEDUP_MAX_AGE_HOURS * 3600,
+            expire_seconds // 2
+        )
+        now = time.time()
+
+        known = ImageService._known_objects
+        with ImageService._known_objects_lock:
+            stored_at = known.get(object_name)
+            if stored_at is not None:
+                if now - stored_at < max_age:
+                    known.move_to_end(object_name)
+                    return stored_at
+                del known[object_name]
+                return None
+
+        try:
+            meta = self.bucket.head_object(object_name)
+        except oss2.exceptions.NotFound:
+            return None
+        except Exception as e:
+            logger.warning(f"检查对象是否存在失败，按未存储处理: {e}")
+            return None
+
+        ImageService.upload_stats['head_count'] += 1
+        stored_at = float(meta.last_modified)
+        if now - stored_at >= max_age:
+            return None
+
+        self._remember_object(object_name, stored_at)
+        return stored_at
+
+    def _remember_object(self, object_name: str, stored_at: float) -> None:
+        """记录已存储对象（LRU，容量由配置限制）"""
+        known = ImageService._known_objects
+        with ImageService._known_objects_lock:
+            known[object_name] = stored_at
+            known.move_to_end(object_name)
+            while len(known) > self.settings.OSS_KNOWN_OBJECTS_CACHE_SIZE:
+                known.popitem(last=False)
+
+    @classmethod
+    def get_upload_stats(cls) -> Dict[str, int]:
+        """获取上传统计（PUT 次数/字节数、去重命中次数/字节数、HEAD 次数）"""
+        return dict(cls.upload_stats)
+
+    def ensure_lifecycle_rule(
+        self,
+        expire_days: Optional[int] = None,
+        force: bool = False
+    ) -> bool:
+        """确保 OSS 生命周期规则已配置（幂等）
+
+        启动时调用一次即可，校验结果在进程内缓存，上传路径不再访问
+        生命周期接口。规则缺失或过期天数不一致时会重新写入。
+
+        Args:
+            expire_days: 过期天数，默认使用配置中的值
+            force: 是否忽略缓存，强制重新校验并写入规则
+
+        Returns:
+            规则是否已生效
+        """
+        if expire_days is None:
+            expire_days = self.settings.OSS_IMAGE_EXPIRE_DAYS
+
+        if not force and ImageService._lifecycle_verified_days == expire_days:
+            return True
+
         try:
-            # 检查是否已存在规则
-            lifecycle = self.bucket.get_bucket_lifecycle()
-            rule_exists = any(
-                rule.id == 'auto-delete-furniture-images'
-                for rule in lifecycle.rules
+            try:
+                rules = self.bucket.get_bucket_lifecycle().rules
+            except oss2.exceptions.NoSuchLifecycle:
+                rules = []
+
+            current = next(
+                (rule for rule in rules if rule.id == LIFECYCLE_RULE_ID),
+                None
+            )
+            current_days = (
+                current.expiration.days
+                if current is not None and current.expiration is not None
+                else None
             )
 
-            if not rule_exists:
-                # 创建生命周期规则
+            if force or current_days != expire_days:
+                # 保留桶上的其它规则，仅替换本服务的规则
                 rule = oss2.models.LifecycleRule(
-                    'auto-delete-furniture-images',
-                    'furniture/',
+                    LIFECYCLE_RULE_ID,
+                    LIFECYCLE_RULE_PREFIX,
                     status=oss2.models.LifecycleRule.ENABLED,
                     expiration=oss2.models.LifecycleExpiration(days=expire_days)
                 )
-                lifecycle = oss2.models.BucketLifecycle([rule])
-                self.bucket.put_bucket_lifecycle(lifecycle)
+                other_rules = [r for r in rules if r.id != LIFECYCLE_RULE_ID]
+                self.bucket.put_bucket_lifecycle(
+                    oss2.models.BucketLifecycle(other_rules + [rule])
+                )
                 logger.info(f"已设置 OSS 生命周期规则: {expire_days} 天后自动删除")
-        except oss2.exceptions.NoSuchLifecycle:
-            # 如果没有生命周期规则，创建新的
-            rule = oss2.models.LifecycleRule(
-                'auto-delete-furniture-images',
-                'furniture/',
-                status=oss2.models.LifecycleRule.ENABLED,
-                expiration=oss2.models.LifecycleExpiration(days=expire_days)
-            )
-            lifecycle = oss2.models.BucketLifecycle([rule])
-            self.bucket.put_bucket_lifecycle(lifecycle)
-            logger.info(f"已创建 OSS 生命周期规则: {expire_days} 天后自动删除")
+            else:
+                logger.info(f"OSS 生命周期规则已存在: {expire_days} 天后自动删除")
+
+            ImageService._lifecycle_verified_days = expire_days
+            return True
+
         except Exception as e:
             logger.warning(f"设置生命周期规则失败: {e}")
+            return False
 
     def compress_image(
         self,
         image_data: bytes,
         quality: Optional[int] = None,
-        max_size: Optional[Tuple[int, int]] = None
+        max_size: Optional[Tuple[int, int]] = None,
+        target_bytes: Optional[int] = None,
+        image_format: Optional[str] = None
     ) -> bytes:
         """压缩图片
 
+        JPEG 在目标尺寸更小时以 draft 模式直接按 1/2、1/4、1/8 解码，
+        同一流程内应用 EXIF 方向并去除元数据。指定目标字节数时二分搜索
+        满足预算的最高质量。
+
         Args:
             image_data: 原始图片数据
-            quality: 压缩质量 (1-100)，默认使用配置中的值
+            quality: 压缩质量 (1-100)，默认使用配置中的值；指定目标字节数时为质量上限
             max_size: 最大尺寸 (width, height)，如果提供则会等比例缩放
+            target_bytes: 目标字节数，默认使用配置中的值（0 表示不限制）
+            image_format: 输出格式 JPEG 或 WEBP，默认使用配置中的值
 
         Returns:
             压缩后的图片数据
         """
         try:
-            if quality is None:
-                quality = self.settings.IMAGE_QUALITY
-
-            # 打开图片
-            img = Image.open(io.BytesIO(image_data))
-
-            # 转换为 RGB 模式（如果是 RGBA 或其他模式）
-            if img.mode in ('RGBA', 'LA', 'P'):
-                # 创建白色背景
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = background
-            elif img.mode != 'RGB':
-                img = img.convert('RGB')
-
-            # 如果指定了最大尺寸，进行等比例缩放
-            if max_size:
-                img.thumbnail(max_size, Image.Resampling.LANCZOS)
-
-            # 压缩图片
-            output = io.BytesIO()
-            img.save(output, format='JPEG', quality=quality, optimize=True)
-            compressed_data = output.getvalue()
+            img = self.decode_image(image_data, max_size)
+            compressed_data = self.encode_image(
+                img,
+                quality=quality,
+                target_bytes=target_bytes,
+                image_format=image_format
+            )
 
             # 计算压缩率
             original_size = len(image_data)
@@ -182,45 +480,229 @@ class ImageService:
             logger.error(f"图片压缩失败: {e}")
             raise
 
+    def prepare_vlm_image(self, image_data: bytes) -> bytes:
+        """按视觉模型的缩放策略生成送检图片
+
+        长边不超过 VLM_IMAGE_MAX_LONG_EDGE、总像素不超过 VLM_IMAGE_MAX_PIXELS，
+        宽高对齐到模型的 patch 网格，避免服务端再次缩放。
+
+        Args:
+            image_data: 原始图片数据
+
+        Returns:
+            编码后的图片数据
+        """
+        img = self.decode_vlm_image(image_data)
+        encoded = self.encode_image(img)
+
+        width, height = img.size
+        tokens = estimate_vision_tokens(width, height, self.settings.VLM_IMAGE_PATCH_SIZE)
+        logger.info(
+            f"送检图片: {width}x{height}, 约 {tokens} 个视觉 token, "
+            f"{len(image_data) / 1024:.2f}KB -> {len(encoded) / 1024:.2f}KB"
+        )
+        return encoded
+
+    def vlm_target_size(self, width: int, height: int) -> Tuple[int, int]:
+        """按配置计算视觉模型输入尺寸（见 compute_vlm_size）"""
+        return compute_vlm_size(
+            width,
+            height,
+            max_long_edge=self.settings.VLM_IMAGE_MAX_LONG_EDGE,
+            max_pixels=self.settings.VLM_IMAGE_MAX_PIXELS,
+            patch_size=self.settings.VLM_IMAGE_PATCH_SIZE
+        )
+
+    def decode_vlm_image(self, image_data: bytes) -> Image.Image:
+        """解码并缩放到视觉模型的目标尺寸
+
+        Args:
+            image_data: 原始图片数据
+
+        Returns:
+            RGB 图像
+        """
+        with Image.open(io.BytesIO(image_data)) as probe:
+            width, height = probe.size
+            orientation = probe.getexif().get(EXIF_ORIENTATION_TAG, 1)
+        if orientation in (5, 6, 7, 8):
+            width, height = height, width
+
+        target = self.vlm_target_size(width, height)
+        img = self.decode_image(image_data, max_size=target)
+        if img.size != target:
+            img = img.resize(target, Image.Resampling.LANCZOS)
+        return img
+
+    def decode_image(
+        self,
+        image_data: bytes,
+        max_size: Optional[Tuple[int, int]] = None
+    ) -> Image.Image:
+        """解码图片为去除元数据、方向已校正的 RGB 图像
+
+        Args:
+            image_data: 原始图片数据
+            max_size: 最大尺寸 (width, height)，如果提供则会等比例缩放
+
+        Returns:
+            RGB 图像
+        """
+        img = Image.open(io.BytesIO(image_data))
+        orientation = img.getexif().get(EXIF_ORIENTATION_TAG, 1)
+
+        # JPEG 目标尺寸较小时直接低分辨率解码（DCT 缩放，跳过全尺寸解码）
+        if max_size and img.format == 'JPEG':
+            width, height = img.size
+            box_w, box_h = max_size
+            if orientation in (5, 6, 7, 8):
+                # 旋转 90° 的图片，解码前宽高互换
+                box_w, box_h = box_h, box_w
+            scale = min(box_w / width, box_h / height)
+            if scale < 1:
+                img.draft('RGB', (
+                    math.ceil(width * scale),
+                    math.ceil(height * scale)
+                ))
+
+        # 应用 EXIF 方向
+        if orientation != 1:
+            img = ImageOps.exif_transpose(img)
+
+        # 转换为 RGB 模式（如果是 RGBA 或其他模式）
+        if img.mode in ('RGBA', 'LA', 'P'):
+            # 创建白色背景
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            if img.mode == 'P':
+                img = img.convert('RGBA')
+            background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
+            img = background
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+
+        # draft 只能按 2 的幂缩小，剩余部分用 LANCZOS 精确缩放
+        if max_size:
+            img.thumbnail(max_size, Image.Resampling.LANCZOS)
+
+        # 去除 EXIF/ICC 等元数据
+        img.info = {}
+        return img
+
+    def encode_image(
+        self,
+        img: Image.Image,
+        quality: Optional[int] = None,
+        target_bytes: Optional[int] = None,
+        image_format: Optional[str] = None
+    ) -> bytes:
+        """编码图片，可按目标字节数搜索质量
+
+        Args:
+            img: RGB 图像
+            quality: 压缩质量 (1-100)，指定目标字节数时为质量上限
+            target_bytes: 目标字节数（0 表示不限制）
+            image_format: 输出格式 JPEG 或 WEBP
+
+        Returns:
+            编码后的图片数据
+        """
+        if quality is None:
+            quality = self.settings.IMAGE_QUALITY
+        if target_bytes is None:
+            target_bytes = self.settings.IMAGE_TARGET_BYTES
+        image_format = (image_format or self.settings.IMAGE_OUTPUT_FORMAT).upper()
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"不支持的输出格式: {image_format}")
+
+        if not target_bytes:
+            return self._save_image(img, image_format, quality, optimize=True)
+
+        # 二分搜索不超过预算的最高质量。JPEG 的 optimize 只重建霍夫曼表，
+        # 结果不会变大，搜索时可以跳过；WebP 的 method 会改变编码结果，
+        # 大小不单调，必须用最终设置搜索并直接使用搜索到的编码
+        search_optimize = image_format == 'WEBP'
+        low = min(self.settings.IMAGE_MIN_QUALITY, quality)
+        high = quality
+        encoded: Dict[int, bytes] = {}
+        while low < high:
+            mid = (low + high + 1) // 2
+            encoded[mid] = self._save_image(img, image_format, mid, optimize=search_optimize)
+            if len(encoded[mid]) <= target_bytes:
+                low = mid
+            else:
+                high = mid - 1
+
+        if search_optimize and low in encoded:
+            return encoded[low]
+        return self._save_image(img, image_format, low, optimize=True)
+
+    @staticmethod
+    def _save_image(
+        img: Image.Image,
+        image_format: str,
+        quality: int,
+        optimize: bool
+    ) -> bytes:
+        """按指定格式和质量编码图片"""
+        output = io.BytesIO()
+        if image_format == 'WEBP':
+            img.save(output, format='WEBP', quality=quality, method=4 if optimize else 0)
+        else:
+            img.save(output, format='JPEG', quality=quality, optimize=optimize)
+        return output.getvalue()
+
     def generate_qr_code(
         self,
         data: str,
         size: int = 300,
-        border: int = 2
+        border: int = QR_BORDER
     ) -> bytes:
         """生成二维码
 
+        按整数模块尺寸直接渲染，不做重采样，输出边长为不超过 size 的
+        模块数整数倍。
+
         Args:
             data: 二维码数据（通常是小程序路径）
-            size: 二维码尺寸（像素）
+            size: 二维码最大尺寸（像素）
             border: 边框宽度
 
         Returns:
             二维码图片数据
+
+        Raises:
+            ValueError: size 小于模块数（含边框），每个模块不足 1 像素，
+                缩小到 size 后无法扫描
         """
         try:
             # 创建二维码
             qr = qrcode.QRCode(
                 version=1,
                 error_correction=qrcode.constants.ERROR_CORRECT_H,
-                box_size=10,
                 border=border,
             )
             qr.add_data(data)
             qr.make(fit=True)
 
-            # 生成图片
-            img = qr.make_image(fill_color="black", back_color="white")
+            # 每个模块取整数像素，避免缩放导致边缘模糊
+            modules = qr.modules_count + 2 * border
+            if size < modules:
+                raise ValueError(
+                    f"二维码需要 {modules}x{modules} 个模块，{size} 像素内无法渲染"
+                )
+            qr.box_size = size // modules
 
-            # 调整尺寸
-            img = img.resize((size, size), Image.Resampling.LANCZOS)
+            # 生成图片
+            img = qr.make_image(fill_color="black", back_color="white").get_image()
+            if img.width > size or img.height > size:
+                raise ValueError(f"二维码尺寸 {img.width}x{img.height} 超过 {size}")
 
             # 转换为字节
             output = io.BytesIO()
-            img.save(output, format='PNG')
+            img.save(output, format='PNG', optimize=True)
             qr_data = output.getvalue()
 
-            logger.info(f"二维码生成成功，尺寸: {size}x{size}")
+            logger.info(f"二维码生成成功，尺寸: {img.width}x{img.height}")
 
             return qr_data
 
@@ -228,6 +710,53 @@ class ImageService:
             logger.error(f"二维码生成失败: {e}")
             raise
 
+    def get_qr_code(
+        self,
+        data: str,
+        size: int = 300,
+        border: int = QR_BORDER
+    ) -> bytes:
+        """获取二维码图片（内存 -> 磁盘 -> 重新生成）
+
+        二维码内容确定时渲染结果也确定，按内容哈希缓存。
+
+        Args:
+            data: 二维码数据
+            size: 二维码最大尺寸（像素）
+            border: 边框宽度
+
+        Returns:
+            二维码图片数据
+
+        Raises:
+            ValueError: size 容纳不下二维码（见 generate_qr_code）
+        """
+        key = qr_cache_key(data, size, border)
+
+        cache = ImageService._qr_image_cache
+        qr_data = cache.get(key)
+        if qr_data is not None:
+            cache.move_to_end(key)
+            return qr_data
+
+        cache_file = Path(self.settings.QR_CACHE_DIR) / f"{key}.png"
+        try:
+            qr_data = cache_file.read_bytes()
+        except OSError:
+            qr_data = self.generate_qr_code(data, size, border)
+            try:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+                tmp_file.write_bytes(qr_data)
+                os.replace(tmp_file, cache_file)
+            except OSError as e:
+                logger.warning(f"二维码磁盘缓存写入失败: {e}")
+
+        cache[key] = qr_data
+        while len(cache) > self.settings.QR_MEMORY_CACHE_SIZE:
+            cache.popitem(last=False)
+        return qr_data
+
     async def upload_image_file(
         self,
         file_path: str,
@@ -266,32 +795,46 @@ class ImageService:
     async def generate_and_upload_qr_code(
         self,
         miniprogram_path: str,
-        size: int = 300
+        size: int = 300,
+        border: int = QR_BORDER
     ) -> str:
         """生成二维码并上传到 OSS
 
+        同一路径的二维码只渲染、上传一次；短时间内重复分享直接复用已签名
+        的 URL，之后由内容寻址对象名在 OSS 端去重。
+
         Args:
             miniprogram_path: 小程序路径
             size: 二维码尺寸
+            border: 边框宽度
 
         Returns:
             二维码图片 URL
         """
         try:
-            # 生成二维码
-            qr_data = self.generate_qr_code(miniprogram_path, size)
+            key = qr_cache_key(miniprogram_path, size, border)
+            url_cache = ImageService._qr_url_cache
+            cached = url_cache.get(key)
+            if cached is not None:
+                if cached[1] > time.time():
+                    url_cache.move_to_end(key)
+                    return cached[0]
+                url_cache.pop(key, None)
 
-            # 生成文件名
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            file_name = f"qrcode_{timestamp}.png"
+            # 生成二维码
+            qr_data = self.get_qr_code(miniprogram_path, size, border)
 
             # 上传到 OSS
             url = await self.upload_to_oss(
                 qr_data,
-                file_name,
+                "qrcode.png",
                 content_type="image/png"
             )
 
+            url_cache[key] = (url, time.time() + self.settings.QR_URL_CACHE_SECONDS)
+            while len(url_cache) > self.settings.QR_MEMORY_CACHE_SIZE:
+                url_cache.popitem(last=False)
+
             return url
 
         except Exception as e:
@@ -0,0 +1,137 @@
+"""知识库材料记录"""
+import sys
+from typing import Dict, NamedTuple, Tuple
+
+from loguru import logger
+from pydantic import ValidationError
+
+from app.models.schemas import RiskAssessment, RiskLevel
+
+# 知识库中没有匹配材料时使用的默认风险评估（只构建一次，所有请求共用）
+DEFAULT_RISK_ASSESSMENT = RiskAssessment(
+    risk_level=RiskLevel.MEDIUM,
+    risk_score=50,
+    harmful_substances=['未知'],
+    sensitive_groups=['婴幼儿', '孕妇', '呼吸道敏感人群'],
+    health_impacts=['建议咨询专业人士'],
+    recommendations=['定期通风', '保持室内空气流通']
+)
+
+
+def intern_text(value) -> str:
+    """驻留字符串，相同的材料类型、有害物质等在所有记录间共享一份"""
+    return sys.intern(str(value)) if value is not None else ''
+
+
+def intern_list(values) -> Tuple[str, ...]:
+    return tuple(intern_text(v) for v in values or ())
+
+
+def risk_level_from_score(risk_score: float) -> RiskLevel:
+    """按风险评分推断风险等级（<40 低，<70 中，其余高）"""
+    if risk_score < 40:
+        return RiskLevel.LOW
+    if risk_score < 70:
+        return RiskLevel.MEDIUM
+    return RiskLevel.HIGH
+
+
+def build_risk_assessment(material_id: str, risk: Dict) -> RiskAssessment:
+    """由知识库数据构建并校验风险评估
+
+    风险等级不是合法枚举值（如"中高风险"）时按评分推断并记录警告；
+    数据无法通过校验时使用默认风险评估。
+
+    Args:
+        material_id: 材料 ID（用于日志）
+        risk: 知识库中的 risk_assessment 数据
+
+    Returns:
+        风险评估
+    """
+    risk_level = risk.get('risk_level')
+    try:
+        level = RiskLevel(risk_level)
+    except ValueError:
+        try:
+            risk_score = float(risk.get('risk_score', 50))
+        except (TypeError, ValueError):
+            risk_score = 50.0
+        level = risk_level_from_score(risk_score)
+        logger.warning(
+            f"材料 {material_id} 的风险等级 '{risk_level}' 无效，按评分使用 '{level.value}'"
+        )
+
+    try:
+        assessment = RiskAssessment(
+            risk_level=level,
+            risk_score=risk.get('risk_score'),
+            harmful_substances=intern_list(risk.get('harmful_substances')),
+            sensitive_groups=intern_list(risk.get('sensitive_groups')),
+            health_impacts=intern_list(risk.get('health_impacts')),
+            recommendations=intern_list(risk.get('recommendations'))
+        )
+    except ValidationError as e:
+        logger.warning(f"材料 {material_id} 的风险评估数据无效，使用默认风险评估: {e}")
+        return DEFAULT_RISK_ASSESSMENT
+    return assessment
+
+
+class MaterialRecord(NamedTuple):
+    """知识库材料记录（不可变，无实例字典）
+
+    风险评估在加载时构建并校验，请求直接复用（RiskAssessment 为冻结模型）。
+    """
+    id: str
+    material_type: str
+    sub_type: str
+    description: str
+    aliases: Tuple[str, ...]
+    texture: str
+    color: str
+    pattern: str
+    risk_assessment: RiskAssessment
+
+    @classmethod
+    def from_dict(cls, material: Dict) -> "MaterialRecord":
+        """由知识库 JSON 数据构建记录
+
+        Args:
+            material: 材料数据字典
+
+        Returns:
+            材料记录
+        """
+        material_id = intern_text(material.get('id'))
+        visual_cues = material.get('visual_cues', {})
+        risk = material.get('risk_assessment')
+        return cls(
+            id=material_id,
+            material_type=intern_text(material.get('material_type')),
+            sub_type=intern_text(material.get('sub_type')),
+            description=material.get('description', ''),
+            aliases=intern_list(material.get('aliases')),
+            texture=intern_text(visual_cues.get('texture', '')),
+            color=intern_text(visual_cues.get('color', '')),
+            pattern=intern_text(visual_cues.get('pattern', '')),
+            # 与检测流程原先的处理一致：没有风险数据时使用默认风险评估
+            risk_assessment=(
+                build_risk_assessment(material_id, risk) if risk else DEFAULT_RISK_ASSESSMENT
+            )
+        )
+
+    def to_dict(self) -> Dict:
+        """转换为知识库 JSON 结构"""
+        return {
+            'id': self.id,
+            'material_type': self.material_type,
+            'sub_type': self.sub_type,
+            'aliases': list(self.aliases),
+            'description': self.description,
+            'visual_cues': {
+                'texture': self.texture,
+                'color': self.color,
+                'pattern': self.pattern,
+            },
+            'risk_assessment': self.risk_assessment.model_dump(mode="json"),
+        }
@@ -0,0 +1,534 @@
+"""知识库编译快照
+
+将 knowledge_base.json 校验后编译为带版本号的二进制快照，启动时通过
+mmap 加载，多个 worker 进程共享同一份只读页面。
+
+文件结构::
+
+    magic (8 字节) | 格式版本 (uint32) | 头部长度 (uint32) | 头部 JSON | 数组区
+
+头部记录源 JSON 的 sha256、修改时间与大小、材料数以及各数组的偏移、类型与形状；
+数组按 8 字节对齐，加载时直接引用映射内存，不复制。
+
+所有字符串（材料字段、列表项、检索词项、别名键）去重后存入一张字符串表，
+其余数组只保存字符串编号。材料 ID、子类型、材料类型、解析键、倒排表与
+检索词表都保存为开放寻址哈希表（键的 UTF-8 字节按 crc32 取槽位），
+加载时不解码任何字符串、不构建任何材料记录：材料与字符串在首次访问时
+从映射内存解码并缓存，未访问的数据只占用共享的页面缓存。
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from app.models.schemas import RiskAssessment, RiskLevel
+from app.services.kb_records import MaterialRecord
+from app.services.sub_type_resolver import SubTypeResolver
+from app.services.text_index import BM25Index
+
+MAGIC = b'FHKBSNAP'
+FORMAT_VERSION = 2
+PREFIX = struct.Struct('<8sII')
+ALIGNMENT = 8
+
+# 材料的字符串列，对应 material_columns 的各列
+STRING_COLUMNS = (
+    'id', 'material_type', 'sub_type', 'description',
+    'texture', 'color', 'pattern', 'risk_level'
+)
+# 变长字符串列表字段
+LIST_FIELDS = (
+    'aliases', 'harmful_substances', 'sensitive_groups',
+    'health_impacts', 'recommendations'
+)
+# 数组类型 -> memoryview 格式（标准宽度，不随平台的 long 宽度变化）
+VIEW_FORMATS = {'u1': 'B', 'i4': 'i', 'i8': 'q', 'f8': 'd'}
+
+
+class SnapshotError(Exception):
+    """快照无效（格式、版本不符或已过期）"""
+
+
+def file_sha256(path: Path) -> str:
+    """计算文件 sha256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_signature(path: Path) -> Tuple[int, int]:
+    """文件的 (修改时间, 大小)"""
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+class StringTable:
+    """去重字符串表（编译时使用）"""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def add(self, value: str) -> int:
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.strings)
+            self.strings.append(value)
+        return string_id
+
+    def to_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """返回 (UTF-8 数据, 字节偏移)，每个字符串可单独切片解码"""
+        encoded = [s.encode('utf-8') for s in self.strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return blob, offsets
+
+
+def hash_slots(keys: List[str]) -> np.ndarray:
+    """构建开放寻址槽位（线性探测），槽位保存条目编号，空槽为 -1
+
+    Args:
+        keys: 互不相同的键，下标即条目编号
+
+    Returns:
+        槽位数组，长度为不小于键数两倍的 2 的幂
+    """
+    size = 1 << max(1, (2 * len(keys) - 1).bit_length())
+    mask = size - 1
+    slots = np.full(size, -1, dtype=np.int32)
+    for entry, key in enumerate(keys):
+        slot = zlib.crc32(key.encode('utf-8')) & mask
+        while slots[slot] != -1:
+            slot = (slot + 1) & mask
+        slots[slot] = entry
+    return slots
+
+
+class MappedStrings:
+    """映射内存中的字符串表，按编号解码并缓存（驻留，相同字符串只有一个对象）"""
+
+    def __init__(self, data: memoryview, offsets: memoryview):
+        self._data = data
+        self._offsets = offsets
+        self._cache: Dict[int, str] = {}
+
+    def raw(self, string_id: int) -> memoryview:
+        """字符串的 UTF-8 字节（不复制）"""
+        return self._data[self._offsets[string_id]:self._offsets[string_id + 1]]
+
+    def __getitem__(self, string_id: int) -> str:
+        value = self._cache.get(string_id)
+        if value is None:
+            value = self._cache[string_id] = sys.intern(str(self.raw(string_id), 'utf-8'))
+        return value
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+
+class MappedTable(Mapping):
+    """映射内存中的只读哈希表视图（字符串键 -> 值）
+
+    查找只对查询键编码一次并比较槽位上的 UTF-8 字节，值在命中后由
+    value(条目编号) 按需构建。迭代顺序即编译时的条目顺序。
+    """
+
+    def __init__(
+        self,
+        slots: memoryview,
+        keys: memoryview,
+        strings: MappedStrings,
+        value: Callable[[int], Any]
+    ):
+        self._slots = slots
+        self._mask = len(slots) - 1
+        self._keys = keys
+        self._strings = strings
+        self._value = value
+
+    def find(self, key: str) -> int:
+        """查找键的条目编号，不存在时返回 -1"""
+        if not isinstance(key, str):
+            return -1
+        raw = key.encode('utf-8')
+        slot = zlib.crc32(raw) & self._mask
+        while True:
+            entry = self._slots[slot]
+            if entry < 0 or self._strings.raw(self._keys[entry]) == raw:
+                return entry
+            slot = (slot + 1) & self._mask
+
+    def __getitem__(self, key: str) -> Any:
+        entry = self.find(key)
+        if entry < 0:
+            raise KeyError(key)
+        return self._value(entry)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self.find(key)
+        return self._value(entry) if entry >= 0 else default
+
+    def __contains__(self, key: object) -> bool:
+        return self.find(key) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        return (self._strings[string_id] for string_id in self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class MappedMaterials(Sequence):
+    """映射内存中的材料记录序列，记录在首次访问时构建并缓存"""
+
+    def __init__(
+        self,
+        columns: memoryview,
+        risk_scores: memoryview,
+        lists: Dict[str, Tuple[memoryview, memoryview]],
+        strings: MappedStrings
+    ):
+        self._columns = columns
+        self._risk_scores = risk_scores
+        self._lists = lists
+        self._strings = strings
+        self._records: List[Optional[MaterialRecord]] = [None] * len(risk_scores)
+        self._levels = {level.value: level for level in RiskLevel}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self[i] for i in range(*index.indices(len(self))))
+        index = index.__index__()
+        if index < 0:
+            index += len(self._records)
+        if not 0 <= index < len(self._records):
+            raise IndexError('材料下标超出范围')
+        record = self._records[index]
+        if record is None:
+            # 并发首次访问时可能重复构建，结果相同，后写入者覆盖即可
+            record = self._records[index] = self._build(index)
+        return record
+
+    def _list(self, field: str, index: int) -> List[str]:
+        offsets, values = self._lists[field]
+        return [self._strings[v] for v in values[offsets[index]:offsets[index + 1]]]
+
+    def _build(self, index: int) -> MaterialRecord:
+        width = len(STRING_COLUMNS)
+        material_id, material_type, sub_type, description, texture, color, pattern, level = (
+            self._strings[v] for v in self._columns[index * width:(index + 1) * width]
+        )
+        # 编译时已校验，跳过 Pydantic 校验直接构造
+        risk_assessment = RiskAssessment.model_construct(
+            risk_level=self._levels[level],
+            risk_score=self._risk_scores[index],
+            harmful_substances=self._list('harmful_substances', index),
+            sensitive_groups=self._list('sensitive_groups', index),
+            health_impacts=self._list('health_impacts', index),
+            recommendations=self._list('recommendations', index)
+        )
+        return MaterialRecord(
+            material_id, material_type, sub_type, description,
+            tuple(self._list('aliases', index)), texture, color, pattern, risk_assessment
+        )
+
+
+def compile_snapshot(
+    snapshot,
+    source_sha256: str,
+    output_path: Path,
+    source_signature: Optional[Tuple[int, int]] = None
+) -> Dict[str, int]:
+    """编译快照文件
+
+    Args:
+        snapshot: 由 JSON 构建的 KnowledgeBaseSnapshot（调用方负责先校验材料数据），
+            与 JSON 加载走同一套构建逻辑（风险等级回退、索引）
+        source_sha256: 源 JSON 文件的 sha256
+        output_path: 快照输出路径
+        source_signature: 源 JSON 读取前的 (修改时间, 大小)，加载时一致则不必重新计算哈希
+
+    Returns:
+        统计信息（材料数、字符串数、文件字节数）
+    """
+    records = snapshot.materials
+    table = StringTable()
+    arrays: Dict[str, np.ndarray] = {}
+
+    def add_table(name: str, keys: List[str]) -> None:
+        arrays[f'{name}_keys'] = np.array([table.add(k) for k in keys], dtype=np.int32)
+        arrays[f'{name}_slots'] = hash_slots(keys)
+
+    arrays['material_columns'] = np.array([
+        [
+            table.add(record.id),
+            table.add(record.material_type),
+            table.add(record.sub_type),
+            table.add(record.description),
+            table.add(record.texture),
+            table.add(record.color),
+            table.add(record.pattern),
+            table.add(record.risk_assessment.risk_level.value),
+        ]
+        for record in records
+    ], dtype=np.int32).reshape(len(records), len(STRING_COLUMNS))
+    arrays['risk_scores'] = np.array(
+        [record.risk_assessment.risk_score for record in records], dtype=np.float64
+    )
+    for field in LIST_FIELDS:
+        offsets = [0]
+        values: List[int] = []
+        for record in records:
+            items = record.aliases if field == 'aliases' else getattr(record.risk_assessment, field)
+            values.extend(table.add(item) for item in items)
+            offsets.append(len(values))
+        arrays[f'{field}_offsets'] = np.array(offsets, dtype=np.int64)
+        arrays[f'{field}_values'] = np.array(values, dtype=np.int32)
+
+    # 查询索引沿用 JSON 构建的结果（重复键以第一条为准），只保存材料下标
+    position = {id(record): i for i, record in enumerate(records)}
+    add_table('by_id', list(snapshot.by_id))
+    arrays['by_id_rows'] = np.array(
+        [position[id(r)] for r in snapshot.by_id.values()], dtype=np.int32
+    )
+    add_table('by_sub_type', list(snapshot.by_sub_type))
+    arrays['by_sub_type_rows'] = np.array(
+        [position[id(r)] for r in snapshot.by_sub_type.values()], dtype=np.int32
+    )
+    add_table('by_material_type', list(snapshot.by_material_type))
+    arrays['by_material_type_indptr'] = np.cumsum(
+        [0] + [len(items) for items in snapshot.by_material_type.values()], dtype=np.int64
+    )
+    arrays['by_material_type_rows'] = np.array(
+        [position[id(r)] for items in snapshot.by_material_type.values() for r in items],
+        dtype=np.int32
+    )
+
+    # BM25 权重矩阵直接保存，加载时无需重新分词与计算；词表条目编号即矩阵行号
+    index = snapshot.visual_index
+    add_table('bm25_vocabulary', sorted(index.vocabulary, key=index.vocabulary.get))
+    arrays['bm25_indptr'] = index.weights.indptr
+    arrays['bm25_indices'] = index.weights.indices
+    arrays['bm25_data'] = index.weights.data.astype(np.float32)
+
+    # 子类型解析键（已规范化，按优先级排列）
+    entries = snapshot.sub_type_resolver.entries()
+    add_table('resolver', [k for k, _, _ in entries])
+    arrays['resolver_materials'] = np.array(
+        [position[id(m)] for _, m, _ in entries], dtype=np.int32
+    )
+    arrays['resolver_canonical'] = np.array([c for _, _, c in entries], dtype=np.uint8)
+    postings = snapshot.sub_type_resolver.postings()
+    add_table('resolver_grams', list(postings))
+    arrays['resolver_postings_indptr'] = np.cumsum(
+        [0] + [len(keys) for keys in postings.values()], dtype=np.int64
+    )
+    arrays['resolver_postings_keys'] = np.array(
+        [table.add(k) for keys in postings.values() for k in keys], dtype=np.int32
+    )
+
+    arrays['string_data'], arrays['string_offsets'] = table.to_arrays()
+
+    header = {
+        'source_sha256': source_sha256,
+        'source_signature': list(source_signature) if source_signature else None,
+        'num_materials': len(records),
+        'max_key_length': max((len(k) for k, _, _ in entries), default=0),
+        'bm25': {'n': index.n, 'num_documents': index.num_documents},
+        'arrays': {},
+    }
+    # 数组偏移相对数组区起始位置，与头部长度无关
+    layout = []
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        header['arrays'][name] = {
+            'offset': offset,
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+        }
+        layout.append((offset, array))
+        offset += array.nbytes
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = -(-(PREFIX.size + len(header_bytes)) // ALIGNMENT) * ALIGNMENT
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_suffix(f'{output_path.suffix}.{os.getpid()}.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(PREFIX.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for array_offset, array in layout:
+            f.seek(data_start + array_offset)
+            f.write(array.tobytes())
+        # 末尾的空数组也要落在文件范围内
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, output_path)
+
+    return {
+        'materials': len(records),
+        'strings': len(table.strings),
+        'bytes': output_path.stat().st_size,
+    }
+
+
+def read_snapshot_header(path: Path) -> Tuple[Dict, int]:
+    """读取快照头部
+
+    Args:
+        path: 快照路径
+
+    Returns:
+        (头部, 数组区起始偏移)
+
+    Raises:
+        SnapshotError: 文件格式或版本不符
+    """
+    with open(path, 'rb') as f:
+        prefix = f.read(PREFIX.size)
+        if len(prefix) < PREFIX.size:
+            raise SnapshotError("文件过短")
+        magic, version, header_length = PREFIX.unpack(prefix)
+        if magic != MAGIC:
+            raise SnapshotError("不是知识库快照文件")
+        if version != FORMAT_VERSION:
+            raise SnapshotError(f"快照格式版本 {version} 与当前版本 {FORMAT_VERSION} 不符")
+        header = json.loads(f.read(header_length))
+    data_start = -(-(PREFIX.size + header_length) // ALIGNMENT) * ALIGNMENT
+    return header, data_start
+
+
+def is_source_current(header: Dict, source_path: Path) -> bool:
+    """快照是否由源文件的当前内容编译
+
+    修改时间与大小都与编译时一致则直接认为未修改；大小不同必然已修改；
+    只有大小相同而修改时间不同（如 touch、重新检出）时才计算 sha256 比较。
+
+    Args:
+        header: 快照头部
+        source_path: 源 JSON 路径
+
+    Returns:
+        是否一致
+    """
+    signature = list(file_signature(source_path))
+    recorded = header.get('source_signature')
+    if recorded == signature:
+        return True
+    if recorded is not None and recorded[1] != signature[1]:
+        return False
+    return file_sha256(source_path) == header['source_sha256']
+
+
+def load_snapshot(path: Path, source_path: Optional[Path] = None):
+    """通过 mmap 加载快照
+
+    只读取头部并建立数组视图，材料记录与字符串在访问时按需解码。
+
+    Args:
+        path: 快照路径
+        source_path: 源 JSON 路径，提供时校验快照是否过期
+
+    Returns:
+        KnowledgeBaseSnapshot
+
+    Raises:
+        SnapshotError: 快照无效或已过期
+        OSError: 文件无法读取
+    """
+    from app.services.knowledge_base import KnowledgeBaseSnapshot
+
+    header, data_start = read_snapshot_header(path)
+    if source_path is not None and not is_source_current(header, source_path):
+        raise SnapshotError("快照已过期（源文件已修改）")
+
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    memory = memoryview(buffer)
+
+    def array(name: str) -> np.ndarray:
+        spec = header['arrays'][name]
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        return np.frombuffer(
+            buffer, dtype=dtype, count=count, offset=data_start + spec['offset']
+        ).reshape(spec['shape'])
+
+    def view(name: str) -> memoryview:
+        """一维（展平）类型化视图，逐个取值时比 numpy 标量快"""
+        spec = header['arrays'][name]
+        dtype = np.dtype(spec['dtype'])
+        view_format = VIEW_FORMATS.get(f'{dtype.kind}{dtype.itemsize}')
+        if view_format is None or not dtype.isnative:
+            raise SnapshotError(f"数组 {name} 的类型 {spec['dtype']} 不支持")
+        start = data_start + spec['offset']
+        nbytes = int(np.prod(spec['shape'], dtype=np.int64)) * dtype.itemsize
+        return memory[start:start + nbytes].cast(view_format)
+
+    strings = MappedStrings(view('string_data'), view('string_offsets'))
+    materials = MappedMaterials(
+        view('material_columns'),
+        view('risk_scores'),
+        {field: (view(f'{field}_offsets'), view(f'{field}_values')) for field in LIST_FIELDS},
+        strings
+    )
+
+    def table(name: str, value: Callable[[int], Any]) -> MappedTable:
+        return MappedTable(view(f'{name}_slots'), view(f'{name}_keys'), strings, value)
+
+    def rows(name: str) -> Callable[[int], MaterialRecord]:
+        values = view(name)
+        return lambda entry: materials[values[entry]]
+
+    def groups(indptr: memoryview, values: memoryview, item: Callable[[int], Any]):
+        return lambda entry: [item(v) for v in values[indptr[entry]:indptr[entry + 1]]]
+
+    material_type_groups = groups(
+        view('by_material_type_indptr'), view('by_material_type_rows'), materials.__getitem__
+    )
+    resolver_materials = view('resolver_materials')
+    resolver_canonical = view('resolver_canonical')
+
+    visual_index = BM25Index.from_arrays(
+        table('bm25_vocabulary', int),
+        array('bm25_indptr'),
+        array('bm25_indices'),
+        array('bm25_data'),
+        header['bm25']['num_documents'],
+        header['bm25']['n']
+    )
+    resolver = SubTypeResolver.from_index(
+        table('resolver', lambda entry: (
+            materials[resolver_materials[entry]], bool(resolver_canonical[entry])
+        )),
+        table('resolver_grams', groups(
+            view('resolver_postings_indptr'), view('resolver_postings_keys'), strings.__getitem__
+        )),
+        header['max_key_length']
+    )
+
+    logger.debug(f"已映射知识库快照: {path} ({header['num_materials']} 条材料)")
+    return KnowledgeBaseSnapshot.from_index(
+        materials,
+        table('by_id', rows('by_id_rows')),
+        table('by_sub_type', rows('by_sub_type_rows')),
+        table('by_material_type', lambda entry: tuple(material_type_groups(entry))),
+        visual_index,
+        resolver
+    )
@@ -1,31 +1,267 @@
 """材料知识库服务"""
+import asyncio
 import json
-from typing import List, Dict, Optional
+import unicodedata
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Callable, List, Dict, Mapping, Optional, Sequence, Set, Tuple
 from pathlib import Path
 from loguru import logger
-from app.models.schemas import MaterialType, RiskLevel
+from app.core.config import get_settings
+from app.models.schemas import MaterialType, RiskAssessment, RiskLevel
+from app.services.kb_records import MaterialRecord
+from app.services.kb_snapshot import SnapshotError, load_snapshot
+from app.services.semantic_search import SemanticHit, SemanticSearchService, get_semantic_search
+from app.services.sub_type_resolver import (
+    SubTypeMatch, SubTypeResolver, is_marker_mismatch, normalize_text
+)
+from app.services.text_index import BM25Index
+
+# 知识条目元数据中给出材料名称的字段，按优先级排列：专业/高分子集合的 material_type
+# 是具体名称（如"PU皮"），category 是类别（如"皮革类"）；基础集合的 category 是具体名称
+HIT_NAME_FIELDS = ('material_type', 'category')
+
+
+def is_class_level(name: str) -> bool:
+    """是否为类别名称（如"皮革类"、"高分子材料类"），类别不能代表具体材料"""
+    return normalize_text(name).endswith('类')
+
+
+def normalize_sub_type(sub_type: str) -> str:
+    """规范化材料子类型，用于索引键
+
+    全角转半角、去除空白、英文转小写，例如 " ＭＤＦ 板" -> "mdf板"。
+
+    Args:
+        sub_type: 材料子类型
+
+    Returns:
+        规范化后的子类型
+    """
+    text = unicodedata.normalize('NFKC', sub_type or '')
+    return ''.join(text.split()).lower()
+
+
+def material_search_text(material: MaterialRecord) -> str:
+    """材料的视觉特征检索文本（纹理、颜色、图案与描述）"""
+    fields = [material.texture, material.color, material.pattern, material.description]
+    return ' '.join(field for field in fields if field)
+
+
+class KnowledgeBaseSnapshot:
+    """知识库快照（加载后只读）
+
+    材料以不可变的 MaterialRecord 保存，与各哈希索引一起构建，重新加载时
+    整体替换为新快照，读取方拿到的始终是一份完整一致的数据。编译快照加载的
+    材料与索引是映射内存上的只读视图（见 kb_snapshot），接口与此相同。
+    """
+
+    __slots__ = (
+        'materials', 'by_id', 'by_sub_type', 'by_material_type',
+        'visual_index', 'sub_type_resolver'
+    )
+
+    def __init__(
+        self,
+        records: Sequence[MaterialRecord],
+        visual_index: Optional[BM25Index] = None,
+        sub_type_resolver: Optional[SubTypeResolver] = None
+    ):
+        """构建快照与索引
+
+        Args:
+            records: 材料记录列表
+            visual_index: 预先构建的视觉特征索引（来自编译快照），为空时构建
+            sub_type_resolver: 预先构建的子类型解析器，为空时构建
+        """
+        records = tuple(records)
+        by_id: Dict[str, MaterialRecord] = {}
+        by_sub_type: Dict[str, MaterialRecord] = {}
+        by_material_type: Dict[str, List[MaterialRecord]] = {}
+
+        for record in records:
+            # 与原先的线性扫描一致：重复键以第一条为准
+            if record.id:
+                by_id.setdefault(record.id, record)
+            if record.sub_type:
+                by_sub_type.setdefault(normalize_sub_type(record.sub_type), record)
+            by_material_type.setdefault(record.material_type, []).append(record)
+
+        self.materials: Sequence[MaterialRecord] = records
+        self.by_id: Mapping[str, MaterialRecord] = MappingProxyType(by_id)
+        self.by_sub_type: Mapping[str, MaterialRecord] = MappingProxyType(by_sub_type)
+        self.by_material_type: Mapping[str, Tuple[MaterialRecord, ...]] = MappingProxyType({
+            material_type: tuple(items)
+            for material_type, items in by_material_type.items()
+        })
+        self.visual_index = visual_index or BM25Index(
+            [material_search_text(r) for r in records]
+        )
+        self.sub_type_resolver = sub_type_resolver or SubTypeResolver(records)
+
+    @classmethod
+    def from_index(
+        cls,
+        materials: Sequence[MaterialRecord],
+        by_id: Mapping[str, MaterialRecord],
+        by_sub_type: Mapping[str, MaterialRecord],
+        by_material_type: Mapping[str, Tuple[MaterialRecord, ...]],
+        visual_index: BM25Index,
+        sub_type_resolver: SubTypeResolver
+    ) -> "KnowledgeBaseSnapshot":
+        """由预先构建的材料序列与索引组装快照（如编译快照的映射视图），不遍历材料"""
+        snapshot = cls.__new__(cls)
+        snapshot.materials = materials
+        snapshot.by_id = by_id
+        snapshot.by_sub_type = by_sub_type
+        snapshot.by_material_type = by_material_type
+        snapshot.visual_index = visual_index
+        snapshot.sub_type_resolver = sub_type_resolver
+        return snapshot
+
+    @classmethod
+    def from_materials(cls, materials: List[Dict]) -> "KnowledgeBaseSnapshot":
+        """由知识库 JSON 中的材料数据列表构建快照"""
+        return cls([MaterialRecord.from_dict(m) for m in materials])
 
 
 class KnowledgeBaseService:
-    """材料知识库服务类"""
+    """材料知识库服务类
+
+    材料 ID、子类型、材料类型的查询均走加载时构建的哈希索引 (O(1))，
+    返回不可变的 MaterialRecord（需要 JSON 结构时调用 to_dict()）。
+    """
 
-    def __init__(self, knowledge_base_path: str = "app/data/knowledge_base.json"):
+    def __init__(
+        self,
+        knowledge_base_path: str = "app/data/knowledge_base.json",
+        snapshot_path: Optional[str] = None,
+        semantic_search: Optional[SemanticSearchService] = None,
+        semantic_top_k: int = 5,
+        semantic_min_similarity: float = 0.5
+    ):
         """初始化知识库服务
 
         Args:
             knowledge_base_path: 知识库文件路径
+            snapshot_path: 编译快照路径，提供且与知识库文件一致时优先加载
+            semantic_search: 语义检索服务，子类型解析未命中时使用，为空则不启用
+            semantic_top_k: 语义检索候选条数
+            semantic_min_similarity: 语义检索最低相似度
         """
         self.knowledge_base_path = Path(knowledge_base_path)
-        self.materials: List[Dict] = []
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.semantic_search = semantic_search
+        self.semantic_top_k = semantic_top_k
+        self.semantic_min_similarity = semantic_min_similarity
+        self._snapshot = KnowledgeBaseSnapshot(())
+        self._loaded_signature: Optional[Tuple[int, int]] = None
+        self._watch_task: Optional[asyncio.Task] = None
+        self._reload_listeners: List[Callable[[Set[str]], None]] = []
         self._load_knowledge_base()
 
+    @property
+    def snapshot(self) -> KnowledgeBaseSnapshot:
+        """当前知识库快照"""
+        return self._snapshot
+
+    @property
+    def materials(self) -> Sequence[MaterialRecord]:
+        """当前全部材料数据（快照中的只读序列，不复制）"""
+        return self._snapshot.materials
+
+    def reload(self) -> None:
+        """重新加载知识库文件
+
+        新快照构建完成后一次性替换，加载失败时保留旧数据并抛出异常。
+        """
+        self._load_knowledge_base()
+
+    def add_reload_listener(self, listener: Callable[[Set[str]], None]) -> None:
+        """注册重新加载回调，参数为新增、删除或内容变化的材料 ID
+
+        回调在加载所在的线程中同步执行，应尽快返回。
+
+        Args:
+            listener: 回调函数
+        """
+        self._reload_listeners.append(listener)
+
+    def _notify_reload(self, previous: KnowledgeBaseSnapshot, current: KnowledgeBaseSnapshot) -> None:
+        """比较新旧快照，通知发生变化的材料 ID"""
+        changed = {
+            material_id for material_id in previous.by_id.keys() | current.by_id.keys()
+            if previous.by_id.get(material_id) != current.by_id.get(material_id)
+        }
+        if not changed:
+            return
+        logger.info(f"知识库材料变更: {len(changed)} 条")
+        for listener in self._reload_listeners:
+            try:
+                listener(changed)
+            except Exception as e:
+                logger.error(f"知识库重新加载回调失败: {e}")
+
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
+        """知识库文件的 (修改时间, 大小)，文件不存在时返回 None"""
+        try:
+            stat = self.knowledge_base_path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def start_watching(self, interval: float) -> None:
+        """启动文件监听（需在事件循环中调用）
+
+        Args:
+            interval: 检查间隔（秒），不大于 0 时不监听
+        """
+        if interval <= 0 or self._watch_task is not None:
+            return
+        self._watch_task = asyncio.create_task(self._watch(interval))
+        logger.info(f"开始监听知识库文件: {self.knowledge_base_path}")
+
+    async def stop_watching(self) -> None:
+        """停止文件监听"""
+        if self._watch_task is None:
+            return
+        self._watch_task.cancel()
+        try:
+            await self._watch_task
+        except asyncio.CancelledError:
+            pass
+        self._watch_task = None
+
+    async def _watch(self, interval: float) -> None:
+        """轮询文件变更，在线程中重建快照，请求继续读取旧快照直到替换完成"""
+        while True:
+            await asyncio.sleep(interval)
+            signature = self._file_signature()
+            if signature is None or signature == self._loaded_signature:
+                continue
+            try:
+                await asyncio.to_thread(self.reload)
+            except Exception as e:
+                # 记录本次签名，文件再次修改前不重复尝试
+                self._loaded_signature = signature
+                logger.error(f"知识库重新加载失败，继续使用旧数据: {e}")
+
     def _load_knowledge_base(self) -> None:
-        """加载知识库数据"""
+        """加载知识库数据并构建索引"""
         try:
-            with open(self.knowledge_base_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.materials = data.get('materials', [])
-            logger.info(f"成功加载知识库，共 {len(self.materials)} 条材料数据")
+            # 先取签名再读取，读取期间的修改会在下次检查时再次加载
+            signature = self._file_signature()
+            snapshot = self._load_compiled_snapshot()
+            if snapshot is None:
+                with open(self.knowledge_base_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                snapshot = KnowledgeBaseSnapshot.from_materials(data.get('materials', []))
+            # 单次引用替换，并发读取不会看到构建到一半的索引
+            previous, self._snapshot = self._snapshot, snapshot
+            self._loaded_signature = signature
+            logger.info(f"成功加载知识库，共 {len(snapshot.materials)} 条材料数据")
+            if previous.materials:
+                self._notify_reload(previous, snapshot)
         except FileNotFoundError:
             logger.error(f"知识库文件不存在: {self.knowledge_base_path}")
             raise
@@ -33,19 +269,28 @@ class KnowledgeBaseService:
             logger.error(f"知识库文件格式错误: {e}")
             raise
 
-    def query_by_material_type(self, material_type: str) -> List[Dict]:
+    def _load_compiled_snapshot(self) -> Optional[KnowledgeBaseSnapshot]:
+        """加载编译快照，快照缺失、格式不符或已过期时返回 None（回退到 JSON）"""
+        if self.snapshot_path is None or not self.snapshot_path.exists():
+            return None
+        try:
+            snapshot = load_snapshot(self.snapshot_path, self.knowledge_base_path)
+        except (SnapshotError, OSError, ValueError, KeyError) as e:
+            logger.warning(f"知识库快照不可用，改为加载 JSON: {self.snapshot_path}: {e}")
+            return None
+        logger.info(f"从编译快照加载知识库: {self.snapshot_path}")
+        return snapshot
+
+    def query_by_material_type(self, material_type: str) -> Tuple[MaterialRecord, ...]:
         """根据材料类型查询
 
         Args:
             material_type: 材料类型（实木类、人造板类、皮革类、布类）
 
         Returns:
-            匹配的材料列表
+            匹配的材料（快照中的不可变元组，不复制）
         """
-        results = [
-            m for m in self.materials
-            if m.get('material_type') == material_type
-        ]
+        results = self._snapshot.by_material_type.get(material_type, ())
         logger.debug(f"查询材料类型 '{material_type}'，找到 {len(results)} 条结果")
         return results
 
@@ -53,61 +298,51 @@ class KnowledgeBaseService:
         self,
         texture: Optional[str] = None,
         color: Optional[str] = None,
-        pattern: Optional[str] = None
-    ) -> List[Dict]:
+        pattern: Optional[str] = None,
+        top_k: int = 10
+    ) -> List[MaterialRecord]:
         """根据视觉特征查询（语义匹配）
 
+        在纹理、颜色、图案与描述上做中文字符二元组检索并按 BM25 排序，
+        词序不同的描述（如"木纹自然"与"自然木纹"）也能匹配。
+
         Args:
             texture: 纹理描述
             color: 颜色描述
             pattern: 图案描述
+            top_k: 返回的最大结果数
 
         Returns:
-            匹配的材料列表
+            匹配的材料列表，按相关度从高到低排序
         """
-        results = []
-
-        for material in self.materials:
-            visual_cues = material.get('visual_cues', {})
-            score = 0
-
-            # 简单的关键词匹配（实际应用中可以使用更复杂的语义匹配）
-            if texture and texture in visual_cues.get('texture', ''):
-                score += 1
-            if color and color in visual_cues.get('color', ''):
-                score += 1
-            if pattern and pattern in visual_cues.get('pattern', ''):
-                score += 1
+        query = ' '.join(cue for cue in (texture, color, pattern) if cue)
+        if not query:
+            return []
 
-            if score > 0:
-                results.append({
-                    'material': material,
-                    'match_score': score
-                })
+        snapshot = self._snapshot
+        hits = snapshot.visual_index.search(query, top_k)
+        logger.debug(f"视觉特征查询找到 {len(hits)} 条结果")
 
-        # 按匹配分数排序
-        results.sort(key=lambda x: x['match_score'], reverse=True)
-        logger.debug(f"视觉特征查询找到 {len(results)} 条结果")
+        return [snapshot.materials[doc_id] for doc_id, _ in hits]
 
-        return [r['material'] for r in results]
-
-    def get_risk_assessment(self, material_id: str) -> Optional[Dict]:
+    def get_risk_assessment(self, material_id: str) -> Optional[RiskAssessment]:
         """获取材料的风险评估
 
         Args:
             material_id: 材料 ID
 
         Returns:
-            风险评估数据，如果未找到则返回 None
+            加载时构建的风险评估（共享的冻结实例），如果未找到则返回 None
         """
-        for material in self.materials:
-            if material.get('id') == material_id:
-                return material.get('risk_assessment')
+        material = self._snapshot.by_id.get(material_id)
+        if material is not None:
+            return material.risk_assessment
 
         logger.warning(f"未找到材料 ID: {material_id}")
         return None
 
-    def validate_material_data(self, material: Dict) -> bool:
+    @staticmethod
+    def validate_material_data(material: Dict) -> bool:
         """验证材料数据结构完整性
 
         Args:
@@ -145,16 +380,16 @@ class KnowledgeBaseService:
 
         return True
 
-    def get_all_materials(self) -> List[Dict]:
+    def get_all_materials(self) -> Sequence[MaterialRecord]:
         """获取所有材料数据
 
         Returns:
-            所有材料列表
+            所有材料（快照中的只读序列，不复制）
         """
-        return self.materials
+        return self._snapshot.materials
 
-    def search_by_sub_type(self, sub_type: str) -> Optional[Dict]:
-        """根据材料子类型精确查询
+    def search_by_sub_type(self, sub_type: str) -> Optional[MaterialRecord]:
+        """根据材料子类型精确查询（忽略全半角、空白与英文大小写）
 
         Args:
             sub_type: 材料子类型
@@ -162,9 +397,103 @@ class KnowledgeBaseService:
         Returns:
             匹配的材料，如果未找到则返回 None
         """
-        for material in self.materials:
-            if material.get('sub_type') == sub_type:
-                return material
+        material = self._snapshot.by_sub_type.get(normalize_sub_type(sub_type))
+        if material is not None:
+            return material
 
         logger.debug(f"未找到材料子类型: {sub_type}")
         return None
+
+    def resolve_sub_type(self, sub_type: Optional[str]) -> Optional[SubTypeMatch]:
+        """将模型输出的子类型解析为知识库材料（别名、子串与模糊匹配）
+
+        Args:
+            sub_type: 模型输出的子类型，如"橡木实木"、"中密度纤维板"
+
+        Returns:
+            解析结果（含匹配方式与置信度），无法可靠匹配时返回 None
+        """
+        match = self._snapshot.sub_type_resolver.resolve(sub_type)
+        if match is None:
+            logger.debug(f"无法解析材料子类型: {sub_type}")
+        return match
+
+    def resolve_hit(self, hit: SemanticHit) -> Optional[SubTypeMatch]:
+        """将语义检索命中的知识条目解析为知识库材料
+
+        只按条目的具体材料名称解析（不采用模糊匹配），只带类别名称的条目不解析，
+        避免"皮革类"下的 PU皮、科技布条目被解析为真皮。
+
+        Args:
+            hit: 语义检索命中的知识条目
+
+        Returns:
+            解析结果，无法可靠匹配时返回 None
+        """
+        resolver = self._snapshot.sub_type_resolver
+        for field in HIT_NAME_FIELDS:
+            name = hit.metadata.get(field)
+            if not name or is_class_level(name):
+                continue
+            match = resolver.resolve(name)
+            if match is not None and match.method != 'fuzzy':
+                return match
+        return None
+
+    async def resolve_sub_types(
+        self,
+        sub_types: Sequence[Optional[str]]
+    ) -> List[Optional[SubTypeMatch]]:
+        """批量解析子类型，精确/模糊匹配未命中的再走一次批量语义检索
+
+        语义检索命中的知识条目按其具体材料名称解析到知识库材料（见 resolve_hit），
+        置信度为相似度的 0.7 倍（低于模糊匹配）；超出延迟预算时按未命中处理。
+
+        Args:
+            sub_types: 模型输出的子类型
+
+        Returns:
+            与 sub_types 一一对应的解析结果
+        """
+        matches = [self.resolve_sub_type(sub_type) for sub_type in sub_types]
+        pending = [
+            i for i, (sub_type, match) in enumerate(zip(sub_types, matches))
+            if match is None and normalize_text(sub_type or '')
+        ]
+        if not pending or self.semantic_search is None:
+            return matches
+
+        hit_lists = await self.semantic_search.search_many(
+            [sub_types[i] for i in pending], self.semantic_top_k
+        )
+        for i, hits in zip(pending, hit_lists):
+            text = normalize_text(sub_types[i])
+            for hit in hits:
+                if hit.similarity < self.semantic_min_similarity:
+                    break
+                resolved = self.resolve_hit(hit)
+                if resolved is None:
+                    continue
+                material = resolved.material
+                if is_marker_mismatch(text, normalize_text(material.sub_type)):
+                    continue
+                matches[i] = SubTypeMatch(
+                    material, material.sub_type, round(0.7 * hit.similarity, 3), 'semantic'
+                )
+                break
+            else:
+                logger.debug(f"语义检索未找到子类型对应的材料: {sub_types[i]}")
+        return matches
+
+
+@lru_cache()
+def get_knowledge_base() -> KnowledgeBaseService:
+    """获取进程内共享的知识库服务（可作为 FastAPI 依赖）"""
+    settings = get_settings()
+    return KnowledgeBaseService(
+        settings.KNOWLEDGE_BASE_PATH,
+        settings.KNOWLEDGE_BASE_SNAPSHOT_PATH or None,
+        semantic_search=get_semantic_search(),
+        semantic_top_k=settings.SEMANTIC_SEARCH_TOP_K,
+        semantic_min_similarity=settings.SEMANTIC_SEARCH_MIN_SIMILARITY
+    )
@@ -0,0 +1,155 @@
+"""知识条目导入清单监听
+
+导入脚本（仓库根目录的 knowledge_ingest.py）为每个 ChromaDB 集合维护一份 SQLite 清单
+（<持久化目录>/manifests/<集合名>.sqlite，items 表保存条目 ID 与内容哈希）。
+后端轮询清单文件，重新导入后比较内容哈希，通知新增、删除或内容变化的知识条目，
+问答缓存据此使依据这些条目的回答失效。
+"""
+import asyncio
+import sqlite3
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from loguru import logger
+
+from app.core.config import get_settings
+
+# 与 knowledge_ingest.MANIFEST_DIRECTORY 一致
+MANIFEST_DIRECTORY = "manifests"
+
+
+def entry_key(collection: str, entry_id: str) -> str:
+    """知识条目的全局键（不同集合的条目 ID 可能相同）"""
+    return f"{collection}/{entry_id}"
+
+
+class ImportManifestWatcher:
+    """轮询各集合的导入清单，通知内容变化的知识条目"""
+
+    def __init__(self, persist_directory: str, collection_names: Sequence[str]):
+        """
+        Args:
+            persist_directory: ChromaDB 持久化目录（清单位于其下的 manifests/）
+            collection_names: 监听的集合名
+        """
+        self.directory = Path(persist_directory) / MANIFEST_DIRECTORY
+        self.collection_names = list(collection_names)
+        self._signatures: Dict[str, Optional[Tuple[int, int, int, int]]] = {}
+        self._digests: Dict[str, Dict[str, str]] = {}
+        self._listeners: List[Callable[[Set[str]], None]] = []
+        self._watch_task: Optional[asyncio.Task] = None
+
+    def add_change_listener(self, listener: Callable[[Set[str]], None]) -> None:
+        """注册变更回调，参数为新增、删除或内容变化的条目键（见 entry_key）
+
+        回调在检查所在的线程中同步执行，应尽快返回。
+
+        Args:
+            listener: 回调函数
+        """
+        self._listeners.append(listener)
+
+    def _signature(self, path: Path) -> Optional[Tuple[int, int, int, int]]:
+        """清单文件与其 WAL 文件的修改时间和大小，清单不存在时返回 None
+
+        清单以 WAL 模式写入，提交后主文件可能要到检查点才变化，因此同时比较 WAL 文件。
+        """
+        try:
+            main = path.stat()
+        except OSError:
+            return None
+        try:
+            wal = Path(f"{path}-wal").stat()
+            wal_signature = (wal.st_mtime_ns, wal.st_size)
+        except OSError:
+            wal_signature = (0, 0)
+        return (main.st_mtime_ns, main.st_size) + wal_signature
+
+    @staticmethod
+    def _read(path: Path) -> Dict[str, str]:
+        conn = sqlite3.connect(f"file:{path.as_posix()}?mode=ro", uri=True, timeout=30)
+        try:
+            return dict(conn.execute("SELECT id, digest FROM items"))
+        finally:
+            conn.close()
+
+    def check(self) -> Set[str]:
+        """检查各集合清单，首次检查只记录当前内容
+
+        Returns:
+            自上次检查以来新增、删除或内容变化的条目键
+        """
+        changed: Set[str] = set()
+        for name in self.collection_names:
+            path = self.directory / f"{name}.sqlite"
+            signature = self._signature(path)
+            if name in self._signatures and self._signatures[name] == signature:
+                continue
+            try:
+                digests = self._read(path) if signature is not None else {}
+            except sqlite3.Error as e:
+                # 不记录签名，下次检查时重试（如导入脚本正在迁移清单）
+                logger.warning(f"读取导入清单失败: {path}: {e}")
+                continue
+            previous = self._digests.get(name)
+            self._signatures[name] = signature
+            self._digests[name] = digests
+            if previous is None:
+                continue
+            changed.update(
+                entry_key(name, entry_id) for entry_id in previous.keys() | digests.keys()
+                if previous.get(entry_id) != digests.get(entry_id)
+            )
+
+        if changed:
+            logger.info(f"知识集合重新导入，{len(changed)} 个条目发生变化")
+            for listener in self._listeners:
+                try:
+                    listener(changed)
+                except Exception as e:
+                    logger.error(f"导入清单变更回调失败: {e}")
+        return changed
+
+    def start_watching(self, interval: float) -> None:
+        """启动清单监听（需在事件循环中调用）
+
+        Args:
+            interval: 检查间隔（秒），不大于 0 时不监听
+        """
+        if interval <= 0 or self._watch_task is not None:
+            return
+        self._watch_task = asyncio.create_task(self._watch(interval))
+        logger.info(f"开始监听知识导入清单: {self.directory}")
+
+    async def stop_watching(self) -> None:
+        """停止清单监听"""
+        if self._watch_task is None:
+            return
+        self._watch_task.cancel()
+        try:
+            await self._watch_task
+        except asyncio.CancelledError:
+            pass
+        self._watch_task = None
+
+    async def _watch(self, interval: float) -> None:
+        """先记录当前清单内容，再轮询变更（读取清单在线程中执行）"""
+        while True:
+            try:
+                await asyncio.to_thread(self.check)
+            except Exception as e:
+                logger.error(f"检查导入清单失败: {e}")
+            await asyncio.sleep(interval)
+
+
+@lru_cache()
+def get_manifest_watcher() -> Optional[ImportManifestWatcher]:
+    """获取进程内共享的导入清单监听器，语义检索未启用时返回 None"""
+    settings = get_settings()
+    if not settings.SEMANTIC_SEARCH_ENABLED:
+        return None
+    return ImportManifestWatcher(
+        settings.SEMANTIC_SEARCH_PERSIST_DIR,
+        settings.SEMANTIC_SEARCH_COLLECTIONS
+    )
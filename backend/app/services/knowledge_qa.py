@@ -0,0 +1,204 @@
+"""材料知识问答服务"""
+import asyncio
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from app.core.config import get_settings
+from app.services.answer_cache import CachedAnswer, SemanticAnswerCache, normalize_question
+from app.services.kb_records import MaterialRecord
+from app.services.knowledge_base import KnowledgeBaseService, get_knowledge_base
+from app.services.knowledge_manifest import entry_key, get_manifest_watcher
+from app.services.qwen_vl import QwenVLService
+from app.services.semantic_search import SearchBusyError, SemanticHit, SemanticSearchService
+
+
+def material_context(material: MaterialRecord) -> str:
+    """知识库材料的风险摘要，作为回答依据"""
+    risk = material.risk_assessment
+    return (
+        f"{material.sub_type}（{material.material_type}）：{material.description.rstrip('。')}。"
+        f"风险等级 {risk.risk_level.value}，评分 {risk.risk_score}；"
+        f"有害物质：{'、'.join(risk.harmful_substances)}；"
+        f"敏感人群：{'、'.join(risk.sensitive_groups)}；"
+        f"建议：{'、'.join(risk.recommendations)}"
+    )
+
+
+class KnowledgeQAService:
+    """材料问答：语义缓存 -> 知识检索 -> 大模型回答
+
+    - 规范化文本相同的问题直接命中缓存，不计算向量
+    - 其余问题计算一次查询向量，同时用于缓存查找与知识检索
+    - 缓存未命中时检索知识条目，并把问题与条目对应的知识库材料风险数据一起交给大模型
+    - 回答按依据的材料 ID 与知识条目缓存，知识库重新加载或知识条目重新导入时相关回答失效；
+      没有材料依据的回答使用较短的有效期
+    - 同一问题的并发请求共用一次大模型调用
+    """
+
+    def __init__(
+        self,
+        knowledge_service: KnowledgeBaseService,
+        qwen_service: QwenVLService,
+        cache: SemanticAnswerCache,
+        semantic_search: Optional[SemanticSearchService] = None,
+        top_k: int = 4,
+        min_similarity: float = 0.5,
+        ungrounded_ttl_seconds: Optional[float] = None
+    ):
+        """
+        Args:
+            knowledge_service: 材料知识库
+            qwen_service: 大模型服务
+            cache: 回答缓存
+            semantic_search: 语义检索服务，为空时只按文本命中缓存、只使用知识库材料作为依据
+            top_k: 作为依据的知识条目数
+            min_similarity: 知识条目的最低相似度
+            ungrounded_ttl_seconds: 没有材料依据的回答的有效期（秒），为空时与其他回答相同
+        """
+        self.knowledge_service = knowledge_service
+        self.qwen_service = qwen_service
+        self.cache = cache
+        self.semantic_search = semantic_search
+        self.top_k = top_k
+        self.min_similarity = min_similarity
+        self.ungrounded_ttl_seconds = ungrounded_ttl_seconds
+        # 正在生成回答的问题，同一问题的并发首次请求共用一次调用
+        self._answering: Dict[str, asyncio.Task] = {}
+
+    async def answer(self, question: str) -> Tuple[CachedAnswer, bool]:
+        """回答材料问题
+
+        Args:
+            question: 用户问题
+
+        Returns:
+            (回答, 是否命中缓存)
+
+        Raises:
+            Exception: 大模型调用失败
+        """
+        entry = self.cache.get_by_text(question)
+        if entry is not None:
+            return entry, True
+
+        key = normalize_question(question)
+        task = self._answering.get(key)
+        if task is None:
+            task = asyncio.create_task(self._answer_uncached(question))
+            self._answering[key] = task
+            task.add_done_callback(lambda _: self._answering.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _answer_uncached(self, question: str) -> Tuple[CachedAnswer, bool]:
+        question_materials = self._question_materials(question)
+        vector = await self._embed(question)
+        entry = self.cache.get(question, vector, question_materials)
+        if entry is not None:
+            logger.debug(f"问答缓存语义命中: {question} -> {entry.question}")
+            return entry, True
+
+        hits = await self._retrieve(vector)
+        materials = self._grounding_materials(question_materials, hits)
+        contexts = [hit.document for hit in hits] + [material_context(m) for m in materials]
+        answer = await self.qwen_service.answer_question(question, contexts)
+
+        sources = [
+            {"id": hit.id, "collection": hit.collection, "similarity": round(hit.similarity, 4)}
+            for hit in hits
+        ]
+        # 没有材料依据的回答（如高分子材料、环保标准、选购技巧）只能按知识条目失效，
+        # 使用较短的有效期
+        entry = self.cache.put(
+            question, answer, sources, [m.id for m in materials], vector, question_materials,
+            source_ids=[entry_key(hit.collection, hit.id) for hit in hits],
+            ttl_seconds=None if materials else self.ungrounded_ttl_seconds
+        )
+        return entry, False
+
+    def _question_materials(self, question: str) -> frozenset:
+        """问题本身提到的所有知识库材料（只采用与标准子类型或别名完全相同的片段）"""
+        matches = self.knowledge_service.snapshot.sub_type_resolver.find_mentions(question)
+        return frozenset(match.material.id for match in matches)
+
+    async def _embed(self, question: str) -> Optional[List[float]]:
+        """计算问题向量，语义检索不可用或超出延迟预算时返回 None"""
+        if self.semantic_search is None:
+            return None
+        try:
+            vectors = await self.semantic_search.run(
+                self.semantic_search.embed, [question], timeout=self.semantic_search.timeout
+            )
+        except SearchBusyError:
+            logger.warning("语义检索线程繁忙，按文本匹配缓存")
+            return None
+        except asyncio.TimeoutError:
+            logger.warning("问题向量计算超出延迟预算，按文本匹配缓存")
+            return None
+        except Exception as e:
+            logger.error(f"问题向量计算失败: {e}")
+            return None
+        return vectors[0] if vectors else None
+
+    async def _retrieve(self, vector: Optional[List[float]]) -> List[SemanticHit]:
+        """按问题向量检索知识条目"""
+        if vector is None:
+            return []
+        try:
+            hits = (await self.semantic_search.run(
+                self.semantic_search.search_embeddings, [vector], self.top_k,
+                timeout=self.semantic_search.timeout
+            ))[0]
+        except SearchBusyError:
+            logger.warning("语义检索线程繁忙，跳过知识检索")
+            return []
+        except asyncio.TimeoutError:
+            logger.warning("知识检索超出延迟预算，不使用知识条目")
+            return []
+        except Exception as e:
+            logger.error(f"知识检索失败: {e}")
+            return []
+        return [hit for hit in hits if hit.similarity >= self.min_similarity]
+
+    def _grounding_materials(
+        self,
+        question_materials: frozenset,
+        hits: List[SemanticHit]
+    ) -> List[MaterialRecord]:
+        """问题提到的材料与知识条目对应的知识库材料（去重，保持顺序）"""
+        snapshot = self.knowledge_service.snapshot
+        materials = [snapshot.by_id[i] for i in sorted(question_materials) if i in snapshot.by_id]
+        seen: Set[str] = set(question_materials)
+        for hit in hits:
+            match = self.knowledge_service.resolve_hit(hit)
+            if match is None or match.material.id in seen:
+                continue
+            seen.add(match.material.id)
+            materials.append(match.material)
+        return materials
+
+
+@lru_cache()
+def get_knowledge_qa() -> KnowledgeQAService:
+    """获取进程内共享的材料问答服务，回答缓存随知识库重新加载与知识条目重新导入失效"""
+    settings = get_settings()
+    knowledge_service = get_knowledge_base()
+    cache = SemanticAnswerCache(
+        max_entries=settings.QA_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.QA_CACHE_TTL_SECONDS,
+        threshold=settings.QA_CACHE_SIMILARITY_THRESHOLD
+    )
+    knowledge_service.add_reload_listener(cache.invalidate_materials)
+    manifest_watcher = get_manifest_watcher()
+    if manifest_watcher is not None:
+        manifest_watcher.add_change_listener(cache.invalidate_sources)
+    return KnowledgeQAService(
+        knowledge_service,
+        QwenVLService(),
+        cache,
+        semantic_search=knowledge_service.semantic_search,
+        top_k=settings.QA_RETRIEVAL_TOP_K,
+        min_similarity=settings.SEMANTIC_SEARCH_MIN_SIMILARITY,
+        ungrounded_ttl_seconds=settings.QA_CACHE_UNGROUNDED_TTL_SECONDS
+    )
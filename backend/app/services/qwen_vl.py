@@ -1,11 +1,15 @@
 """Qwen-VL API 集成服务 (通过 OpenAI SDK)"""
 import asyncio
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from loguru import logger
 from openai import OpenAI
 from app.core.config import get_settings
 
 
+# 金句生成失败时的默认金句
+DEFAULT_CATCHPHRASE = "健康家居，从材料开始"
+
+
 class QwenVLService:
     """Qwen-VL 视觉语言模型服务类"""
 
@@ -105,7 +109,9 @@ class QwenVLService:
             try:
                 logger.info(f"调用 Qwen-VL API (尝试 {attempt + 1}/{self.max_retries})")
 
-                response = self.client.chat.completions.create(
+                # 同步 SDK 调用放到线程中执行，避免阻塞事件循环
+                response = await asyncio.to_thread(
+                    self.client.chat.completions.create,
                     model=self.model,
                     messages=messages,
                     stream=False,
@@ -133,6 +139,49 @@ class QwenVLService:
 
         raise Exception("Qwen-VL API 调用失败")
 
+    async def answer_question(self, question: str, contexts: List[str]) -> str:
+        """基于知识条目回答材料问题
+
+        Args:
+            question: 用户问题
+            contexts: 检索到的知识条目文本
+
+        Returns:
+            回答文本
+
+        Raises:
+            Exception: API 调用失败或返回空响应
+        """
+        knowledge = "\n\n".join(
+            f"[{i}] {context}" for i, context in enumerate(contexts, 1)
+        ) or "（未检索到相关知识）"
+        messages = [
+            {
+                "role": "system",
+                "content": (
+                    "你是家居材料健康顾问。请仅根据提供的知识条目回答用户关于家具材料的问题，"
+                    "说明主要健康风险、敏感人群与选购或使用建议；知识条目没有涉及的内容请直接说明无法确定，"
+                    "不要编造数据。回答使用简体中文，简洁明了。"
+                )
+            },
+            {
+                "role": "user",
+                "content": f"知识条目：\n{knowledge}\n\n问题：{question}"
+            }
+        ]
+
+        response = await asyncio.to_thread(
+            self.client.chat.completions.create,
+            model=self.model,
+            messages=messages,
+            stream=False,
+            temperature=0.3,
+            max_tokens=self.settings.QA_MAX_TOKENS
+        )
+        if not response.choices or not response.choices[0].message.content:
+            raise Exception("材料问答 API 返回空响应")
+        return response.choices[0].message.content.strip()
+
     def _parse_response(self, response_text: str) -> Dict:
         """解析 API 响应
 
@@ -234,7 +283,8 @@ class QwenVLService:
         ]
 
         try:
-            response = self.client.chat.completions.create(
+            response = await asyncio.to_thread(
+                self.client.chat.completions.create,
                 model=self.model,
                 messages=messages,
                 stream=False,
@@ -247,9 +297,9 @@ class QwenVLService:
                 return catchphrase.strip()
             else:
                 logger.error("金句生成失败: 空响应")
-                return "健康家居，从材料开始"
+                return DEFAULT_CATCHPHRASE
 
         except Exception as e:
             logger.error(f"金句生成异常: {e}")
-            return "健康家居，从材料开始"
+            return DEFAULT_CATCHPHRASE
 
@@ -0,0 +1,344 @@
+"""检测报告存储服务"""
+import asyncio
+import itertools
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+
+from app.core.config import get_settings
+
+
+class ReportStore(ABC):
+    """检测报告存储接口
+
+    报告以 JSON 兼容的字典保存，按 report_id 索引，过期时间与 OSS 图片
+    生命周期 (OSS_IMAGE_EXPIRE_DAYS) 对齐。分享卡片不晚于所属报告过期。
+    """
+
+    def __init__(self, ttl_seconds: int):
+        """初始化存储
+
+        Args:
+            ttl_seconds: 报告保存时长（秒）
+        """
+        self.ttl_seconds = ttl_seconds
+
+    @abstractmethod
+    async def save(self, report_id: str, report: dict) -> None:
+        """保存报告（已存在则覆盖）
+
+        Args:
+            report_id: 报告 ID
+            report: 报告数据
+        """
+
+    @abstractmethod
+    async def get(self, report_id: str) -> Optional[dict]:
+        """获取报告
+
+        Args:
+            report_id: 报告 ID
+
+        Returns:
+            报告数据，不存在或已过期时返回 None
+        """
+
+    @abstractmethod
+    async def save_share_card(self, report_id: str, template_style: str, card: dict) -> None:
+        """保存已生成的分享卡片，过期时间不晚于所属报告，报告不存在或已过期时不保存
+
+        Args:
+            report_id: 报告 ID
+            template_style: 模板风格
+            card: 分享卡片数据
+        """
+
+    @abstractmethod
+    async def get_share_card(self, report_id: str, template_style: str) -> Optional[dict]:
+        """获取已生成的分享卡片
+
+        Args:
+            report_id: 报告 ID
+            template_style: 模板风格
+
+        Returns:
+            分享卡片数据，不存在或已过期时返回 None
+        """
+
+    async def close(self) -> None:
+        """释放连接"""
+
+
+class SQLiteReportStore(ReportStore):
+    """SQLite 报告存储（默认，本地单机多进程可共享）"""
+
+    # 每写入多少次清理一次过期报告
+    PURGE_EVERY = 500
+
+    def __init__(self, path: str, ttl_seconds: int):
+        """初始化 SQLite 存储
+
+        Args:
+            path: 数据库文件路径
+            ttl_seconds: 报告保存时长（秒）
+        """
+        super().__init__(ttl_seconds)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        # 报告写入计数（在多个线程中递增，itertools.count 的 next 是原子操作）
+        self._writes = itertools.count(1)
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS reports ("
+            "report_id TEXT PRIMARY KEY, "
+            "data TEXT NOT NULL, "
+            "expires_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_reports_expires_at ON reports (expires_at)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS share_cards ("
+            "report_id TEXT NOT NULL, "
+            "template_style TEXT NOT NULL, "
+            "data TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, "
+            "PRIMARY KEY (report_id, template_style))"
+        )
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """获取当前线程的连接（sqlite3 连接不能跨线程共享）"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            self._local.conn = conn
+        return conn
+
+    def _save(self, report_id: str, data: str) -> None:
+        conn = self._connection()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO reports (report_id, data, expires_at) VALUES (?, ?, ?)",
+            (report_id, data, now + self.ttl_seconds)
+        )
+        if next(self._writes) % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM reports WHERE expires_at <= ?", (now,))
+            conn.execute("DELETE FROM share_cards WHERE expires_at <= ?", (now,))
+        conn.commit()
+
+    def _get(self, report_id: str) -> Optional[str]:
+        row = self._connection().execute(
+            "SELECT data FROM reports WHERE report_id = ? AND expires_at > ?",
+            (report_id, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def _save_share_card(self, report_id: str, template_style: str, data: str) -> None:
+        conn = self._connection()
+        now = time.time()
+        # 过期时间取 min(now + ttl, 报告过期时间)，报告不存在或已过期时不插入
+        conn.execute(
+            "INSERT OR REPLACE INTO share_cards "
+            "(report_id, template_style, data, expires_at) "
+            "SELECT report_id, ?, ?, MIN(?, expires_at) FROM reports "
+            "WHERE report_id = ? AND expires_at > ?",
+            (template_style, data, now + self.ttl_seconds, report_id, now)
+        )
+        conn.commit()
+
+    def _get_share_card(self, report_id: str, template_style: str) -> Optional[str]:
+        row = self._connection().execute(
+            "SELECT data FROM share_cards "
+            "WHERE report_id = ? AND template_style = ? AND expires_at > ?",
+            (report_id, template_style, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    async def save(self, report_id: str, report: dict) -> None:
+        data = json.dumps(report, ensure_ascii=False)
+        await asyncio.to_thread(self._save, report_id, data)
+
+    async def get(self, report_id: str) -> Optional[dict]:
+        data = await asyncio.to_thread(self._get, report_id)
+        return json.loads(data) if data is not None else None
+
+    async def save_share_card(self, report_id: str, template_style: str, card: dict) -> None:
+        data = json.dumps(card, ensure_ascii=False)
+        await asyncio.to_thread(self._save_share_card, report_id, template_style, data)
+
+    async def get_share_card(self, report_id: str, template_style: str) -> Optional[dict]:
+        data = await asyncio.to_thread(self._get_share_card, report_id, template_style)
+        return json.loads(data) if data is not None else None
+
+
+class MongoReportStore(ReportStore):
+    """MongoDB 报告存储（多实例部署）"""
+
+    def __init__(self, url: str, db_name: str, ttl_seconds: int):
+        """初始化 MongoDB 存储
+
+        Args:
+            url: MongoDB 连接地址
+            db_name: 数据库名
+            ttl_seconds: 报告保存时长（秒）
+        """
+        super().__init__(ttl_seconds)
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        self.client = AsyncIOMotorClient(url)
+        self.collection = self.client[db_name]["reports"]
+        self.cards_collection = self.client[db_name]["share_cards"]
+        self._indexes_ready = False
+
+    async def _ensure_indexes(self) -> None:
+        """创建 report_id 唯一索引与 expires_at TTL 索引"""
+        if self._indexes_ready:
+            return
+        await self.collection.create_index("report_id", unique=True)
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+        await self.cards_collection.create_index(
+            [("report_id", 1), ("template_style", 1)], unique=True
+        )
+        await self.cards_collection.create_index("expires_at", expireAfterSeconds=0)
+        self._indexes_ready = True
+
+    async def save(self, report_id: str, report: dict) -> None:
+        await self._ensure_indexes()
+        await self.collection.replace_one(
+            {"report_id": report_id},
+            {
+                "report_id": report_id,
+                "data": report,
+                "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+            },
+            upsert=True
+        )
+
+    async def get(self, report_id: str) -> Optional[dict]:
+        await self._ensure_indexes()
+        # TTL 索引的后台清理有延迟，查询时同样过滤已过期报告
+        doc = await self.collection.find_one(
+            {"report_id": report_id, "expires_at": {"$gt": datetime.utcnow()}},
+            {"data": 1}
+        )
+        return doc["data"] if doc else None
+
+    async def save_share_card(self, report_id: str, template_style: str, card: dict) -> None:
+        await self._ensure_indexes()
+        now = datetime.utcnow()
+        report = await self.collection.find_one(
+            {"report_id": report_id, "expires_at": {"$gt": now}},
+            {"expires_at": 1}
+        )
+        if report is None:
+            return
+        key = {"report_id": report_id, "template_style": template_style}
+        await self.cards_collection.replace_one(
+            key,
+            {
+                **key,
+                "data": card,
+                "expires_at": min(now + timedelta(seconds=self.ttl_seconds), report["expires_at"])
+            },
+            upsert=True
+        )
+
+    async def get_share_card(self, report_id: str, template_style: str) -> Optional[dict]:
+        await self._ensure_indexes()
+        doc = await self.cards_collection.find_one(
+            {
+                "report_id": report_id,
+                "template_style": template_style,
+                "expires_at": {"$gt": datetime.utcnow()}
+            },
+            {"data": 1}
+        )
+        return doc["data"] if doc else None
+
+    async def close(self) -> None:
+        self.client.close()
+
+
+class RedisReportStore(ReportStore):
+    """Redis 报告存储（多实例部署）"""
+
+    KEY_PREFIX = "report:"
+    CARD_KEY_PREFIX = "share_card:"
+
+    def __init__(self, host: str, port: int, db: int, ttl_seconds: int):
+        """初始化 Redis 存储
+
+        Args:
+            host: Redis 主机
+            port: Redis 端口
+            db: Redis 数据库编号
+            ttl_seconds: 报告保存时长（秒）
+        """
+        super().__init__(ttl_seconds)
+        import redis.asyncio as redis
+
+        self.client = redis.Redis(host=host, port=port, db=db)
+
+    async def save(self, report_id: str, report: dict) -> None:
+        await self.client.set(
+            f"{self.KEY_PREFIX}{report_id}",
+            json.dumps(report, ensure_ascii=False),
+            ex=self.ttl_seconds
+        )
+
+    async def get(self, report_id: str) -> Optional[dict]:
+        data = await self.client.get(f"{self.KEY_PREFIX}{report_id}")
+        return json.loads(data) if data is not None else None
+
+    async def save_share_card(self, report_id: str, template_style: str, card: dict) -> None:
+        # 报告键的剩余有效期（毫秒），-2 表示不存在，-1 表示未设置过期
+        report_ttl = await self.client.pttl(f"{self.KEY_PREFIX}{report_id}")
+        if report_ttl == -2 or report_ttl == 0:
+            return
+        ttl = self.ttl_seconds * 1000
+        await self.client.set(
+            f"{self.CARD_KEY_PREFIX}{report_id}:{template_style}",
+            json.dumps(card, ensure_ascii=False),
+            px=ttl if report_ttl < 0 else min(ttl, report_ttl)
+        )
+
+    async def get_share_card(self, report_id: str, template_style: str) -> Optional[dict]:
+        data = await self.client.get(f"{self.CARD_KEY_PREFIX}{report_id}:{template_style}")
+        return json.loads(data) if data is not None else None
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+@lru_cache()
+def get_report_store() -> ReportStore:
+    """根据 REPORT_STORE_BACKEND 创建报告存储单例"""
+    settings = get_settings()
+    ttl_seconds = settings.OSS_IMAGE_EXPIRE_DAYS * 24 * 3600
+    backend = settings.REPORT_STORE_BACKEND.lower()
+
+    if backend == "sqlite":
+        store = SQLiteReportStore(settings.REPORT_STORE_SQLITE_PATH, ttl_seconds)
+    elif backend == "mongodb":
+        store = MongoReportStore(settings.MONGODB_URL, settings.MONGODB_DB_NAME, ttl_seconds)
+    elif backend == "redis":
+        store = RedisReportStore(
+            settings.REDIS_HOST, settings.REDIS_PORT, settings.REDIS_DB, ttl_seconds
+        )
+    else:
+        raise ValueError(f"不支持的报告存储后端: {settings.REPORT_STORE_BACKEND}")
+
+    logger.info(f"报告存储后端: {backend}")
+    return store
@@ -0,0 +1,370 @@
+"""知识库语义检索（ChromaDB 材料知识集合）"""
+import asyncio
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from app.core.config import get_settings
+
+# 文本列表 -> 向量列表
+EmbeddingFunction = Callable[[List[str]], Sequence[Sequence[float]]]
+
+
+class SearchBusyError(RuntimeError):
+    """检索线程全部占用（含已超时仍在运行的推理），本次检索跳过"""
+
+
+class SemanticHit(NamedTuple):
+    """语义检索命中的知识条目"""
+    id: str
+    collection: str
+    document: str
+    metadata: Dict
+    similarity: float  # 余弦相似度，越大越相关
+
+
+def create_embedding_function(model_name: str = "") -> EmbeddingFunction:
+    """创建本地嵌入模型
+
+    查询向量必须与导入时的向量来自同一模型：导入脚本使用 ChromaDB 默认模型
+    (all-MiniLM-L6-v2，ONNX 本地推理)，留空即与之一致；指定 sentence-transformers
+    模型名时需用同一模型重新导入知识。
+
+    Args:
+        model_name: sentence-transformers 模型名，留空使用 ChromaDB 默认模型
+
+    Returns:
+        嵌入函数
+    """
+    from chromadb.utils import embedding_functions
+
+    if not model_name:
+        return embedding_functions.DefaultEmbeddingFunction()
+    return embedding_functions.SentenceTransformerEmbeddingFunction(model_name=model_name)
+
+
+def similarity_from_distance(distance: float, space: str) -> float:
+    """将 ChromaDB 距离换算为余弦相似度（嵌入向量已归一化）"""
+    if space == "l2":
+        # 平方欧氏距离: |a-b|^2 = 2 - 2cos
+        return 1 - distance / 2
+    # cosine / ip: 距离为 1 - cos
+    return 1 - distance
+
+
+class SemanticSearchService:
+    """ChromaDB 知识集合语义检索
+
+    - 嵌入模型与集合在首次使用时加载（可在启动时调用 warm_up 预热）
+    - 查询向量按规范化文本做 LRU 缓存，命中时不再推理
+    - search_many 批量推理未命中缓存的查询，每个集合只查询一次
+    - 异步接口有延迟预算，超时返回空结果，调用方按未命中处理
+    - 推理与检索在专用的小线程池中执行；超时的推理无法中断，会继续占用线程，
+      线程全部占用时新的检索直接跳过，不在默认线程池中堆积
+    - 加载失败（依赖、模型或数据不可用）时暂停语义检索，按指数退避间隔重试加载
+    """
+
+    # 加载失败后的重试间隔（秒），每次失败翻倍直到上限
+    RETRY_INITIAL_DELAY = 30.0
+    RETRY_MAX_DELAY = 600.0
+
+    def __init__(
+        self,
+        persist_directory: str,
+        collection_names: Sequence[str],
+        embedding_function: Optional[EmbeddingFunction] = None,
+        embedding_model: str = "",
+        cache_size: int = 1024,
+        timeout: float = 0.3,
+        max_workers: int = 2
+    ):
+        """初始化语义检索服务
+
+        Args:
+            persist_directory: ChromaDB 持久化目录（导入脚本的 ./chroma_db）
+            collection_names: 检索的集合名
+            embedding_function: 嵌入函数，为空时按 embedding_model 创建
+            embedding_model: 嵌入模型名，见 create_embedding_function
+            cache_size: 查询向量缓存条数
+            timeout: 异步检索的延迟预算（秒）
+            max_workers: 推理与检索线程数
+        """
+        self.persist_directory = persist_directory
+        self.collection_names = list(collection_names)
+        self.embedding_model = embedding_model
+        self.cache_size = cache_size
+        self.timeout = timeout
+        self._embedding_function = embedding_function
+        self._collections: List[Tuple[str, object, str]] = []
+        self._ready: Optional[bool] = None
+        self._retry_delay = 0.0
+        self._next_retry_at = 0.0
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.max_workers = max(1, max_workers)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="semantic-search"
+        )
+        # 已提交且未完成的任务数，达到线程数时不再提交
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+
+    def _should_load(self) -> bool:
+        """尚未加载，或上次加载失败且已到重试时间"""
+        return self._ready is None or (
+            self._ready is False and time.monotonic() >= self._next_retry_at
+        )
+
+    def _load(self) -> bool:
+        """加载嵌入模型并打开检索数据（成功后不再执行，失败后按退避间隔重试）
+
+        Returns:
+            语义检索是否可用
+        """
+        if not self._should_load():
+            return self._ready
+        with self._load_lock:
+            if not self._should_load():
+                return self._ready
+            try:
+                if self._embedding_function is None:
+                    self._embedding_function = self._create_embedding_function()
+                self._ready = self._open()
+                reason = "没有可用的知识集合"
+            except Exception as e:
+                self._ready = False
+                reason = str(e)
+            if self._ready:
+                self._retry_delay = 0.0
+            else:
+                # 不在每个请求上重试，等待退避间隔后由下一次检索重新加载
+                self._retry_delay = min(
+                    max(self._retry_delay * 2, self.RETRY_INITIAL_DELAY), self.RETRY_MAX_DELAY
+                )
+                self._next_retry_at = time.monotonic() + self._retry_delay
+                logger.warning(f"语义检索不可用，{self._retry_delay:.0f} 秒后重试: {reason}")
+            return self._ready
+
+    def _create_embedding_function(self) -> EmbeddingFunction:
+        """创建嵌入模型（未传入 embedding_function 时使用）"""
+        return create_embedding_function(self.embedding_model)
+
+    def _open(self) -> bool:
+        """打开 ChromaDB 集合，返回是否有可用集合"""
+        import chromadb
+
+        if hasattr(chromadb, "PersistentClient"):
+            client = chromadb.PersistentClient(path=self.persist_directory)
+        else:
+            # 与导入脚本相同的旧版客户端
+            from chromadb.config import Settings as ChromaSettings
+            client = chromadb.Client(ChromaSettings(
+                chroma_db_impl="duckdb+parquet",
+                persist_directory=self.persist_directory
+            ))
+
+        # 重试加载时重新打开全部集合
+        collections = []
+        for name in self.collection_names:
+            try:
+                collection = client.get_collection(name=name)
+            except Exception as e:
+                logger.warning(f"知识集合 {name} 不可用，跳过: {e}")
+                continue
+            space = (collection.metadata or {}).get("hnsw:space", "l2")
+            collections.append((name, collection, space))
+        self._collections = collections
+        logger.info(f"语义检索已加载 {len(collections)} 个知识集合: {self.persist_directory}")
+        return bool(collections)
+
+    def warm_up(self) -> None:
+        """预先加载嵌入模型与检索数据，避免首个请求承担加载耗时"""
+        if self._load():
+            self.embed(["预热"])
+
+    @staticmethod
+    def _cache_key(query: str) -> str:
+        return " ".join(unicodedata.normalize("NFKC", query).split()).lower()
+
+    def embed(self, queries: Sequence[str]) -> List[List[float]]:
+        """计算查询向量，未命中缓存的查询一次批量推理
+
+        Args:
+            queries: 查询文本
+
+        Returns:
+            与 queries 一一对应的向量
+        """
+        self._load()
+        keys = [self._cache_key(q) for q in queries]
+        vectors: Dict[str, List[float]] = {}
+        with self._cache_lock:
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    vectors[key] = self._cache[key]
+
+        missing = list(dict.fromkeys(key for key in keys if key not in vectors))
+        if missing:
+            computed = [list(map(float, v)) for v in self._embedding_function(missing)]
+            with self._cache_lock:
+                for key, vector in zip(missing, computed):
+                    vectors[key] = vector
+                    self._cache[key] = vector
+                    self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return [vectors[key] for key in keys]
+
+    def search_many_sync(self, queries: Sequence[str], top_k: int = 5) -> List[List[SemanticHit]]:
+        """批量语义检索（同步，不受延迟预算限制）
+
+        Args:
+            queries: 查询文本
+            top_k: 每个查询返回的条数（跨集合合并后）
+
+        Returns:
+            与 queries 一一对应的命中列表，按相似度降序
+        """
+        if not queries or not self._load():
+            return [[] for _ in queries]
+        return self._query(self.embed(queries), top_k)
+
+    def search_embeddings(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        top_k: int = 5
+    ) -> List[List[SemanticHit]]:
+        """按已计算的查询向量检索（调用方已调用 embed 时避免重复查缓存）
+
+        Args:
+            embeddings: 查询向量
+            top_k: 每个查询返回的条数
+
+        Returns:
+            与 embeddings 一一对应的命中列表，按相似度降序
+        """
+        if not embeddings or not self._load():
+            return [[] for _ in embeddings]
+        return self._query([list(v) for v in embeddings], top_k)
+
+    def _query(self, embeddings: List[List[float]], top_k: int) -> List[List[SemanticHit]]:
+        """按查询向量检索各集合并合并结果"""
+        results: List[List[SemanticHit]] = [[] for _ in embeddings]
+        for name, collection, space in self._collections:
+            response = collection.query(query_embeddings=embeddings, n_results=top_k)
+            for hits, ids, documents, metadatas, distances in zip(
+                results,
+                response["ids"],
+                response["documents"],
+                response["metadatas"],
+                response["distances"]
+            ):
+                hits.extend(
+                    SemanticHit(
+                        doc_id, name, document or "", metadata or {},
+                        similarity_from_distance(distance, space)
+                    )
+                    for doc_id, document, metadata, distance
+                    in zip(ids, documents, metadatas, distances)
+                )
+        return [
+            sorted(hits, key=lambda hit: hit.similarity, reverse=True)[:top_k]
+            for hits in results
+        ]
+
+    def _task_done(self, _future) -> None:
+        with self._in_flight_lock:
+            self._in_flight -= 1
+
+    async def run(self, func: Callable[..., Any], *args, timeout: Optional[float] = None) -> Any:
+        """在检索专用线程池中执行 func（如 embed、search_embeddings）
+
+        Args:
+            func: 要执行的函数
+            *args: 函数参数
+            timeout: 等待时间（秒），为空时一直等待
+
+        Returns:
+            函数返回值
+
+        Raises:
+            SearchBusyError: 线程全部占用，未执行
+            asyncio.TimeoutError: 超时（函数在线程中继续运行直到完成）
+        """
+        with self._in_flight_lock:
+            if self._in_flight >= self.max_workers:
+                raise SearchBusyError("语义检索线程已全部占用")
+            self._in_flight += 1
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._task_done(None)
+            raise
+        future.add_done_callback(self._task_done)
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
+
+    async def search_many(
+        self,
+        queries: Sequence[str],
+        top_k: int = 5,
+        timeout: Optional[float] = None
+    ) -> List[List[SemanticHit]]:
+        """批量语义检索，超出延迟预算或检索失败时返回空结果
+
+        Args:
+            queries: 查询文本
+            top_k: 每个查询返回的条数
+            timeout: 延迟预算（秒），为空使用服务默认值
+
+        Returns:
+            与 queries 一一对应的命中列表
+        """
+        budget = self.timeout if timeout is None else timeout
+        try:
+            return await self.run(self.search_many_sync, list(queries), top_k, timeout=budget)
+        except SearchBusyError:
+            logger.warning("语义检索线程繁忙，跳过本次检索，按未命中处理")
+        except asyncio.TimeoutError:
+            logger.warning(f"语义检索超出延迟预算 {budget}s，按未命中处理")
+        except Exception as e:
+            logger.error(f"语义检索失败: {e}")
+        return [[] for _ in queries]
+
+    async def search(self, query: str, top_k: int = 5) -> List[SemanticHit]:
+        """单条语义检索"""
+        return (await self.search_many([query], top_k))[0]
+
+
+@lru_cache()
+def get_semantic_search() -> Optional[SemanticSearchService]:
+    """获取进程内共享的语义检索服务，未启用时返回 None"""
+    settings = get_settings()
+    if not settings.SEMANTIC_SEARCH_ENABLED:
+        return None
+    if settings.SEMANTIC_SEARCH_BACKEND == "numpy":
+        from app.services.vector_index import VectorIndexSearchService
+
+        return VectorIndexSearchService(
+            settings.SEMANTIC_SEARCH_INDEX_DIR,
+            nprobe=settings.SEMANTIC_SEARCH_NPROBE,
+            embedding_model=settings.SEMANTIC_SEARCH_EMBEDDING_MODEL,
+            cache_size=settings.SEMANTIC_SEARCH_CACHE_SIZE,
+            timeout=settings.SEMANTIC_SEARCH_TIMEOUT,
+            max_workers=settings.SEMANTIC_SEARCH_WORKERS
+        )
+    return SemanticSearchService(
+        settings.SEMANTIC_SEARCH_PERSIST_DIR,
+        settings.SEMANTIC_SEARCH_COLLECTIONS,
+        embedding_model=settings.SEMANTIC_SEARCH_EMBEDDING_MODEL,
+        cache_size=settings.SEMANTIC_SEARCH_CACHE_SIZE,
+        timeout=settings.SEMANTIC_SEARCH_TIMEOUT,
+        max_workers=settings.SEMANTIC_SEARCH_WORKERS
+    )
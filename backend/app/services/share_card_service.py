@@ -0,0 +1,214 @@
+"""分享卡片生成服务"""
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Optional, Tuple, TypeVar
+
+from loguru import logger
+
+from app.core.config import get_settings
+from app.models.schemas import ShareCardData
+from app.services.card_renderer import get_card_renderer
+from app.services.image_service import ImageService
+from app.services.qwen_vl import QwenVLService, DEFAULT_CATCHPHRASE
+
+T = TypeVar("T")
+
+
+def miniprogram_report_path(report_id: str) -> str:
+    """报告对应的小程序页面路径"""
+    return f"/pages/report/report?id={report_id}"
+
+
+class ShareCardService:
+    """分享卡片生成服务类
+
+    各步骤按依赖关系并发执行：
+
+        金句 ──────────────┐
+                           ├─> 渲染卡片 ─> 上传卡片
+        二维码图片 ─┬──────┘
+                    └─> 上传二维码
+
+    金句、二维码各自有超时与降级结果，单个步骤变慢不会拖住整张卡片；
+    渲染与卡片上传失败时抛出异常。使用了降级结果的卡片会标记出来，
+    调用方不应长期保存，下次请求时重新生成。
+    """
+
+    def __init__(
+        self,
+        image_service: Optional[ImageService] = None,
+        qwen_service: Optional[QwenVLService] = None
+    ):
+        """初始化分享卡片服务
+
+        Args:
+            image_service: 图片服务，默认新建
+            qwen_service: Qwen-VL 服务，默认新建
+        """
+        self.settings = get_settings()
+        self.image_service = image_service or ImageService()
+        self.qwen_service = qwen_service or QwenVLService()
+        self.renderer = get_card_renderer()
+
+    async def generate(
+        self,
+        report: dict,
+        report_id: str,
+        template_style: str = "modern"
+    ) -> Tuple[ShareCardData, bool]:
+        """生成并上传分享卡片
+
+        Args:
+            report: 检测报告数据
+            report_id: 报告 ID
+            template_style: 模板风格
+
+        Returns:
+            (分享卡片数据, 是否使用了降级结果：默认金句、缺少二维码或二维码未上传)
+        """
+        settings = self.settings
+        miniprogram_path = miniprogram_report_path(report_id)
+
+        # 金句与二维码互不依赖，同时开始
+        catchphrase_task = asyncio.create_task(self._with_fallback(
+            "金句生成",
+            self._generate_catchphrase(report),
+            settings.SHARE_CATCHPHRASE_TIMEOUT,
+            DEFAULT_CATCHPHRASE
+        ))
+        qr_code = await self._with_fallback(
+            "二维码生成",
+            asyncio.to_thread(self.image_service.get_qr_code, miniprogram_path),
+            settings.SHARE_QR_TIMEOUT,
+            None
+        )
+
+        # 二维码上传与金句、渲染、卡片上传重叠执行
+        qr_upload_task = asyncio.create_task(self._with_fallback(
+            "二维码上传",
+            self.image_service.generate_and_upload_qr_code(miniprogram_path),
+            settings.SHARE_UPLOAD_TIMEOUT,
+            ""
+        ))
+
+        try:
+            catchphrase = await catchphrase_task
+
+            card_image_data = await asyncio.wait_for(
+                asyncio.to_thread(
+                    self.renderer.render,
+                    report,
+                    catchphrase,
+                    template_style,
+                    qr_code
+                ),
+                settings.SHARE_RENDER_TIMEOUT
+            )
+
+            card_image_url = await asyncio.wait_for(
+                self.image_service.upload_to_oss(
+                    card_image_data,
+                    f"share_card_{report_id}.jpg"
+                ),
+                settings.SHARE_UPLOAD_TIMEOUT
+            )
+        except BaseException:
+            qr_upload_task.cancel()
+            raise
+
+        qr_code_url = await qr_upload_task
+
+        degraded = self._is_degraded(catchphrase, qr_code) or not qr_code_url
+        now = datetime.now()
+        card = ShareCardData(
+            card_id=str(uuid.uuid4()),
+            report_id=report_id,
+            card_image_url=card_image_url,
+            qr_code_url=qr_code_url,
+            catchphrase=catchphrase,
+            template_style=template_style,
+            created_at=now,
+            expires_at=now + timedelta(days=settings.OSS_IMAGE_EXPIRE_DAYS)
+        )
+        return card, degraded
+
+    async def render_card(
+        self,
+        report: dict,
+        report_id: str,
+        template_style: str = "modern",
+        catchphrase: Optional[str] = None
+    ) -> Tuple[bytes, bool]:
+        """只渲染卡片图片，不上传 OSS（用于直接返回图片的接口）
+
+        Args:
+            report: 检测报告数据
+            report_id: 报告 ID
+            template_style: 模板风格
+            catchphrase: 已有金句（如预渲染卡片中的金句），为空时重新生成
+
+        Returns:
+            (卡片图片数据 (JPEG), 是否使用了降级结果：默认金句或缺少二维码)
+        """
+        settings = self.settings
+        miniprogram_path = miniprogram_report_path(report_id)
+
+        if catchphrase is None:
+            catchphrase_task = asyncio.create_task(self._with_fallback(
+                "金句生成",
+                self._generate_catchphrase(report),
+                settings.SHARE_CATCHPHRASE_TIMEOUT,
+                DEFAULT_CATCHPHRASE
+            ))
+        qr_code = await self._with_fallback(
+            "二维码生成",
+            asyncio.to_thread(self.image_service.get_qr_code, miniprogram_path),
+            settings.SHARE_QR_TIMEOUT,
+            None
+        )
+        if catchphrase is None:
+            catchphrase = await catchphrase_task
+
+        data = await asyncio.wait_for(
+            asyncio.to_thread(
+                self.renderer.render,
+                report,
+                catchphrase,
+                template_style,
+                qr_code
+            ),
+            settings.SHARE_RENDER_TIMEOUT
+        )
+        return data, self._is_degraded(catchphrase, qr_code)
+
+    async def _generate_catchphrase(self, report: dict) -> str:
+        """根据报告生成金句"""
+        material = report['materials'][0]
+        material_info = {
+            'material_type': material['material_type'],
+            'sub_type': material['sub_type']
+        }
+        risk_level = report['risk_assessment']['risk_level']
+        return await self.qwen_service.generate_catchphrase(material_info, risk_level)
+
+    @staticmethod
+    def _is_degraded(catchphrase: str, qr_code: Optional[bytes]) -> bool:
+        """金句为默认值（生成超时或失败）或缺少二维码"""
+        return catchphrase == DEFAULT_CATCHPHRASE or qr_code is None
+
+    @staticmethod
+    async def _with_fallback(
+        stage: str,
+        awaitable: Awaitable[T],
+        timeout: float,
+        fallback: T
+    ) -> T:
+        """执行单个步骤，超时或失败时返回降级结果"""
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"分享卡片步骤超时 ({timeout}s)，使用降级结果: {stage}")
+        except Exception as e:
+            logger.warning(f"分享卡片步骤失败，使用降级结果: {stage}: {e}")
+        return fallback
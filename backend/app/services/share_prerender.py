@@ -0,0 +1,159 @@
+"""分享卡片预渲染服务"""
+import asyncio
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Dict, Optional
+
+from loguru import logger
+
+from app.core.config import get_settings
+from app.services.report_store import ReportStore, get_report_store
+from app.services.share_card_service import ShareCardService
+
+
+class SharePrerenderWorker:
+    """分享卡片预渲染后台任务
+
+    检测成功后将报告加入有界队列，由单个低优先级协程在没有检测请求
+    进行时生成默认风格的分享卡片并写入报告存储。队列已满时直接丢弃，
+    不会阻塞检测请求；检测请求持续不断时，每张卡片最多让出
+    SHARE_PRERENDER_MAX_WAIT 秒后照常渲染，避免队列饿死。使用了降级结果
+    （默认金句、缺少二维码）的卡片不保存。
+    """
+
+    def __init__(
+        self,
+        report_store: Optional[ReportStore] = None,
+        share_card_service: Optional[ShareCardService] = None
+    ):
+        """初始化预渲染任务
+
+        Args:
+            report_store: 报告存储，默认使用全局单例
+            share_card_service: 分享卡片服务，默认新建
+        """
+        self.settings = get_settings()
+        self.report_store = report_store or get_report_store()
+        self.share_card_service = share_card_service
+        self.style = self.settings.SHARE_PRERENDER_STYLE
+        self.max_wait = self.settings.SHARE_PRERENDER_MAX_WAIT
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._detections_in_flight = 0
+
+        self.metrics: Dict[str, int] = {
+            'queued': 0,
+            'dropped': 0,
+            'rendered': 0,
+            'failed': 0,
+            'forced': 0,
+            'degraded': 0,
+            'hits': 0,
+            'misses': 0,
+        }
+
+    def start(self) -> None:
+        """启动后台协程（需在事件循环中调用）"""
+        if not self.settings.SHARE_PRERENDER_ENABLED or self._task is not None:
+            return
+        if self.share_card_service is None:
+            self.share_card_service = ShareCardService()
+        self._queue = asyncio.Queue(maxsize=self.settings.SHARE_PRERENDER_QUEUE_SIZE)
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"分享卡片预渲染已启动，风格: {self.style}")
+
+    async def stop(self) -> None:
+        """停止后台协程，未处理的报告直接丢弃"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    @contextmanager
+    def detection_in_progress(self):
+        """标记检测请求进行中，期间暂停预渲染"""
+        self._detections_in_flight += 1
+        try:
+            yield
+        finally:
+            self._detections_in_flight -= 1
+
+    def submit(self, report_id: str, report: dict) -> None:
+        """提交报告等待预渲染
+
+        Args:
+            report_id: 报告 ID
+            report: 报告数据
+        """
+        if self._queue is None:
+            return
+        try:
+            self._queue.put_nowait((report_id, report))
+            self.metrics['queued'] += 1
+        except asyncio.QueueFull:
+            self.metrics['dropped'] += 1
+            logger.debug(f"预渲染队列已满，跳过报告: {report_id}")
+
+    def record_lookup(self, hit: bool) -> None:
+        """记录 /share/generate 是否命中预渲染结果"""
+        self.metrics['hits' if hit else 'misses'] += 1
+
+    def get_metrics(self) -> Dict[str, float]:
+        """获取预渲染指标（含命中率）"""
+        metrics: Dict[str, float] = dict(self.metrics)
+        lookups = metrics['hits'] + metrics['misses']
+        metrics['hit_rate'] = metrics['hits'] / lookups if lookups else 0.0
+        metrics['pending'] = self._queue.qsize() if self._queue is not None else 0
+        return metrics
+
+    async def _run(self) -> None:
+        """后台循环：等待空闲后逐个生成卡片"""
+        poll_interval = self.settings.SHARE_PRERENDER_IDLE_POLL
+        while True:
+            report_id, report = await self._queue.get()
+            try:
+                # 让出给检测请求，空闲或等待超过上限时开始渲染
+                deadline = time.monotonic() + self.max_wait
+                while self._detections_in_flight > 0:
+                    if time.monotonic() >= deadline:
+                        self.metrics['forced'] += 1
+                        break
+                    await asyncio.sleep(poll_interval)
+
+                existing = await self.report_store.get_share_card(report_id, self.style)
+                if existing is None:
+                    card, degraded = await self.share_card_service.generate(report, report_id, self.style)
+                    if degraded:
+                        # 只保存完整渲染的卡片，降级的卡片留给 /share/generate 重新生成
+                        self.metrics['degraded'] += 1
+                        logger.debug(f"预渲染卡片使用了降级结果，不保存，报告 ID: {report_id}")
+                    else:
+                        await self.report_store.save_share_card(
+                            report_id, self.style, card.model_dump(mode="json")
+                        )
+                        self.metrics['rendered'] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.metrics['failed'] += 1
+                logger.warning(f"分享卡片预渲染失败，报告 ID: {report_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+
+@lru_cache()
+def get_share_prerender_worker() -> SharePrerenderWorker:
+    """获取分享卡片预渲染任务单例"""
+    return SharePrerenderWorker()
+
+
+async def track_detection() -> AsyncIterator[None]:
+    """检测接口依赖：请求处理期间暂停预渲染"""
+    with get_share_prerender_worker().detection_in_progress():
+        yield
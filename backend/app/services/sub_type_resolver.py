@@ -0,0 +1,235 @@
+"""材料子类型模糊解析"""
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple
+
+from app.services.kb_records import MaterialRecord
+
+# 只保留中文字符与字母数字
+NON_WORD_PATTERN = re.compile(r'[^一-鿿0-9a-z]+')
+
+# 仿制品标记：输入带有这些词而知识库键没有时，不做子串/模糊匹配，
+# 避免"仿实木"、"PU皮革"被解析为实木、真皮
+IMITATION_MARKERS = ('仿', '人造', '合成', 'pu', 'pvc', '超纤')
+
+# 人造板/复合工艺标记：同上，避免"实木复合板"、"多层实木板"、"实木贴皮"
+# 借"实木"子串解析为实木拼板（低风险），无法可靠匹配时回退到默认中风险
+ENGINEERED_MARKERS = ('复合', '多层', '贴皮', '饰面', '颗粒', '指接', '胶合', '细木工', '大芯')
+
+# 模糊匹配候选数上限与最低相似度
+FUZZY_CANDIDATES = 20
+FUZZY_MIN_SIMILARITY = 0.5
+
+
+class SubTypeMatch(NamedTuple):
+    """子类型解析结果"""
+    material: MaterialRecord
+    sub_type: str  # 知识库中的标准子类型
+    confidence: float  # 0~1
+    method: str  # exact / alias / substring / fuzzy / semantic
+
+
+def normalize_text(text: str) -> str:
+    """规范化模型输出：全角转半角、英文转小写、去除空白与标点"""
+    return NON_WORD_PATTERN.sub('', unicodedata.normalize('NFKC', text or '').lower())
+
+
+def bigrams(text: str) -> Set[str]:
+    """字符二元组集合（单字文本返回自身）"""
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein 编辑距离"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb)
+            ))
+        previous = current
+    return previous[-1]
+
+
+def is_marker_mismatch(text: str, key: str) -> bool:
+    """输入是仿制品或人造板/复合工艺而知识库键不是"""
+    return any(
+        marker in text and marker not in key
+        for marker in IMITATION_MARKERS + ENGINEERED_MARKERS
+    )
+
+
+class SubTypeResolver:
+    """将模型输出的自由文本子类型解析为知识库条目
+
+    在知识库加载时构建，解析依次尝试：
+
+    1. 规范化后精确匹配标准子类型或别名（材料的 aliases 字段）
+    2. 输入中包含的最长键（如"橡木实木" -> 实木）
+    3. 按字符二元组召回候选，再用编辑距离打分
+
+    精确与子串匹配只做哈希查找，开销只与输入长度有关，与知识库规模无关。
+    """
+
+    def __init__(self, materials: Sequence[MaterialRecord]):
+        """构建别名表与二元组索引
+
+        Args:
+            materials: 材料记录列表
+        """
+        entries: List[Tuple[str, MaterialRecord, bool]] = []
+        for material in materials:
+            entries.append((normalize_text(material.sub_type), material, True))
+        # 别名优先级低于标准子类型
+        for material in materials:
+            for alias in material.aliases:
+                entries.append((normalize_text(alias), material, False))
+        self._build(entries)
+
+    @classmethod
+    def from_index(
+        cls,
+        keys: Mapping[str, Tuple[MaterialRecord, bool]],
+        postings: Mapping[str, Sequence[str]],
+        max_key_length: int
+    ) -> "SubTypeResolver":
+        """由预先构建的键表与倒排表构建解析器（如编译快照中的映射视图），不遍历键
+
+        Args:
+            keys: 规范化键 -> (材料, 是否为标准子类型)，已去重并按优先级排列
+            postings: 二元组倒排表
+            max_key_length: 最长键的长度
+
+        Returns:
+            子类型解析器
+        """
+        resolver = cls.__new__(cls)
+        resolver._keys = keys
+        resolver._max_key_length = max_key_length
+        resolver._postings = postings
+        return resolver
+
+    def entries(self) -> List[Tuple[str, MaterialRecord, bool]]:
+        """导出去重后的 (规范化键, 材料, 是否为标准子类型)"""
+        return [(key, material, canonical) for key, (material, canonical) in self._keys.items()]
+
+    def postings(self) -> Mapping[str, Sequence[str]]:
+        """导出二元组倒排表（二元组 -> 包含它的键）"""
+        return self._postings
+
+    def _build(self, entries: Iterable[Tuple[str, MaterialRecord, bool]]) -> None:
+        # 规范化键 -> (材料, 是否为标准子类型)，重复键以先出现的为准
+        keys: Dict[str, Tuple[MaterialRecord, bool]] = {}
+        for key, material, canonical in entries:
+            if key:
+                keys.setdefault(key, (material, canonical))
+
+        self._keys: Mapping[str, Tuple[MaterialRecord, bool]] = keys
+        self._max_key_length = max(map(len, keys), default=0)
+        postings: Dict[str, List[str]] = {}
+        for key in keys:
+            for gram in bigrams(key):
+                postings.setdefault(gram, []).append(key)
+        self._postings: Mapping[str, Sequence[str]] = postings
+
+    def resolve(self, sub_type: Optional[str]) -> Optional[SubTypeMatch]:
+        """解析子类型
+
+        Args:
+            sub_type: 模型输出的子类型
+
+        Returns:
+            解析结果，无法可靠匹配时返回 None
+        """
+        text = normalize_text(sub_type or '')
+        if not text:
+            return None
+
+        entry = self._keys.get(text)
+        if entry is not None:
+            material, canonical = entry
+            return self._match(material, 1.0 if canonical else 0.95, 'exact' if canonical else 'alias')
+
+        match = self._resolve_substring(text)
+        if match is not None:
+            return match
+        return self._resolve_fuzzy(text)
+
+    def find_mentions(self, text: Optional[str]) -> List[SubTypeMatch]:
+        """查找文本（如一句问题）中提到的所有材料
+
+        只接受与标准子类型或别名完全相同的片段，从长到短选取互不重叠的键，
+        片段附近带有仿制品/人造板标记（如"仿实木"、"实木复合板"）时跳过。
+
+        Args:
+            text: 任意文本
+
+        Returns:
+            每个材料一条解析结果（method 为 exact 或 alias），按在文本中出现的顺序
+        """
+        text = normalize_text(text or '')
+        covered = [False] * len(text)
+        found: List[Tuple[int, SubTypeMatch]] = []
+        seen: Set[str] = set()
+        for length in range(min(len(text), self._max_key_length), 1, -1):
+            for start in range(len(text) - length + 1):
+                end = start + length
+                entry = self._keys.get(text[start:end])
+                if entry is None or any(covered[start:end]):
+                    continue
+                # 标记词只检查键前后各两个字符，问题中其他位置的词不影响
+                if is_marker_mismatch(text[max(0, start - 2):end + 2], text[start:end]):
+                    continue
+                covered[start:end] = [True] * length
+                material, canonical = entry
+                if material.id in seen:
+                    continue
+                seen.add(material.id)
+                found.append((start, self._match(
+                    material, 1.0 if canonical else 0.95, 'exact' if canonical else 'alias'
+                )))
+        return [match for _, match in sorted(found, key=lambda item: item[0])]
+
+    def _match(self, material: MaterialRecord, confidence: float, method: str) -> SubTypeMatch:
+        return SubTypeMatch(material, material.sub_type, round(confidence, 3), method)
+
+    def _resolve_substring(self, text: str) -> Optional[SubTypeMatch]:
+        """查找输入中包含的最长键，从长到短枚举子串"""
+        for length in range(min(len(text) - 1, self._max_key_length), 1, -1):
+            for start in range(len(text) - length + 1):
+                key = text[start:start + length]
+                entry = self._keys.get(key)
+                if entry is None or is_marker_mismatch(text, key):
+                    continue
+                # 键覆盖输入的比例越高越可信
+                confidence = 0.6 + 0.3 * length / len(text)
+                return self._match(entry[0], confidence, 'substring')
+        return None
+
+    def _resolve_fuzzy(self, text: str) -> Optional[SubTypeMatch]:
+        """二元组召回候选，编辑距离相似度最高者"""
+        shared = Counter()
+        for gram in bigrams(text):
+            shared.update(self._postings.get(gram, ()))
+        if not shared:
+            return None
+
+        best_key, best_similarity = None, 0.0
+        for key, _ in shared.most_common(FUZZY_CANDIDATES):
+            if is_marker_mismatch(text, key):
+                continue
+            similarity = 1 - edit_distance(text, key) / max(len(text), len(key))
+            if similarity > best_similarity:
+                best_key, best_similarity = key, similarity
+
+        if best_key is None or best_similarity < FUZZY_MIN_SIMILARITY:
+            return None
+        return self._match(self._keys[best_key][0], 0.8 * best_similarity, 'fuzzy')
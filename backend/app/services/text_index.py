@@ -0,0 +1,165 @@
+"""中文字符 n-gram 倒排索引（BM25 排序）"""
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterator, List, Mapping, Sequence, Tuple, Union
+
+import numpy as np
+from scipy import sparse
+
+# 连续的中文字符或字母数字视为一个片段，其余字符（空白、标点）作为分隔
+SEGMENT_PATTERN = re.compile(r'[一-鿿]+|[0-9a-z]+')
+
+
+def char_ngrams(text: str, n: int = 2) -> Iterator[str]:
+    """将文本切分为字符 n-gram
+
+    按片段切分，n-gram 不跨越空白与标点；短于 n 的片段整体作为一个词项。
+    例如 "木纹自然" -> 木纹、纹自、自然。
+
+    Args:
+        text: 原始文本
+        n: n-gram 长度
+
+    Yields:
+        n-gram 词项
+    """
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    for segment in SEGMENT_PATTERN.findall(text):
+        if len(segment) <= n:
+            yield segment
+            continue
+        for i in range(len(segment) - n + 1):
+            yield segment[i:i + n]
+
+
+class BM25Index:
+    """字符 n-gram 倒排索引，使用 BM25 打分
+
+    构建时将每个词项在每篇文档上的 BM25 权重预先算好，存成 词项 × 文档 的
+    CSR 稀疏矩阵；查询只需取出查询词项对应的行并按查询词频加权求和，
+    打分与排序全部是稀疏/向量化运算。
+    """
+
+    def __init__(
+        self,
+        documents: Sequence[str],
+        n: int = 2,
+        k1: float = 1.5,
+        b: float = 0.75
+    ):
+        """构建索引
+
+        Args:
+            documents: 文档文本列表，文档编号即列表下标
+            n: n-gram 长度
+            k1: BM25 词频饱和参数
+            b: BM25 文档长度归一化参数
+        """
+        self.n = n
+        self.num_documents = len(documents)
+        vocabulary: Dict[str, int] = {}
+
+        rows: List[int] = []
+        cols: List[int] = []
+        counts: List[int] = []
+        doc_lengths = np.zeros(self.num_documents, dtype=np.float32)
+
+        for doc_id, text in enumerate(documents):
+            term_counts = Counter(char_ngrams(text, n))
+            doc_lengths[doc_id] = sum(term_counts.values())
+            for term, count in term_counts.items():
+                rows.append(vocabulary.setdefault(term, len(vocabulary)))
+                cols.append(doc_id)
+                counts.append(count)
+
+        self.vocabulary: Mapping[str, int] = vocabulary
+        shape = (len(vocabulary), self.num_documents)
+        tf = sparse.csr_matrix(
+            (np.asarray(counts, dtype=np.float32), (rows, cols)),
+            shape=shape
+        )
+
+        if tf.nnz:
+            # idf = ln(1 + (N - df + 0.5) / (df + 0.5))，恒为正
+            df = np.diff(tf.indptr).astype(np.float32)
+            idf = np.log1p((self.num_documents - df + 0.5) / (df + 0.5))
+
+            avg_length = max(float(doc_lengths.mean()), 1.0)
+            norm = k1 * (1 - b + b * doc_lengths / avg_length)
+            # 逐非零元素计算 BM25 权重：idf * tf * (k1 + 1) / (tf + norm)
+            term_ids = np.repeat(np.arange(shape[0]), np.diff(tf.indptr))
+            tf.data = (
+                idf[term_ids] * tf.data * (k1 + 1)
+                / (tf.data + norm[tf.indices])
+            ).astype(np.float32)
+
+        self.weights = tf
+
+    @classmethod
+    def from_arrays(
+        cls,
+        vocabulary: Union[Sequence[str], Mapping[str, int]],
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        data: np.ndarray,
+        num_documents: int,
+        n: int = 2
+    ) -> "BM25Index":
+        """由预先计算好的权重矩阵恢复索引（如编译快照中的内存映射数组）
+
+        Args:
+            vocabulary: 词项列表（下标即权重矩阵的行号），或词项 -> 行号的只读映射（直接引用）
+            indptr: CSR 行指针
+            indices: CSR 列下标（文档编号）
+            data: BM25 权重
+            num_documents: 文档数
+            n: n-gram 长度
+
+        Returns:
+            检索索引，权重矩阵直接引用传入的数组，不复制
+        """
+        index = cls.__new__(cls)
+        index.n = n
+        index.num_documents = num_documents
+        index.vocabulary = (
+            vocabulary if isinstance(vocabulary, Mapping)
+            else {term: i for i, term in enumerate(vocabulary)}
+        )
+        index.weights = sparse.csr_matrix(
+            (data, indices, indptr),
+            shape=(len(vocabulary), num_documents),
+            copy=False
+        )
+        return index
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[int, float]]:
+        """检索与查询最相关的文档
+
+        Args:
+            query: 查询文本
+            top_k: 返回的最大结果数
+
+        Returns:
+            [(文档编号, 分数)]，按分数从高到低排序，只包含分数大于 0 的文档
+        """
+        query_counts = Counter(
+            self.vocabulary[term]
+            for term in char_ngrams(query, self.n)
+            if term in self.vocabulary
+        )
+        if not query_counts or top_k <= 0:
+            return []
+
+        term_ids = np.fromiter(query_counts.keys(), dtype=np.int64)
+        query_weights = np.fromiter(query_counts.values(), dtype=np.float32)
+        scores = self.weights[term_ids].T @ query_weights
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > top_k:
+            candidates = np.sort(
+                candidates[np.argpartition(scores[candidates], -top_k)[-top_k:]]
+            )
+        # 同分时按文档顺序排列
+        ranked = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(int(doc_id), float(scores[doc_id])) for doc_id in ranked]
@@ -0,0 +1,374 @@
+"""嵌入式向量索引（NumPy 内存映射）
+
+知识条目的归一化嵌入向量保存在 vectors.npy（float16 或 float32），
+启动时以 mmap 方式打开，多个 worker 进程共享同一份只读页面；
+id、所属集合、文档与元数据保存在 table.json。
+
+目录结构::
+
+    CURRENT                当前版本目录名
+    <version>/
+        vectors.npy        归一化嵌入向量 (N x D，float32 或 float16)
+        table.json         格式版本、模型名与每行的 id / collection / document / metadata
+        ivf_centroids.npy  IVF 粗量化中心 (nlist x D)，可选
+        ivf_offsets.npy    各聚类在 vectors.npy 中的起始行 (nlist + 1)，可选
+
+每次构建写入新的版本目录，全部文件写完后原子替换 CURRENT，正在内存映射
+旧文件的进程不受影响，新打开的进程也不会读到新旧混合的文件；只保留最近
+KEEP_VERSIONS 个版本。没有 CURRENT 时按旧版的平铺目录读取。
+
+启用 IVF 时向量按聚类排序写入，每个聚类是一段连续的行，检索时只读取
+nprobe 个最近聚类对应的几段内存。
+"""
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+from app.services.embeddings import load_embedding_model
+from app.services.semantic_search import EmbeddingFunction, SemanticHit, SemanticSearchService
+
+FORMAT_VERSION = 1
+VECTORS_FILE = "vectors.npy"
+TABLE_FILE = "table.json"
+CENTROIDS_FILE = "ivf_centroids.npy"
+OFFSETS_FILE = "ivf_offsets.npy"
+CURRENT_FILE = "CURRENT"
+# 保留的版本目录数（当前版本与上一版本，上一版本可能仍被运行中的进程映射）
+KEEP_VERSIONS = 2
+
+# 精确检索每批处理的行数，限制 float16 转 float32 的临时内存
+SEARCH_CHUNK_ROWS = 65536
+
+
+def normalize_rows(matrix) -> np.ndarray:
+    """按行做 L2 归一化（零向量保持为零）"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def kmeans(
+    vectors: np.ndarray,
+    nlist: int,
+    iterations: int = 20,
+    sample_size: int = 65536,
+    seed: int = 0
+) -> np.ndarray:
+    """球面 k-means，得到 IVF 粗量化中心
+
+    Args:
+        vectors: 归一化向量
+        nlist: 聚类数
+        iterations: 迭代次数
+        sample_size: 训练采样条数
+        seed: 随机种子
+
+    Returns:
+        归一化的聚类中心 (nlist x D)
+    """
+    rng = np.random.default_rng(seed)
+    if len(vectors) > sample_size:
+        vectors = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    vectors = np.asarray(vectors, dtype=np.float32)
+    nlist = min(nlist, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        counts = np.bincount(assignment, minlength=nlist)
+        # 空聚类重新随机选一个样本作为中心
+        empty = counts == 0
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+def resolve_index_directory(directory: str) -> Path:
+    """索引目录中当前版本的实际路径（没有 CURRENT 时为目录本身）"""
+    path = Path(directory)
+    try:
+        version = (path / CURRENT_FILE).read_text(encoding='utf-8').strip()
+    except FileNotFoundError:
+        return path
+    return path / version
+
+
+def _publish_version(path: Path, version: str) -> None:
+    """原子切换 CURRENT 并删除多余的旧版本目录"""
+    tmp_path = path / f"{CURRENT_FILE}.{os.getpid()}.tmp"
+    tmp_path.write_text(version, encoding='utf-8')
+    os.replace(tmp_path, path / CURRENT_FILE)
+
+    versions = sorted(
+        (p for p in path.iterdir() if p.is_dir() and p.name.startswith('v')),
+        key=lambda p: p.name
+    )
+    for old in versions[:-KEEP_VERSIONS]:
+        if old.name != version:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def top_k_rows(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """分数最高的 top_k 个下标，按分数降序"""
+    if len(scores) > top_k:
+        candidates = np.argpartition(scores, -top_k)[-top_k:]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+class VectorIndex:
+    """内存映射的向量索引
+
+    - 精确检索：所有行与查询向量做一次矩阵乘法（内积即余弦相似度）
+    - IVF 检索：先与聚类中心比较，只对 nprobe 个最近聚类内的行打分
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        table: Dict,
+        centroids: Optional[np.ndarray] = None,
+        offsets: Optional[np.ndarray] = None
+    ):
+        """
+        Args:
+            vectors: 归一化向量（通常为内存映射数组）
+            table: 侧表（table.json 内容）
+            centroids: IVF 聚类中心
+            offsets: 各聚类的起始行
+        """
+        self.vectors = vectors
+        self.ids: List[str] = table['ids']
+        self.collections: List[str] = table['collections']
+        self.documents: List[str] = table['documents']
+        self.metadatas: List[Dict] = table['metadatas']
+        self.model: str = table.get('model', '')
+        self.centroids = centroids
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dimension(self) -> int:
+        return int(self.vectors.shape[1])
+
+    @property
+    def has_ivf(self) -> bool:
+        return self.centroids is not None
+
+    @classmethod
+    def build(
+        cls,
+        directory: str,
+        ids: Sequence[str],
+        embeddings,
+        documents: Sequence[str],
+        metadatas: Sequence[Optional[Dict]],
+        collections: Sequence[str],
+        dtype: str = "float32",
+        nlist: int = 0,
+        model: str = ""
+    ) -> "VectorIndex":
+        """归一化向量并写入索引目录
+
+        Args:
+            directory: 索引目录
+            ids: 条目 ID
+            embeddings: 嵌入向量 (N x D)
+            documents: 文档文本
+            metadatas: 元数据
+            collections: 条目所属集合名
+            dtype: 向量存储类型，float32 或 float16（内存减半，打分前需逐批转换，精确检索较慢）
+            nlist: IVF 聚类数，0 表示只做精确检索
+            model: 生成向量的嵌入模型名（查询必须使用同一模型）
+
+        Returns:
+            以内存映射方式打开的新索引
+        """
+        if dtype not in ("float16", "float32"):
+            raise ValueError(f"不支持的向量类型: {dtype}")
+        vectors = normalize_rows(embeddings)
+        if not (len(vectors) == len(ids) == len(documents) == len(metadatas) == len(collections)):
+            raise ValueError("向量、ID、文档、元数据与集合名的条数不一致")
+
+        order = np.arange(len(vectors))
+        centroids = offsets = None
+        if nlist > 0 and len(vectors):
+            centroids = kmeans(vectors, nlist)
+            assignment = np.argmax(vectors @ centroids.T, axis=1)
+            order = np.argsort(assignment, kind='stable')
+            offsets = np.searchsorted(
+                assignment[order], np.arange(len(centroids) + 1)
+            ).astype(np.int64)
+
+        table = {
+            'version': FORMAT_VERSION,
+            'model': model,
+            'dtype': dtype,
+            'ids': [str(ids[i]) for i in order],
+            'collections': [collections[i] for i in order],
+            'documents': [documents[i] or '' for i in order],
+            'metadatas': [metadatas[i] or {} for i in order],
+        }
+
+        # 写入新的版本目录，不覆盖其他进程正在映射的文件
+        path = Path(directory)
+        version = f"v{time.time_ns()}"
+        version_path = path / version
+        version_path.mkdir(parents=True)
+        try:
+            np.save(version_path / VECTORS_FILE, vectors[order].astype(dtype))
+            if centroids is not None:
+                np.save(version_path / CENTROIDS_FILE, centroids)
+                np.save(version_path / OFFSETS_FILE, offsets)
+            with open(version_path / TABLE_FILE, 'w', encoding='utf-8') as f:
+                json.dump(table, f, ensure_ascii=False)
+        except BaseException:
+            shutil.rmtree(version_path, ignore_errors=True)
+            raise
+        _publish_version(path, version)
+        return cls.load(directory)
+
+    @classmethod
+    def load(cls, directory: str) -> "VectorIndex":
+        """以内存映射方式打开索引目录的当前版本
+
+        Args:
+            directory: 索引目录
+
+        Returns:
+            向量索引
+
+        Raises:
+            FileNotFoundError: 索引文件不存在
+            ValueError: 格式版本不符或文件不一致
+        """
+        path = resolve_index_directory(directory)
+        with open(path / TABLE_FILE, encoding='utf-8') as f:
+            table = json.load(f)
+        if table.get('version') != FORMAT_VERSION:
+            raise ValueError(f"向量索引格式版本不符: {table.get('version')}")
+
+        vectors = np.load(path / VECTORS_FILE, mmap_mode='r')
+        if vectors.ndim != 2 or len(vectors) != len(table['ids']):
+            raise ValueError("向量文件与侧表条数不一致")
+
+        centroids = offsets = None
+        if (path / CENTROIDS_FILE).exists():
+            centroids = np.load(path / CENTROIDS_FILE)
+            offsets = np.load(path / OFFSETS_FILE)
+        logger.info(
+            f"向量索引已加载: {len(vectors)} 条，{vectors.shape[1]} 维，{vectors.dtype}"
+            f"{f'，IVF {len(centroids)} 个聚类' if centroids is not None else ''}"
+        )
+        return cls(vectors, table, centroids, offsets)
+
+    def search(
+        self,
+        queries,
+        top_k: int = 5,
+        nprobe: int = 0
+    ) -> List[List[Tuple[int, float]]]:
+        """检索与查询向量最相似的条目
+
+        Args:
+            queries: 查询向量 (Q x D) 或单个向量，无需预先归一化
+            top_k: 每个查询返回的条数
+            nprobe: 检索的聚类数，0 或未构建 IVF 时做精确检索
+
+        Returns:
+            与查询一一对应的 [(行号, 余弦相似度)]，按相似度降序
+        """
+        queries = normalize_rows(queries)
+        if not len(self) or top_k <= 0:
+            return [[] for _ in queries]
+        if nprobe > 0 and self.has_ivf:
+            return [self._search_ivf(query, top_k, nprobe) for query in queries]
+        return self._search_exact(queries, top_k)
+
+    def _search_exact(self, queries: np.ndarray, top_k: int) -> List[List[Tuple[int, float]]]:
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        for start in range(0, len(self), SEARCH_CHUNK_ROWS):
+            chunk = np.asarray(self.vectors[start:start + SEARCH_CHUNK_ROWS], dtype=np.float32)
+            scores = np.concatenate([best_scores, queries @ chunk.T], axis=1)
+            rows = np.concatenate([
+                best_rows,
+                np.broadcast_to(np.arange(start, start + len(chunk)), (len(queries), len(chunk)))
+            ], axis=1)
+            keep = np.stack([top_k_rows(row_scores, top_k) for row_scores in scores])
+            best_scores = np.take_along_axis(scores, keep, axis=1)
+            best_rows = np.take_along_axis(rows, keep, axis=1)
+        return [
+            [(int(row), float(score)) for row, score in zip(rows, scores)]
+            for rows, scores in zip(best_rows, best_scores)
+        ]
+
+    def _search_ivf(self, query: np.ndarray, top_k: int, nprobe: int) -> List[Tuple[int, float]]:
+        lists = top_k_rows(self.centroids @ query, nprobe)
+        rows = np.concatenate([
+            np.arange(self.offsets[i], self.offsets[i + 1]) for i in lists
+        ])
+        if not len(rows):
+            return []
+        scores = np.concatenate([
+            np.asarray(self.vectors[self.offsets[i]:self.offsets[i + 1]], dtype=np.float32) @ query
+            for i in lists
+        ])
+        best = top_k_rows(scores, top_k)
+        return [(int(rows[i]), float(scores[i])) for i in best]
+
+    def hit(self, row: int, similarity: float) -> SemanticHit:
+        """将行号转换为检索结果"""
+        return SemanticHit(
+            self.ids[row], self.collections[row], self.documents[row],
+            self.metadatas[row], similarity
+        )
+
+
+class VectorIndexSearchService(SemanticSearchService):
+    """基于内存映射向量索引的语义检索，不需要在 worker 中安装或导入 ChromaDB
+
+    嵌入模型直接由 onnxruntime / sentence-transformers 加载（见 embeddings.py），
+    查询向量缓存、批量推理与延迟预算与 SemanticSearchService 相同。
+    """
+
+    def __init__(self, index_directory: str, nprobe: int = 0, **kwargs):
+        """
+        Args:
+            index_directory: 向量索引目录（python build_vector_index.py 生成）
+            nprobe: IVF 检索的聚类数，0 表示精确检索
+            **kwargs: 见 SemanticSearchService（嵌入模型、缓存与延迟预算）
+        """
+        super().__init__(index_directory, [], **kwargs)
+        self.nprobe = nprobe
+        self.index: Optional[VectorIndex] = None
+
+    def _create_embedding_function(self) -> EmbeddingFunction:
+        return load_embedding_model(self.embedding_model)
+
+    def _open(self) -> bool:
+        self.index = VectorIndex.load(self.persist_directory)
+        if self.index.model != self.embedding_model:
+            logger.warning(
+                f"向量索引的嵌入模型 '{self.index.model}' 与配置 '{self.embedding_model}' 不一致"
+            )
+        return len(self.index) > 0
+
+    def _query(self, embeddings: List[List[float]], top_k: int) -> List[List[SemanticHit]]:
+        return [
+            [self.index.hit(row, score) for row, score in results]
+            for results in self.index.search(embeddings, top_k, self.nprobe)
+        ]
@@ -0,0 +1,16 @@
+"""基准测试统计工具"""
+from typing import Sequence
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """百分位数（最近秩法）
+
+    Args:
+        values: 样本（无需排序）
+        pct: 百分位 (0-100)
+
+    Returns:
+        不小于 pct% 样本的最小值
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
@@ -0,0 +1,102 @@
+"""图片压缩基准测试
+
+对比旧的压缩流程（全尺寸解码 + LANCZOS thumbnail + 固定质量）与当前
+ImageService.compress_image（JPEG draft 低分辨率解码 + 目标字节数质量搜索）
+的 CPU 耗时和输出大小。
+
+用法:
+    python benchmark_image.py photo1.jpg photo2.jpg
+    python benchmark_image.py --max-size 1024 --target-kb 150 --format WEBP
+    python benchmark_image.py            # 无参数时使用生成的 4000x3000 测试图
+"""
+import argparse
+import io
+import statistics
+import time
+
+from PIL import Image
+
+from app.services.image_service import ImageService
+
+
+def legacy_compress(image_data: bytes, quality: int, max_size) -> bytes:
+    """旧实现：全尺寸解码，thumbnail 缩放，固定质量保存"""
+    img = Image.open(io.BytesIO(image_data))
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    if max_size:
+        img.thumbnail(max_size, Image.Resampling.LANCZOS)
+    output = io.BytesIO()
+    img.save(output, format='JPEG', quality=quality, optimize=True)
+    return output.getvalue()
+
+
+def synthetic_photo(width: int = 4000, height: int = 3000) -> bytes:
+    """生成带渐变与噪声的手机照片尺寸 JPEG"""
+    gradient = Image.linear_gradient('L').resize((width, height))
+    noise = Image.effect_noise((width, height), 40)
+    img = Image.merge('RGB', (gradient, noise, gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+    output = io.BytesIO()
+    img.save(output, format='JPEG', quality=95)
+    return output.getvalue()
+
+
+def measure(func, repeat: int):
+    """返回 (CPU 耗时中位数毫秒, 输出数据)"""
+    timings = []
+    result = b""
+    for _ in range(repeat):
+        start = time.process_time()
+        result = func()
+        timings.append((time.process_time() - start) * 1000)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="图片压缩基准测试")
+    parser.add_argument("images", nargs="*", help="测试图片路径")
+    parser.add_argument("--max-size", type=int, default=1024, help="最大边长")
+    parser.add_argument("--quality", type=int, default=85, help="压缩质量")
+    parser.add_argument("--target-kb", type=int, default=0, help="目标大小 (KB)，0 表示不限制")
+    parser.add_argument("--format", default="JPEG", choices=["JPEG", "WEBP"], help="输出格式")
+    parser.add_argument("--repeat", type=int, default=5, help="每张图片重复次数")
+    args = parser.parse_args()
+
+    if args.images:
+        samples = []
+        for path in args.images:
+            with open(path, 'rb') as f:
+                samples.append((path, f.read()))
+    else:
+        samples = [("synthetic 4000x3000", synthetic_photo())]
+
+    image_service = ImageService()
+    max_size = (args.max_size, args.max_size)
+    target_bytes = args.target_kb * 1024
+
+    print("=" * 72)
+    print(f"{'image':<28}{'path':<10}{'cpu ms':>10}{'output KB':>12}")
+    print("=" * 72)
+    for name, data in samples:
+        legacy_ms, legacy_out = measure(
+            lambda: legacy_compress(data, args.quality, max_size), args.repeat
+        )
+        current_ms, current_out = measure(
+            lambda: image_service.compress_image(
+                data,
+                quality=args.quality,
+                max_size=max_size,
+                target_bytes=target_bytes,
+                image_format=args.format
+            ),
+            args.repeat
+        )
+        label = name[-26:]
+        print(f"{label:<28}{'legacy':<10}{legacy_ms:>10.1f}{len(legacy_out) / 1024:>12.1f}")
+        print(f"{'':<28}{'current':<10}{current_ms:>10.1f}{len(current_out) / 1024:>12.1f}")
+        print(f"{'':<28}{'speedup':<10}{legacy_ms / max(current_ms, 1e-6):>10.2f}x")
+        print("-" * 72)
+
+
+if __name__ == "__main__":
+    main()
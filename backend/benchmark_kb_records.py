@@ -0,0 +1,153 @@
+"""知识库记录内存与构建开销基准测试
+
+对比两种知识库材料的内存表示：
+
+- 旧: json.load 得到的嵌套 dict
+- 新: MaterialRecord（NamedTuple，驻留字符串，预构建的 RiskAssessment）
+
+以及每次检测请求构建风险评估的耗时：旧流程从 dict 复制字段并重新做
+Pydantic 校验，新流程直接复用加载时构建好的实例。
+
+用法:
+    python benchmark_kb_records.py
+    python benchmark_kb_records.py --size 100000 --requests 20000
+"""
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+from typing import Dict, List
+
+from loguru import logger
+
+from app.models.schemas import RiskAssessment, RiskLevel
+from app.services.kb_records import DEFAULT_RISK_ASSESSMENT, MaterialRecord
+
+MATERIAL_TYPES = ["实木类", "人造板类", "皮革类", "布类"]
+RISK_LEVELS = ["低风险", "中风险", "高风险"]
+SUBSTANCES = ["甲醛", "苯", "甲苯", "二甲苯", "TVOC", "脲醛树脂", "铬", "偶氮染料"]
+GROUPS = ["婴幼儿", "孕妇", "老人", "呼吸道敏感人群", "过敏体质人群"]
+IMPACTS = ["刺激呼吸道", "引起皮肤过敏", "长期接触可能致癌", "影响神经系统"]
+RECOMMENDATIONS = ["定期通风", "查看环保检测报告", "避免用于儿童房", "选择 E0 级板材", "使用空气净化器"]
+
+
+def synthetic_json(count: int) -> str:
+    """生成与 knowledge_base.json 结构一致的合成数据"""
+    rng = random.Random(0)
+    materials = [
+        {
+            "id": f"material_{i}",
+            "material_type": MATERIAL_TYPES[i % len(MATERIAL_TYPES)],
+            "sub_type": f"子类型{i}",
+            "aliases": [f"别名{i}", f"别称{i}"],
+            "description": f"合成材料 {i}，用于基准测试的描述文本",
+            "visual_cues": {"texture": "自然木纹，纹理整齐", "color": "木材原色", "pattern": "表面纹理整体感好"},
+            "risk_assessment": {
+                "risk_level": RISK_LEVELS[i % len(RISK_LEVELS)],
+                "risk_score": rng.randrange(100),
+                "harmful_substances": rng.sample(SUBSTANCES, 2),
+                "sensitive_groups": rng.sample(GROUPS, 2),
+                "health_impacts": rng.sample(IMPACTS, 1),
+                "recommendations": rng.sample(RECOMMENDATIONS, 3),
+            },
+        }
+        for i in range(count)
+    ]
+    return json.dumps({"materials": materials}, ensure_ascii=False)
+
+
+def measure_memory(build) -> int:
+    """返回 build() 结果常驻的内存字节数（中间对象释放后）"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def legacy_risk_assessment(risk_data: Dict) -> RiskAssessment:
+    """旧流程：每次请求从 dict 复制字段并校验"""
+    return RiskAssessment(
+        risk_level=RiskLevel(risk_data['risk_level']),
+        risk_score=risk_data['risk_score'],
+        harmful_substances=risk_data.get('harmful_substances', []),
+        sensitive_groups=risk_data.get('sensitive_groups', []),
+        health_impacts=risk_data.get('health_impacts', []),
+        recommendations=risk_data.get('recommendations', [])
+    )
+
+
+def legacy_default() -> RiskAssessment:
+    return legacy_risk_assessment({
+        'risk_level': '中风险',
+        'risk_score': 50,
+        'harmful_substances': ['未知'],
+        'sensitive_groups': ['婴幼儿', '孕妇', '呼吸道敏感人群'],
+        'health_impacts': ['建议咨询专业人士'],
+        'recommendations': ['定期通风', '保持室内空气流通']
+    })
+
+
+def per_call_us(func, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="知识库记录内存与构建开销基准测试")
+    parser.add_argument("--size", type=int, default=100000, help="知识库规模（材料条数）")
+    parser.add_argument("--requests", type=int, default=20000, help="模拟请求次数")
+    args = parser.parse_args()
+
+    logger.remove()
+    text = synthetic_json(args.size)
+
+    dict_bytes = measure_memory(lambda: json.loads(text)["materials"])
+
+    def build_records() -> List[MaterialRecord]:
+        return [MaterialRecord.from_dict(m) for m in json.loads(text)["materials"]]
+
+    record_bytes = measure_memory(build_records)
+
+    start = time.perf_counter()
+    materials = json.loads(text)["materials"]
+    load_dict_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    records = [MaterialRecord.from_dict(m) for m in materials]
+    build_records_ms = (time.perf_counter() - start) * 1000
+
+    rng = random.Random(1)
+    picks = [rng.randrange(args.size) for _ in range(args.requests)]
+    dict_iter = iter(picks * 2)
+    record_iter = iter(picks * 2)
+
+    legacy_us = per_call_us(
+        lambda: legacy_risk_assessment(materials[next(dict_iter)]['risk_assessment']),
+        args.requests
+    )
+    prebuilt_us = per_call_us(lambda: records[next(record_iter)].risk_assessment, args.requests)
+    legacy_default_us = per_call_us(legacy_default, args.requests)
+    prebuilt_default_us = per_call_us(lambda: DEFAULT_RISK_ASSESSMENT, args.requests)
+
+    print("=" * 64)
+    print(f"materials: {args.size}")
+    print(f"{'representation':<28}{'bytes/entry':>14}{'total MB':>12}")
+    print(f"{'nested dict (json)':<28}{dict_bytes / args.size:>14.0f}{dict_bytes / 2**20:>12.1f}")
+    print(f"{'MaterialRecord':<28}{record_bytes / args.size:>14.0f}{record_bytes / 2**20:>12.1f}")
+    print(f"json.loads: {load_dict_ms:.0f} ms, build records (+validation): {build_records_ms:.0f} ms")
+    print("-" * 64)
+    print(f"{'per-request risk assessment':<28}{'legacy us':>12}{'prebuilt us':>12}")
+    print(f"{'matched material':<28}{legacy_us:>12.2f}{prebuilt_us:>12.2f}")
+    print(f"{'default fallback':<28}{legacy_default_us:>12.2f}{prebuilt_default_us:>12.2f}")
+    print("=" * 64)
+
+
+if __name__ == "__main__":
+    main()
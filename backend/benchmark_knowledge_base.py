@@ -0,0 +1,135 @@
+"""知识库查询基准测试
+
+对比旧的线性扫描查询与当前 KnowledgeBaseService 哈希索引查询
+（search_by_sub_type / get_risk_assessment / query_by_material_type）
+在不同规模知识库上的单次查询耗时，以及加载时构建索引的开销。
+
+用法:
+    python benchmark_knowledge_base.py
+    python benchmark_knowledge_base.py --sizes 100 1000 100000 --queries 2000
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from loguru import logger
+
+from app.services.knowledge_base import KnowledgeBaseService
+
+MATERIAL_TYPES = ["实木类", "人造板类", "皮革类", "布类"]
+
+
+def synthetic_materials(count: int) -> List[Dict]:
+    """生成指定数量的合成材料数据"""
+    return [
+        {
+            "id": f"material_{i}",
+            "material_type": MATERIAL_TYPES[i % len(MATERIAL_TYPES)],
+            "sub_type": f"子类型{i}",
+            "description": f"合成材料 {i}",
+            "visual_cues": {"texture": "纹理", "color": "颜色", "pattern": "图案"},
+            "risk_assessment": {
+                "risk_level": "低风险",
+                "risk_score": i % 100,
+                "harmful_substances": [],
+                "sensitive_groups": [],
+                "health_impacts": [],
+                "recommendations": [],
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_search_by_sub_type(materials: List[Dict], sub_type: str):
+    for material in materials:
+        if material.get('sub_type') == sub_type:
+            return material
+    return None
+
+
+def legacy_get_risk_assessment(materials: List[Dict], material_id: str):
+    for material in materials:
+        if material.get('id') == material_id:
+            return material.get('risk_assessment')
+    return None
+
+
+def legacy_query_by_material_type(materials: List[Dict], material_type: str):
+    return [m for m in materials if m.get('material_type') == material_type]
+
+
+def per_call_us(func, args_list) -> float:
+    """返回平均单次调用耗时（微秒）"""
+    start = time.perf_counter()
+    for args in args_list:
+        func(*args)
+    return (time.perf_counter() - start) / len(args_list) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="知识库查询基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000],
+                        help="知识库规模（材料条数）")
+    parser.add_argument("--queries", type=int, default=1000, help="每项查询次数")
+    args = parser.parse_args()
+
+    # 旧实现没有日志，去掉日志输出以免 debug 日志的格式化开销计入索引查询
+    logger.remove()
+
+    rng = random.Random(0)
+    print("=" * 84)
+    print(f"{'size':>8}{'load ms':>10}  {'query':<22}{'linear us':>12}{'indexed us':>12}{'speedup':>10}")
+    print("=" * 84)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in args.sizes:
+            materials = synthetic_materials(size)
+            path = Path(tmp_dir) / f"kb_{size}.json"
+            path.write_text(json.dumps({"materials": materials}, ensure_ascii=False), encoding="utf-8")
+
+            start = time.perf_counter()
+            service = KnowledgeBaseService(str(path))
+            load_ms = (time.perf_counter() - start) * 1000
+
+            # 线性扫描开销与命中位置有关，随机取样覆盖整个列表
+            indexes = [rng.randrange(size) for _ in range(args.queries)]
+            # 按材料类型查询每次返回 size/4 条，次数过多时旧实现耗时太久
+            type_queries = [(MATERIAL_TYPES[i % 4],) for i in range(min(args.queries, 50))]
+
+            cases = [
+                (
+                    "search_by_sub_type",
+                    lambda s: legacy_search_by_sub_type(materials, s),
+                    service.search_by_sub_type,
+                    [(f"子类型{i}",) for i in indexes],
+                ),
+                (
+                    "get_risk_assessment",
+                    lambda m: legacy_get_risk_assessment(materials, m),
+                    service.get_risk_assessment,
+                    [(f"material_{i}",) for i in indexes],
+                ),
+                (
+                    "query_by_material_type",
+                    lambda t: legacy_query_by_material_type(materials, t),
+                    service.query_by_material_type,
+                    type_queries,
+                ),
+            ]
+
+            for i, (name, legacy, indexed, queries) in enumerate(cases):
+                linear_us = per_call_us(legacy, queries)
+                indexed_us = per_call_us(indexed, queries)
+                prefix = f"{size:>8}{load_ms:>10.1f}" if i == 0 else " " * 18
+                print(f"{prefix}  {name:<22}{linear_us:>12.2f}{indexed_us:>12.2f}"
+                      f"{linear_us / indexed_us:>9.1f}x")
+    print("=" * 84)
+
+
+if __name__ == "__main__":
+    main()
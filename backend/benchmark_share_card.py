@@ -0,0 +1,98 @@
+"""分享卡片渲染基准测试
+
+对比旧实现（每次请求加载字体、从零绘制整张画布）与 CardRenderer
+（预渲染静态图层 + 缓存字体）的渲染吞吐量。
+
+用法:
+    python benchmark_share_card.py
+    python benchmark_share_card.py -n 200 --style classic
+"""
+import argparse
+import io
+import time
+
+from PIL import Image, ImageDraw, ImageFont
+
+from app.services.card_renderer import CardRenderer
+from app.services.image_service import ImageService
+
+SAMPLE_REPORT = {
+    "materials": [
+        {"material_type": "人造板类", "sub_type": "密度板", "confidence": 85}
+    ],
+    "risk_assessment": {
+        "risk_level": "中风险",
+        "recommendations": ["选择E0级以上板材", "确保六面封边良好", "避免用于儿童房"]
+    }
+}
+SAMPLE_CATCHPHRASE = "密度板虽平整，甲醛要当心"
+
+
+def legacy_render(report: dict, catchphrase: str, template_style: str) -> bytes:
+    """旧实现：每次加载字体并绘制整张画布"""
+    width, height = 750, 1334
+    bg_colors = {'modern': '#F5F7FA', 'classic': '#FFF8E1', 'minimal': '#FFFFFF'}
+    img = Image.new('RGB', (width, height), bg_colors.get(template_style, '#F5F7FA'))
+    draw = ImageDraw.Draw(img)
+    try:
+        title_font = ImageFont.truetype("arial.ttf", 48)
+        text_font = ImageFont.truetype("arial.ttf", 32)
+        small_font = ImageFont.truetype("arial.ttf", 24)
+    except OSError:
+        title_font = ImageFont.load_default()
+        text_font = ImageFont.load_default()
+        small_font = ImageFont.load_default()
+
+    draw.text((width // 2, 100), "家具健康检测报告", fill='#333333', font=title_font, anchor='mm')
+    draw.text((width // 2, 200), catchphrase, fill='#FF6B6B', font=text_font, anchor='mm')
+    material = report['materials'][0]
+    draw.text((100, 300), f"材料类型: {material['material_type']}", fill='#666666', font=text_font)
+    draw.text((100, 360), f"子类型: {material['sub_type']}", fill='#666666', font=text_font)
+    draw.text((100, 420), f"置信度: {material['confidence']}%", fill='#666666', font=text_font)
+    risk = report['risk_assessment']
+    draw.text((100, 550), f"风险等级: {risk['risk_level']}", fill='#FF6B6B', font=text_font)
+    draw.text((100, 650), "健康建议:", fill='#333333', font=text_font)
+    for i, rec in enumerate(risk['recommendations'][:3]):
+        draw.text((100, 710 + i * 50), f"• {rec}", fill='#666666', font=small_font)
+    draw.text((width // 2, height - 100), "扫码查看完整报告", fill='#999999', font=small_font, anchor='mm')
+
+    output = io.BytesIO()
+    img.save(output, format='JPEG', quality=90)
+    return output.getvalue()
+
+
+def throughput(func, count: int) -> float:
+    """返回每秒渲染的卡片数"""
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分享卡片渲染基准测试")
+    parser.add_argument("-n", "--count", type=int, default=100, help="渲染次数")
+    parser.add_argument("--style", default="modern", choices=["modern", "classic", "minimal"])
+    args = parser.parse_args()
+
+    renderer = CardRenderer()
+    qr_code = ImageService().generate_qr_code("/pages/report/report?id=benchmark")
+
+    legacy = throughput(
+        lambda: legacy_render(SAMPLE_REPORT, SAMPLE_CATCHPHRASE, args.style), args.count
+    )
+    current = throughput(
+        lambda: renderer.render(SAMPLE_REPORT, SAMPLE_CATCHPHRASE, args.style, qr_code=qr_code),
+        args.count
+    )
+
+    print("=" * 60)
+    print(f"Share card throughput ({args.count} cards, style={args.style})")
+    print("=" * 60)
+    print(f"  legacy:   {legacy:8.1f} cards/s")
+    print(f"  template: {current:8.1f} cards/s (with QR composite)")
+    print(f"  speedup:  {current / legacy:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""材料子类型解析基准测试
+
+用一组模拟 Qwen-VL 输出的子类型（带期望的知识库子类型）统计：
+
+- 旧逻辑（search_by_sub_type 精确匹配）与 SubTypeResolver 的回退率
+  （未匹配、只能使用默认"中风险"的比例）与准确率
+- 单次解析延迟 (p50/p99)，包括在合成的大规模知识库上的延迟
+
+用法:
+    python benchmark_sub_type_resolver.py
+    python benchmark_sub_type_resolver.py --synthetic-size 100000
+"""
+import argparse
+import random
+import sys
+import time
+from typing import List, Optional, Tuple
+
+from loguru import logger
+
+from app.models.schemas import RiskLevel
+from app.services.kb_records import MaterialRecord
+from app.services.knowledge_base import KnowledgeBaseService
+from app.services.sub_type_resolver import SubTypeResolver
+from app.utils.stats import percentile
+
+# (模型输出, 期望的知识库子类型，None 表示不应匹配)
+LABELLED_OUTPUTS: List[Tuple[str, Optional[str]]] = [
+    ("实木拼板", "实木拼板"),
+    ("实木", "实木拼板"),
+    ("橡木实木", "实木拼板"),
+    ("胡桃木实木", "实木拼板"),
+    ("实木 (松木)", "实木拼板"),
+    ("指接板", "实木拼板"),
+    ("实木拼接板", "实木拼板"),
+    ("密度板", "密度板"),
+    ("中密度纤维板", "密度板"),
+    ("MDF", "密度板"),
+    ("ＭＤＦ板", "密度板"),
+    ("高密度板", "密度板"),
+    ("密度版", "密度板"),
+    ("中纤板（贴三聚氰胺）", "密度板"),
+    ("刨花板", "刨花板"),
+    ("颗粒板", "刨花板"),
+    ("实木颗粒板", "刨花板"),
+    ("欧松板 OSB", "刨花板"),
+    ("刨花", "刨花板"),
+    ("真皮", "真皮"),
+    ("牛皮", "真皮"),
+    ("头层牛皮", "真皮"),
+    ("真皮（头层）", "真皮"),
+    ("意大利进口皮革", "真皮"),
+    ("布艺面料", "布艺面料"),
+    ("布艺", "布艺面料"),
+    ("棉麻布料", "布艺面料"),
+    ("科技布", "布艺面料"),
+    ("布艺沙发面料", "布艺面料"),
+    ("绒布面料", "布艺面料"),
+    ("PU皮革", None),
+    ("仿实木", None),
+    # 人造板/复合工艺不能借"实木"子串解析为低风险的实木拼板
+    ("实木复合板", None),
+    ("实木复合地板", None),
+    ("多层实木板", None),
+    ("实木贴皮", None),
+    ("超纤皮", None),
+    ("大理石", None),
+    ("玻璃", None),
+    ("不锈钢", None),
+]
+
+
+def latency_us(resolve, queries: List[str], repeat: int) -> List[float]:
+    """每次解析耗时（微秒）"""
+    timings = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            resolve(query)
+            timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+def synthetic_materials(count: int) -> List[MaterialRecord]:
+    """生成合成材料（随机汉字子类型与别名）"""
+    rng = random.Random(0)
+
+    def word(length: int) -> str:
+        return "".join(chr(0x4E00 + rng.randrange(3000)) for _ in range(length))
+
+    return [
+        MaterialRecord.from_dict(
+            {"id": f"material_{i}", "sub_type": word(3), "aliases": [word(2), word(4)]}
+        )
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="材料子类型解析基准测试")
+    parser.add_argument("--repeat", type=int, default=200, help="每条输出重复解析次数")
+    parser.add_argument("--synthetic-size", type=int, default=100000, help="合成知识库规模")
+    args = parser.parse_args()
+
+    logger.remove()
+    service = KnowledgeBaseService()
+    resolver = service.snapshot.sub_type_resolver
+
+    legacy_fallback = resolver_fallback = legacy_correct = resolver_correct = 0
+    unsafe = []  # 不应匹配却解析为低风险材料的输出
+    print("=" * 72)
+    print(f"{'model output':<22}{'expected':<10}{'exact':<10}{'resolved':<10}{'method':<11}{'conf':>6}")
+    print("-" * 72)
+    for output, expected in LABELLED_OUTPUTS:
+        exact = service.search_by_sub_type(output)
+        match = resolver.resolve(output)
+        exact_sub_type = exact.sub_type if exact else None
+        resolved = match.sub_type if match else None
+
+        legacy_fallback += exact is None
+        resolver_fallback += match is None
+        legacy_correct += exact_sub_type == expected
+        resolver_correct += resolved == expected
+        if expected is None and match and match.material.risk_assessment.risk_level == RiskLevel.LOW:
+            unsafe.append(output)
+
+        print(f"{output:<22}{str(expected):<10}{str(exact_sub_type):<10}{str(resolved):<10}"
+              f"{match.method if match else '-':<11}{match.confidence if match else 0:>6.2f}")
+
+    total = len(LABELLED_OUTPUTS)
+    print("-" * 72)
+    print(f"{'':<22}{'fallback':>12}{'accuracy':>12}")
+    print(f"{'exact (legacy)':<22}{legacy_fallback / total:>12.1%}{legacy_correct / total:>12.1%}")
+    print(f"{'SubTypeResolver':<22}{resolver_fallback / total:>12.1%}{resolver_correct / total:>12.1%}")
+
+    queries = [output for output, _ in LABELLED_OUTPUTS]
+    print("-" * 72)
+    print(f"{'latency':<34}{'p50 us':>12}{'p99 us':>12}")
+    timings = latency_us(resolver.resolve, queries, args.repeat)
+    print(f"{f'resolver ({len(service.materials)} materials)':<34}"
+          f"{percentile(timings, 50):>12.1f}{percentile(timings, 99):>12.1f}")
+
+    if args.synthetic_size:
+        materials = synthetic_materials(args.synthetic_size)
+        start = time.perf_counter()
+        large_resolver = SubTypeResolver(materials)
+        build_ms = (time.perf_counter() - start) * 1000
+        # 一半为已知别名加噪声，一半为随机文本
+        rng = random.Random(1)
+        large_queries = [
+            rng.choice(materials).aliases[1] + "板" if i % 2 else queries[i % len(queries)]
+            for i in range(len(queries))
+        ]
+        timings = latency_us(large_resolver.resolve, large_queries, max(1, args.repeat // 10))
+        print(f"{f'resolver ({args.synthetic_size} synthetic)':<34}"
+              f"{percentile(timings, 50):>12.1f}{percentile(timings, 99):>12.1f}")
+        print(f"synthetic resolver build: {build_ms:.0f} ms")
+    print("=" * 72)
+
+    if unsafe:
+        print(f"✗ 以下输出被解析为低风险材料: {', '.join(unsafe)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
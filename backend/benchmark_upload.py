@@ -0,0 +1,82 @@
+"""OSS 上传延迟基准测试
+
+对比上传路径在"每次上传都检查生命周期规则"（旧实现）与"启动时校验一次"
+（当前实现）两种模式下的延迟，并统计内容去重节省的 PUT 次数和存储字节。
+需要在 .env 中配置真实的 OSS 凭证。
+
+用法:
+    python benchmark_upload.py                # 当前实现
+    python benchmark_upload.py --legacy       # 模拟旧实现的逐次生命周期检查
+    python benchmark_upload.py -n 50 --size-kb 200
+    python benchmark_upload.py --duplicate-ratio 0.3   # 30% 的上传为重试/重复图片
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+
+from app.services.image_service import ImageService
+from app.utils.stats import percentile
+
+
+async def run_benchmark(
+    count: int,
+    size_kb: int,
+    legacy: bool,
+    duplicate_ratio: float
+) -> list:
+    """执行上传并记录每次耗时（毫秒）"""
+    image_service = ImageService()
+    image_service.ensure_lifecycle_rule()
+
+    latencies = []
+    sent = []
+    for i in range(count):
+        if sent and random.random() < duplicate_ratio:
+            # 模拟客户端重试或重复上传同一张图片
+            payload = random.choice(sent)
+        else:
+            payload = os.urandom(size_kb * 1024)
+            sent.append(payload)
+        start = time.perf_counter()
+        await image_service.upload_to_oss(payload, f"benchmark_{i}.bin")
+        if legacy:
+            # 旧实现在每次上传成功后都会读取一次生命周期配置
+            image_service.bucket.get_bucket_lifecycle()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OSS 上传延迟基准测试")
+    parser.add_argument("-n", "--count", type=int, default=20, help="上传次数")
+    parser.add_argument("--size-kb", type=int, default=100, help="单个对象大小 (KB)")
+    parser.add_argument("--legacy", action="store_true", help="模拟每次上传检查生命周期规则")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.0, help="重复上传的比例 (0-1)")
+    args = parser.parse_args()
+
+    latencies = asyncio.run(run_benchmark(
+        args.count, args.size_kb, args.legacy, args.duplicate_ratio
+    ))
+    stats = ImageService.get_upload_stats()
+
+    mode = "legacy (per-upload lifecycle)" if args.legacy else "current (startup lifecycle)"
+    print("=" * 60)
+    print(f"Upload latency - {mode}")
+    print("=" * 60)
+    print(f"  uploads: {len(latencies)}  size: {args.size_kb}KB")
+    print(f"  mean:    {statistics.mean(latencies):.1f} ms")
+    print(f"  p50:     {percentile(latencies, 50):.1f} ms")
+    print(f"  p95:     {percentile(latencies, 95):.1f} ms")
+    print(f"  max:     {max(latencies):.1f} ms")
+    print("-" * 60)
+    print(f"  PUT requests:  {stats['put_count']} (without dedup: {len(latencies)})")
+    print(f"  bytes stored:  {stats['put_bytes'] / 1024:.1f}KB "
+          f"(without dedup: {(stats['put_bytes'] + stats['dedup_bytes']) / 1024:.1f}KB)")
+    print(f"  dedup hits:    {stats['dedup_hits']}  HEAD requests: {stats['head_count']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""向量索引召回率与延迟基准测试
+
+对比 ChromaDB 集合（导入脚本构建）与内存映射向量索引（build_vector_index.py
+导出）的召回率 recall@k、单次查询延迟 (p50/p99) 与打开耗时。查询来自仓库根目录的
+标注查询集 retrieval_queries.json，召回率以 float32 暴力检索的结果为基准。
+
+没有 ChromaDB 数据时可用 --synthetic 在合成的聚类向量上对比精确检索
+(float16/float32) 与不同 nprobe 的 IVF 检索。
+
+用法:
+    python benchmark_vector_index.py
+    python benchmark_vector_index.py --synthetic 200000 --dim 384 --nlist 512
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List, Sequence, Set
+
+import numpy as np
+from loguru import logger
+
+from app.core.config import get_settings
+from app.services.semantic_search import SemanticSearchService
+from app.services.vector_index import VectorIndex, normalize_rows
+from app.utils.stats import percentile
+
+# 仓库根目录的标注查询集（与 retrieval_benchmark.py 相同）
+QUERIES_PATH = Path(__file__).resolve().parent.parent / "retrieval_queries.json"
+
+
+def load_queries(path: Path) -> List[str]:
+    """读取标注查询集中的查询文本"""
+    with open(path, encoding='utf-8') as f:
+        return [labelled['query'] for labelled in json.load(f)]
+
+
+def evaluate(
+    name: str,
+    search: Callable[[np.ndarray], Sequence],
+    queries: np.ndarray,
+    truth: List[Set],
+    top_k: int
+):
+    """逐条查询，统计召回率与延迟并打印一行结果"""
+    timings, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = search(query)
+        timings.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(set(found) & expected) / max(len(expected), 1))
+    print(f"{name:<30}{np.mean(recalls):>10.3f}"
+          f"{percentile(timings, 50):>11.3f}{percentile(timings, 99):>11.3f}")
+
+
+def brute_force(vectors: np.ndarray, queries: np.ndarray, top_k: int) -> List[Set[int]]:
+    """float32 暴力检索结果（基准）"""
+    scores = normalize_rows(queries) @ normalize_rows(vectors).T
+    return [set(np.argsort(-row, kind='stable')[:top_k].tolist()) for row in scores]
+
+
+def print_header(top_k: int):
+    print(f"{'method':<30}{f'recall@{top_k}':>10}{'p50 ms':>11}{'p99 ms':>11}")
+    print("-" * 62)
+
+
+def run_synthetic(args):
+    """合成聚类向量：精确检索与 IVF 检索对比"""
+    rng = np.random.default_rng(0)
+    # 模拟主题聚集的嵌入：主题中心 + 噪声（范数为中心的 1.5 倍），查询为条目加噪声
+    topics = normalize_rows(rng.standard_normal((1024, args.dim)))
+    vectors = normalize_rows(
+        topics[rng.integers(len(topics), size=args.synthetic)]
+        + 1.5 * rng.standard_normal((args.synthetic, args.dim)) / np.sqrt(args.dim)
+    )
+    queries = normalize_rows(
+        vectors[rng.integers(args.synthetic, size=args.queries)]
+        + rng.standard_normal((args.queries, args.dim)) / np.sqrt(args.dim)
+    )
+    ids = [str(i) for i in range(args.synthetic)]
+    truth = [{str(i) for i in found} for found in brute_force(vectors, queries, args.top_k)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        print("=" * 62)
+        print(f"synthetic: {args.synthetic} x {args.dim}, queries: {args.queries}")
+        print_header(args.top_k)
+        for dtype in ("float32", "float16"):
+            start = time.perf_counter()
+            index = VectorIndex.build(
+                f"{directory}/{dtype}", ids, vectors, [""] * len(ids), [{}] * len(ids),
+                ["synthetic"] * len(ids), dtype=dtype
+            )
+            build_ms = (time.perf_counter() - start) * 1000
+
+            def exact(query, index=index):
+                return [index.ids[row] for row, _ in index.search(query, args.top_k)[0]]
+
+            evaluate(f"exact {dtype}", exact, queries, truth, args.top_k)
+            print(f"{'':<4}build {build_ms:.0f} ms, vectors {index.vectors.nbytes / 2**20:.1f} MB")
+
+        start = time.perf_counter()
+        index = VectorIndex.build(
+            f"{directory}/ivf", ids, vectors, [""] * len(ids), [{}] * len(ids),
+            ["synthetic"] * len(ids), nlist=args.nlist
+        )
+        build_ms = (time.perf_counter() - start) * 1000
+        for nprobe in (1, 4, 16, 64):
+            if nprobe > args.nlist:
+                break
+
+            def ivf(query, nprobe=nprobe):
+                return [index.ids[row] for row, _ in index.search(query, args.top_k, nprobe)[0]]
+
+            evaluate(f"ivf{args.nlist} nprobe={nprobe}", ivf, queries, truth, args.top_k)
+        print(f"{'':<4}ivf build {build_ms:.0f} ms")
+
+        start = time.perf_counter()
+        VectorIndex.load(f"{directory}/ivf")
+        print(f"open (mmap): {(time.perf_counter() - start) * 1000:.1f} ms")
+        print("=" * 62)
+
+
+def run_chroma(args):
+    """ChromaDB 集合与导出的向量索引对比"""
+    settings = get_settings()
+    start = time.perf_counter()
+    chroma = SemanticSearchService(
+        settings.SEMANTIC_SEARCH_PERSIST_DIR,
+        settings.SEMANTIC_SEARCH_COLLECTIONS,
+        embedding_model=settings.SEMANTIC_SEARCH_EMBEDDING_MODEL
+    )
+    if not chroma._load():
+        print("ChromaDB 集合不可用，请先运行导入脚本，或使用 --synthetic")
+        return
+    chroma_open_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    index = VectorIndex.load(settings.SEMANTIC_SEARCH_INDEX_DIR)
+    index_open_ms = (time.perf_counter() - start) * 1000
+
+    queries = load_queries(args.queries_file)
+    embeddings = np.asarray(chroma.embed(queries), dtype=np.float32)
+    truth = [
+        {index.ids[row] for row in found}
+        for found in brute_force(np.asarray(index.vectors, dtype=np.float32), embeddings, args.top_k)
+    ]
+
+    print("=" * 62)
+    print(f"entries: {len(index)} x {index.dimension} ({index.vectors.dtype}), queries: {len(queries)}")
+    print_header(args.top_k)
+
+    def chroma_search(query):
+        return [hit.id for hit in chroma._query([query.tolist()], args.top_k)[0]]
+
+    def exact(query):
+        return [index.ids[row] for row, _ in index.search(query, args.top_k)[0]]
+
+    evaluate("chroma (hnsw)", chroma_search, embeddings, truth, args.top_k)
+    evaluate(f"numpy exact {index.vectors.dtype}", exact, embeddings, truth, args.top_k)
+    if index.has_ivf:
+        for nprobe in (1, 4, 16):
+            def ivf(query, nprobe=nprobe):
+                return [index.ids[row] for row, _ in index.search(query, args.top_k, nprobe)[0]]
+
+            evaluate(f"numpy ivf nprobe={nprobe}", ivf, embeddings, truth, args.top_k)
+    print("-" * 62)
+    print(f"open: chroma {chroma_open_ms:.0f} ms (incl. embedding model), numpy {index_open_ms:.1f} ms")
+    print("=" * 62)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="向量索引召回率与延迟基准测试")
+    parser.add_argument("--top-k", type=int, default=5, help="recall@k 的 k")
+    parser.add_argument("--synthetic", type=int, default=0, help="合成向量条数，0 表示使用 ChromaDB 数据")
+    parser.add_argument("--dim", type=int, default=384, help="合成向量维度")
+    parser.add_argument("--nlist", type=int, default=256, help="合成测试的 IVF 聚类数")
+    parser.add_argument("--queries", type=int, default=200, help="合成测试的查询数")
+    parser.add_argument("--queries-file", type=Path, default=QUERIES_PATH, help="标注查询集（ChromaDB 数据对比时使用）")
+    args = parser.parse_args()
+
+    logger.remove()
+    if args.synthetic:
+        run_synthetic(args)
+    else:
+        run_chroma(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""视觉特征检索基准测试
+
+在合成的大规模知识库上对比旧的子串匹配扫描（query_by_visual_cues 原实现）
+与字符二元组倒排索引 + BM25 打分的构建耗时、查询延迟 (p50/p99)，
+并统计两者对词序改写查询（如"自然木纹" vs "木纹自然"）的命中率。
+
+用法:
+    python benchmark_visual_search.py
+    python benchmark_visual_search.py --size 100000 --queries 500 --top-k 10
+"""
+import argparse
+import random
+import statistics
+import time
+from typing import Dict, List, Optional
+
+from app.services.kb_records import MaterialRecord
+from app.services.knowledge_base import material_search_text
+from app.services.text_index import BM25Index
+from app.utils.stats import percentile
+
+# 用于合成视觉特征描述的词组
+TEXTURE_WORDS = ["木纹", "自然", "细腻", "平整", "光滑", "颗粒", "编织", "粗糙", "柔软", "毛孔", "纹理", "整齐"]
+COLOR_WORDS = ["原色", "均匀", "一致", "光泽", "深色", "浅色", "多样", "哑光", "暖色", "统一"]
+PATTERN_WORDS = ["图案", "纹路", "封边", "黑线", "切面", "粉末", "天然", "拼接", "可见", "整体"]
+
+
+def phrase(rng: random.Random, words: List[str], count: int) -> str:
+    return "".join(rng.sample(words, count))
+
+
+def species(rng: random.Random) -> str:
+    """随机两个常用汉字，模拟区分度高的品种名（如"橡木"、"胡桃"）"""
+    return "".join(chr(0x4E00 + rng.randrange(3000)) for _ in range(2))
+
+
+def synthetic_materials(count: int, rng: random.Random) -> List[Dict]:
+    """生成指定数量的合成材料数据"""
+    return [
+        {
+            "id": f"material_{i}",
+            "description": f"{phrase(rng, TEXTURE_WORDS, 2)}的合成材料，{phrase(rng, PATTERN_WORDS, 2)}",
+            "visual_cues": {
+                "texture": f"{species(rng)}{phrase(rng, TEXTURE_WORDS, 1)}，{phrase(rng, TEXTURE_WORDS, 2)}",
+                "color": phrase(rng, COLOR_WORDS, 2),
+                "pattern": phrase(rng, PATTERN_WORDS, 3),
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_query(materials: List[Dict], texture: Optional[str], color: Optional[str],
+                 pattern: Optional[str]) -> List[Dict]:
+    """旧实现：逐条子串匹配，命中字段数作为分数"""
+    results = []
+    for material in materials:
+        visual_cues = material.get('visual_cues', {})
+        score = 0
+        if texture and texture in visual_cues.get('texture', ''):
+            score += 1
+        if color and color in visual_cues.get('color', ''):
+            score += 1
+        if pattern and pattern in visual_cues.get('pattern', ''):
+            score += 1
+        if score > 0:
+            results.append({'material': material, 'match_score': score})
+    results.sort(key=lambda x: x['match_score'], reverse=True)
+    return [r['material'] for r in results]
+
+
+def timed(func) -> List[float]:
+    """返回每次调用耗时（毫秒）"""
+    timings = []
+    for call in func:
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="视觉特征检索基准测试")
+    parser.add_argument("--size", type=int, default=100000, help="知识库规模（材料条数）")
+    parser.add_argument("--queries", type=int, default=200, help="查询次数")
+    parser.add_argument("--top-k", type=int, default=10, help="返回结果数")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    materials = synthetic_materials(args.size, rng)
+
+    texts = [material_search_text(MaterialRecord.from_dict(m)) for m in materials]
+    start = time.perf_counter()
+    index = BM25Index(texts)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    # 查询取自某条材料的纹理描述，改写查询把两个词的顺序对调
+    targets = [rng.randrange(args.size) for _ in range(args.queries)]
+    exact_queries = [materials[i]['visual_cues']['texture'].split("，")[0] for i in targets]
+    reordered_queries = [q[2:] + q[:2] for q in exact_queries]
+
+    legacy_ms = timed(
+        (lambda q=q: legacy_query(materials, q, None, None)) for q in exact_queries
+    )
+    indexed_ms = timed(
+        (lambda q=q: index.search(q, args.top_k)) for q in exact_queries
+    )
+
+    def hit_rate(search, queries) -> float:
+        hits = sum(
+            any(m['id'] == materials[target]['id'] for m in search(q))
+            for target, q in zip(targets, queries)
+        )
+        return hits / len(queries)
+
+    # 命中率：目标材料是否出现在结果中（旧实现不截断，索引取 top_k）
+    legacy_search = lambda q: legacy_query(materials, q, None, None)
+    indexed_search = lambda q: [materials[i] for i, _ in index.search(q, args.top_k)]
+    bm25_pool = lambda q: [materials[i] for i, _ in index.search(q, args.size)]
+
+    print("=" * 64)
+    print(f"materials: {args.size}  queries: {args.queries}  top_k: {args.top_k}")
+    print(f"index build: {build_ms:.0f} ms  vocabulary: {len(index.vocabulary)}  "
+          f"nnz: {index.weights.nnz}")
+    print("-" * 64)
+    print(f"{'method':<16}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for name, timings in (("legacy scan", legacy_ms), ("bm25 index", indexed_ms)):
+        print(f"{name:<16}{percentile(timings, 50):>10.3f}{percentile(timings, 99):>10.3f}"
+              f"{statistics.mean(timings):>10.3f}")
+    print("-" * 64)
+    print(f"{'recall (target in results)':<32}{'exact':>10}{'reordered':>12}")
+    print(f"{'legacy scan (all results)':<32}{hit_rate(legacy_search, exact_queries):>10.2%}"
+          f"{hit_rate(legacy_search, reordered_queries):>12.2%}")
+    print(f"{'bm25 index (all results)':<32}{hit_rate(bm25_pool, exact_queries):>10.2%}"
+          f"{hit_rate(bm25_pool, reordered_queries):>12.2%}")
+    print(f"{'bm25 index (top_k)':<32}{hit_rate(indexed_search, exact_queries):>10.2%}"
+          f"{hit_rate(indexed_search, reordered_queries):>12.2%}")
+    print("=" * 64)
+
+
+if __name__ == "__main__":
+    main()
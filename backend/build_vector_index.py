@@ -0,0 +1,98 @@
+"""从 ChromaDB 导出内存映射向量索引
+
+读取导入脚本 (import_*knowledge.py) 写入的知识集合，将嵌入向量、ID、文档与
+元数据导出为 SEMANTIC_SEARCH_BACKEND=numpy 使用的向量索引目录。
+
+用法:
+    python build_vector_index.py
+    python build_vector_index.py --dtype float16 --nlist 64 --output data/vector_index
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.services.vector_index import VectorIndex
+
+
+def export_collections(persist_directory: str, names):
+    """读取各集合的全部条目
+
+    Returns:
+        (ids, embeddings, documents, metadatas, collections)
+    """
+    import chromadb
+
+    if hasattr(chromadb, "PersistentClient"):
+        client = chromadb.PersistentClient(path=persist_directory)
+    else:
+        from chromadb.config import Settings as ChromaSettings
+        client = chromadb.Client(ChromaSettings(
+            chroma_db_impl="duckdb+parquet",
+            persist_directory=persist_directory
+        ))
+
+    ids, embeddings, documents, metadatas, collections = [], [], [], [], []
+    for name in names:
+        try:
+            collection = client.get_collection(name=name)
+        except Exception as e:
+            print(f"跳过集合 {name}: {e}")
+            continue
+        data = collection.get(include=["embeddings", "documents", "metadatas"])
+        ids.extend(data["ids"])
+        embeddings.extend(data["embeddings"])
+        documents.extend(data["documents"])
+        metadatas.extend(data["metadatas"])
+        collections.extend([name] * len(data["ids"]))
+        print(f"  {name}: {len(data['ids'])} 条")
+    return ids, embeddings, documents, metadatas, collections
+
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="从 ChromaDB 导出内存映射向量索引")
+    parser.add_argument("--persist-dir", default=settings.SEMANTIC_SEARCH_PERSIST_DIR, help="ChromaDB 持久化目录")
+    parser.add_argument("--collections", nargs="+", default=settings.SEMANTIC_SEARCH_COLLECTIONS, help="导出的集合名")
+    parser.add_argument("--output", default=settings.SEMANTIC_SEARCH_INDEX_DIR, help="索引输出目录")
+    parser.add_argument(
+        "--dtype", default="float32", choices=["float16", "float32"],
+        help="向量存储类型（float16 省一半内存，但检索时需转换为 float32，精确检索更慢）"
+    )
+    parser.add_argument("--nlist", type=int, default=0, help="IVF 聚类数，0 表示只做精确检索（建议约 sqrt(条数)）")
+    args = parser.parse_args()
+
+    print(f"读取 ChromaDB: {args.persist_dir}")
+    ids, embeddings, documents, metadatas, collections = export_collections(
+        args.persist_dir, args.collections
+    )
+    if not ids:
+        print("没有可导出的条目，请先运行导入脚本")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    index = VectorIndex.build(
+        args.output,
+        ids,
+        np.asarray(embeddings, dtype=np.float32),
+        documents,
+        metadatas,
+        collections,
+        dtype=args.dtype,
+        nlist=args.nlist,
+        model=settings.SEMANTIC_SEARCH_EMBEDDING_MODEL
+    )
+    build_ms = (time.perf_counter() - start) * 1000
+
+    size = index.vectors.nbytes / 1024
+    print(f"向量索引已写入: {args.output}")
+    print(f"  条目: {len(index)}  维度: {index.dimension}  类型: {args.dtype}  向量: {size:.1f} KB")
+    if index.has_ivf:
+        print(f"  IVF 聚类: {len(index.centroids)}")
+    print(f"  构建耗时: {build_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""送检图片分辨率离线评估
+
+在带标签的测试图片上，以多个长边分辨率调用 Qwen-VL，统计材料识别准确率、
+调用延迟和 prompt token 消耗，用于选择 VLM_IMAGE_MAX_LONG_EDGE /
+VLM_IMAGE_MAX_PIXELS。图片以 base64 data URL 发送，不经过 OSS。
+
+标签来源（二选一）:
+    1. 图片目录下的 labels.json: {"a.jpg": {"material_type": "实木类", "sub_type": "实木拼板"}}
+    2. crawlers/download_test_images*.py 的子目录名，如 实木桌椅/、板材家具/、皮质沙发_真皮/
+
+用法:
+    python evaluate_vlm_resolution.py ../crawlers/test_images
+    python evaluate_vlm_resolution.py ../crawlers/test_images --edges 448 672 896 1344 2016 0
+"""
+import argparse
+import base64
+import csv
+import json
+import statistics
+import time
+from pathlib import Path
+
+from app.core.config import get_settings
+from app.services.image_service import ImageService, compute_vlm_size
+from app.services.qwen_vl import QwenVLService
+
+# 下载脚本的子目录名前缀 -> 材料大类
+DIRECTORY_LABELS = {
+    "实木": "实木类",
+    "板材": "人造板类",
+    "皮质": "皮革类",
+    "布艺": "布类",
+}
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png"}
+
+
+def load_samples(images_dir: Path) -> list:
+    """加载 (图片路径, 标签) 列表"""
+    labels_file = images_dir / "labels.json"
+    if labels_file.exists():
+        with open(labels_file, 'r', encoding='utf-8') as f:
+            labels = json.load(f)
+        return [(images_dir / name, label) for name, label in labels.items()]
+
+    samples = []
+    for path in sorted(images_dir.rglob("*")):
+        if path.suffix.lower() not in IMAGE_SUFFIXES:
+            continue
+        for prefix, material_type in DIRECTORY_LABELS.items():
+            if path.parent.name.startswith(prefix):
+                samples.append((path, {"material_type": material_type}))
+                break
+    return samples
+
+
+def analyze(qwen_service: QwenVLService, image_data: bytes) -> tuple:
+    """调用模型，返回 (解析结果, 延迟秒, prompt token 数)"""
+    data_url = "data:image/jpeg;base64," + base64.b64encode(image_data).decode()
+    messages = [
+        {"role": "system", "content": qwen_service._build_system_prompt()},
+        {
+            "role": "user",
+            "content": [
+                {"type": "image_url", "image_url": {"url": data_url}},
+                {"type": "text", "text": "请分析这张家具图片的材料"}
+            ]
+        }
+    ]
+    start = time.perf_counter()
+    response = qwen_service.client.chat.completions.create(
+        model=qwen_service.model,
+        messages=messages,
+        stream=False,
+        temperature=0.0,
+        max_tokens=2000
+    )
+    latency = time.perf_counter() - start
+    result = qwen_service._parse_response(response.choices[0].message.content)
+    prompt_tokens = response.usage.prompt_tokens if response.usage else 0
+    return result, latency, prompt_tokens
+
+
+def is_correct(result: dict, label: dict) -> bool:
+    """判断识别结果是否与标签一致（首个材料）"""
+    materials = result.get('materials') or []
+    if not materials:
+        return False
+    predicted = materials[0]
+    if predicted.get('material_type') != label.get('material_type'):
+        return False
+    if label.get('sub_type') and predicted.get('sub_type') != label['sub_type']:
+        return False
+    return True
+
+
+def evaluate(samples: list, edges: list, max_pixels: int) -> list:
+    """逐个分辨率评估，返回汇总行"""
+    settings = get_settings()
+    image_service = ImageService()
+    qwen_service = QwenVLService()
+    rows = []
+
+    for edge in edges:
+        correct = 0
+        latencies = []
+        tokens = []
+        upload_bytes = []
+        for path, label in samples:
+            original = path.read_bytes()
+            img = image_service.decode_image(original)
+            target = compute_vlm_size(
+                img.width, img.height,
+                max_long_edge=edge,
+                max_pixels=max_pixels,
+                patch_size=settings.VLM_IMAGE_PATCH_SIZE
+            )
+            if img.size != target:
+                img = img.resize(target)
+            encoded = image_service.encode_image(img, image_format="JPEG")
+
+            try:
+                result, latency, prompt_tokens = analyze(qwen_service, encoded)
+            except Exception as e:
+                print(f"  {path.name} @ {edge}: 调用失败 {e}")
+                continue
+
+            correct += is_correct(result, label)
+            latencies.append(latency)
+            tokens.append(prompt_tokens)
+            upload_bytes.append(len(encoded))
+
+        if not latencies:
+            continue
+        row = {
+            "long_edge": edge or "original",
+            "samples": len(latencies),
+            "accuracy": correct / len(latencies),
+            "latency_p50_s": statistics.median(latencies),
+            "prompt_tokens_mean": statistics.mean(tokens),
+            "upload_kb_mean": statistics.mean(upload_bytes) / 1024,
+        }
+        rows.append(row)
+        print(
+            f"long edge {row['long_edge']!s:>8}: accuracy {row['accuracy']:.1%}  "
+            f"p50 {row['latency_p50_s']:.2f}s  tokens {row['prompt_tokens_mean']:.0f}  "
+            f"upload {row['upload_kb_mean']:.0f}KB"
+        )
+    return rows
+
+
+def plot(rows: list, output: Path) -> None:
+    """绘制准确率-延迟、准确率-token 曲线（需要 matplotlib）"""
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("未安装 matplotlib，跳过绘图")
+        return
+
+    fig, (ax_latency, ax_tokens) = plt.subplots(1, 2, figsize=(12, 5))
+    for ax, key, xlabel in (
+        (ax_latency, "latency_p50_s", "p50 latency (s)"),
+        (ax_tokens, "prompt_tokens_mean", "prompt tokens"),
+    ):
+        xs = [row[key] for row in rows]
+        ys = [row["accuracy"] for row in rows]
+        ax.plot(xs, ys, marker="o")
+        for row, x, y in zip(rows, xs, ys):
+            ax.annotate(str(row["long_edge"]), (x, y))
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel("accuracy")
+        ax.grid(True)
+    fig.tight_layout()
+    fig.savefig(output)
+    print(f"图表已保存: {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="送检图片分辨率离线评估")
+    parser.add_argument("images_dir", help="带标签的测试图片目录")
+    parser.add_argument(
+        "--edges", type=int, nargs="+", default=[448, 672, 896, 1344, 2016, 0],
+        help="评估的长边分辨率，0 表示原图"
+    )
+    parser.add_argument("--max-pixels", type=int, default=0, help="总像素上限，0 表示不限制")
+    parser.add_argument("--output", default="vlm_resolution", help="输出文件前缀")
+    args = parser.parse_args()
+
+    samples = load_samples(Path(args.images_dir))
+    if not samples:
+        print("未找到带标签的测试图片")
+        return
+    print(f"共 {len(samples)} 张测试图片")
+
+    rows = evaluate(samples, args.edges, args.max_pixels)
+    if not rows:
+        return
+
+    csv_path = Path(f"{args.output}.csv")
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"结果已保存: {csv_path}")
+
+    plot(rows, Path(f"{args.output}.png"))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,15 @@
+import asyncio
+
+from fastapi import Depends
+from loguru import logger
+
 from app import create_app
 from app.core.config import get_settings
-from app.api.v1 import furniture, share
+from app.api.v1 import furniture, knowledge, share
+from app.services.card_renderer import get_card_renderer
+from app.services.knowledge_base import KnowledgeBaseService, get_knowledge_base
+from app.services.knowledge_manifest import get_manifest_watcher
+from app.services.semantic_search import get_semantic_search
 
 app = create_app()
 settings = get_settings()
@@ -8,6 +17,77 @@ settings = get_settings()
 # 注册路由
 app.include_router(furniture.router, prefix="/api/v1")
 app.include_router(share.router, prefix="/api/v1")
+app.include_router(knowledge.router, prefix="/api/v1")
+
+
+@app.on_event("startup")
+async def bootstrap_oss_lifecycle():
+    """启动时校验一次 OSS 生命周期规则，上传路径不再重复检查"""
+    if settings.OSS_LIFECYCLE_CHECK_ON_STARTUP:
+        await asyncio.to_thread(furniture.image_service.ensure_lifecycle_rule)
+
+
+@app.on_event("startup")
+async def start_share_prerender():
+    """启动分享卡片预渲染后台任务"""
+    furniture.prerender_worker.start()
+
+
+@app.on_event("startup")
+async def warm_up_card_renderer():
+    """启动时加载字体并预渲染分享卡片模板，首个分享请求不承担该耗时"""
+    await asyncio.to_thread(get_card_renderer)
+
+
+@app.on_event("startup")
+async def start_knowledge_base_watcher():
+    """加载知识库并监听文件变更"""
+    get_knowledge_base().start_watching(settings.KNOWLEDGE_BASE_WATCH_INTERVAL)
+
+
+@app.on_event("startup")
+async def start_manifest_watcher():
+    """监听知识集合导入清单，重新导入后使依据变化条目的问答缓存失效"""
+    manifest_watcher = get_manifest_watcher()
+    if manifest_watcher is not None:
+        manifest_watcher.start_watching(settings.KNOWLEDGE_BASE_WATCH_INTERVAL)
+
+
+@app.on_event("startup")
+async def warm_up_semantic_search():
+    """后台预热语义检索（加载嵌入模型与知识集合），不阻塞启动"""
+    semantic_search = get_semantic_search()
+    if semantic_search is None:
+        return
+
+    async def warm_up():
+        try:
+            await asyncio.to_thread(semantic_search.warm_up)
+        except Exception as e:
+            logger.warning(f"语义检索预热失败，稍后检索时按退避间隔重试: {e}")
+
+    asyncio.create_task(warm_up())
+
+
+@app.on_event("shutdown")
+async def stop_knowledge_base_watcher():
+    """停止知识库文件监听"""
+    await get_knowledge_base().stop_watching()
+
+
+@app.on_event("shutdown")
+async def stop_manifest_watcher():
+    """停止导入清单监听"""
+    manifest_watcher = get_manifest_watcher()
+    if manifest_watcher is not None:
+        await manifest_watcher.stop_watching()
+
+
+@app.on_event("shutdown")
+async def close_report_store():
+    """停止预渲染任务并关闭报告存储连接"""
+    await furniture.prerender_worker.stop()
+    await furniture.report_store.close()
 
 
 @app.get("/")
@@ -21,9 +101,10 @@ async def root():
 
 
 @app.get("/api/v1/health")
-async def health_check():
+async def health_check(
+    kb_service: KnowledgeBaseService = Depends(get_knowledge_base)
+):
     """健康检查端点"""
-    from app.services.knowledge_base import KnowledgeBaseService
     from app.services.qwen_vl import QwenVLService
     from app.services.image_service import ImageService
 
@@ -36,8 +117,7 @@ async def health_check():
 
     # 检查知识库
     try:
-        kb_service = KnowledgeBaseService()
-        materials = kb_service.get_all_materials()
+        materials = kb_service.snapshot.materials
         services_status["knowledge_base"] = "ok" if materials else "error"
     except Exception as e:
         services_status["knowledge_base"] = f"error: {str(e)}"
@@ -0,0 +1,138 @@
+"""知识库编译快照测试
+
+用真实知识库加上合成材料编译快照，检查：
+
+1. 映射视图（材料序列、ID/子类型/材料类型索引、子类型解析、视觉检索）与 JSON 构建的结果一致
+2. 加载时不构建材料记录，查询只构建命中的记录
+3. 源文件修改时间与大小不变时不计算 sha256；只改修改时间时按 sha256 判断仍然有效；
+   内容变化时快照失效
+
+运行: python test_kb_snapshot.py（或 pytest test_kb_snapshot.py）
+"""
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from loguru import logger
+
+from app.core.config import get_settings
+from app.services import kb_snapshot
+from app.services.kb_snapshot import SnapshotError, compile_snapshot, file_signature, load_snapshot
+from app.services.knowledge_base import KnowledgeBaseSnapshot, normalize_sub_type
+
+logger.remove()
+
+QUERIES = [
+    "实木", "橡木实木", "MDF", "ＭＤＦ板", "密度版", "颗粒板", "实木颗粒板", "牛皮",
+    "科技布", "PU皮革", "仿实木", "实木复合板", "合成材料 7", "子类型12", "大理石", "",
+]
+
+
+def write_knowledge_base(directory: Path) -> Path:
+    """真实知识库材料加上 200 条合成材料"""
+    with open(get_settings().KNOWLEDGE_BASE_PATH, 'r', encoding='utf-8') as f:
+        materials = json.load(f)['materials']
+    for i in range(200):
+        base = dict(materials[i % len(materials)])
+        base.update(id=f"synthetic_{i}", sub_type=f"子类型{i}", aliases=[f"合成材料 {i}"])
+        materials.append(base)
+    source = directory / 'knowledge_base.json'
+    source.write_text(json.dumps({'materials': materials}, ensure_ascii=False), encoding='utf-8')
+    return source
+
+
+def compile_to(directory: Path):
+    source = write_knowledge_base(directory)
+    signature = file_signature(source)
+    expected = KnowledgeBaseSnapshot.from_materials(
+        json.loads(source.read_text(encoding='utf-8'))['materials']
+    )
+    path = directory / 'knowledge_base.snap'
+    compile_snapshot(expected, kb_snapshot.file_sha256(source), path, signature)
+    return source, path, expected
+
+
+def test_mapped_views_match_json():
+    """映射视图与 JSON 构建的快照一致，加载时不构建材料记录"""
+    directory = Path(tempfile.mkdtemp())
+    try:
+        source, path, expected = compile_to(directory)
+        snapshot = load_snapshot(path, source)
+        assert not any(snapshot.materials._records), "加载时不应构建材料记录"
+
+        sub_type = expected.materials[3].sub_type
+        assert snapshot.by_sub_type[normalize_sub_type(sub_type)] == expected.materials[3]
+        built = sum(record is not None for record in snapshot.materials._records)
+        print(f"按子类型查询一次后构建的记录数: {built}")
+        assert built == 1
+
+        assert list(snapshot.materials) == list(expected.materials)
+        assert dict(snapshot.by_id) == dict(expected.by_id)
+        assert dict(snapshot.by_sub_type) == dict(expected.by_sub_type)
+        assert dict(snapshot.by_material_type) == dict(expected.by_material_type)
+        assert snapshot.by_id.get("不存在") is None and "不存在" not in snapshot.by_material_type
+        for query in QUERIES:
+            assert snapshot.sub_type_resolver.resolve(query) == expected.sub_type_resolver.resolve(query), query
+            assert snapshot.visual_index.search(query, 5) == expected.visual_index.search(query, 5), query
+        question = "实木和密度板哪个更环保，科技布沙发呢"
+        assert (snapshot.sub_type_resolver.find_mentions(question)
+                == expected.sub_type_resolver.find_mentions(question))
+        print(f"{len(snapshot.materials)} 条材料，{len(QUERIES)} 个查询结果一致")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def test_staleness_checked_by_signature_first():
+    """签名一致时不计算哈希；只改修改时间按哈希判断；内容变化时失效"""
+    directory = Path(tempfile.mkdtemp())
+    original_sha256 = kb_snapshot.file_sha256
+    hashed = []
+
+    def counting_sha256(path):
+        hashed.append(path)
+        return original_sha256(path)
+
+    kb_snapshot.file_sha256 = counting_sha256
+    try:
+        source, path, _ = compile_to(directory)
+        hashed.clear()
+        load_snapshot(path, source)
+        assert hashed == [], "签名一致时不应计算 sha256"
+
+        stat = source.stat()
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        load_snapshot(path, source)
+        assert len(hashed) == 1, "只改修改时间时应按 sha256 判断"
+
+        data = source.read_bytes()
+        source.write_bytes(data.replace('synthetic_1"'.encode(), 'synthetic_X"'.encode(), 1))
+        assert len(source.read_bytes()) == len(data)
+        try:
+            load_snapshot(path, source)
+        except SnapshotError as e:
+            print(f"内容变化（大小不变）: {e}")
+        else:
+            raise AssertionError("内容变化后快照应失效")
+
+        source.write_bytes(data + b'\n')
+        hashed.clear()
+        try:
+            load_snapshot(path, source)
+        except SnapshotError:
+            assert hashed == [], "大小不同时不应计算 sha256"
+        else:
+            raise AssertionError("大小变化后快照应失效")
+    finally:
+        kb_snapshot.file_sha256 = original_sha256
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("知识库编译快照测试")
+    print("=" * 60)
+    test_mapped_views_match_json()
+    test_staleness_checked_by_signature_first()
+    print("✅ 全部通过")
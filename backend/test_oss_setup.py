@@ -98,6 +98,9 @@ def create_bucket():
         bucket.put_bucket_cors(oss2.models.BucketCors([rule]))
         print("[OK] CORS rules configured")
 
+        # Configure lifecycle rule once, uploads no longer check it
+        apply_lifecycle_rule()
+
         return True
 
     except oss2.exceptions.OssError as e:
@@ -112,10 +115,34 @@ def create_bucket():
         return False
 
 
+def apply_lifecycle_rule():
+    """Re-apply the OSS lifecycle rule (admin command)"""
+    print("=" * 60)
+    print("Applying OSS Lifecycle Rule")
+    print("=" * 60)
+
+    from app.services.image_service import ImageService, LIFECYCLE_RULE_ID
+
+    settings = get_settings()
+    image_service = ImageService()
+
+    if image_service.ensure_lifecycle_rule(force=True):
+        print(
+            f"[OK] Rule '{LIFECYCLE_RULE_ID}' applied: "
+            f"objects expire after {settings.OSS_IMAGE_EXPIRE_DAYS} days"
+        )
+        return True
+
+    print("[ERROR] Failed to apply lifecycle rule, see log for details")
+    return False
+
+
 if __name__ == "__main__":
     import sys
 
-    if len(sys.argv) > 1 and sys.argv[1] == "--create":
+    if len(sys.argv) > 1 and sys.argv[1] == "--lifecycle":
+        apply_lifecycle_rule()
+    elif len(sys.argv) > 1 and sys.argv[1] == "--create":
         success = create_bucket()
         if success:
             print("\n" + "=" * 60)
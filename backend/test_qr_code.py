@@ -0,0 +1,71 @@
+"""二维码尺寸测试
+
+检查 get_qr_code 的输出不超过 size 且为模块数的整数倍；长链接在小尺寸下
+每个模块不足 1 像素时抛出 ValueError，而不是输出比 size 更大的图片。
+
+运行: python test_qr_code.py（或 pytest test_qr_code.py）
+"""
+import io
+import shutil
+import tempfile
+
+from loguru import logger
+from PIL import Image
+
+from app.services.image_service import ImageService
+
+logger.remove()
+
+SHORT_PATH = "/pages/report/report?id=abc123"
+LONG_URL = "https://example.com/pages/report/report?" + "&".join(
+    f"param{i}=value{i}" for i in range(60)
+)
+
+
+def make_service(cache_dir: str) -> ImageService:
+    service = ImageService()
+    service.settings = service.settings.model_copy(update={"QR_CACHE_DIR": cache_dir})
+    ImageService._qr_image_cache.clear()
+    return service
+
+
+def image_size(data: bytes):
+    return Image.open(io.BytesIO(data)).size
+
+
+def test_qr_code_within_size():
+    """输出边长不超过 size"""
+    cache_dir = tempfile.mkdtemp()
+    try:
+        service = make_service(cache_dir)
+        for data, size in ((SHORT_PATH, 300), (SHORT_PATH, 41), (LONG_URL, 300)):
+            width, height = image_size(service.get_qr_code(data, size))
+            print(f"{len(data)} 字符 @ {size}px -> {width}x{height}")
+            assert width == height <= size
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def test_long_url_at_small_size_raises():
+    """长链接在小尺寸下容纳不下时抛出 ValueError，且不写入缓存"""
+    cache_dir = tempfile.mkdtemp()
+    try:
+        service = make_service(cache_dir)
+        try:
+            qr_data = service.get_qr_code(LONG_URL, 64)
+        except ValueError as e:
+            print(f"{len(LONG_URL)} 字符 @ 64px -> {e}")
+        else:
+            raise AssertionError(f"应抛出 ValueError，实际输出 {image_size(qr_data)}")
+        assert not ImageService._qr_image_cache
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("二维码尺寸测试")
+    print("=" * 60)
+    test_qr_code_within_size()
+    test_long_url_at_small_size_raises()
+    print("✅ 全部通过")
@@ -0,0 +1,76 @@
+"""语义检索子类型解析测试
+
+用固定的检索结果代替 ChromaDB，检查知识条目按具体材料名称解析到知识库材料，
+只带类别名称的条目（如"皮革类"下的 PU皮）不会被解析为真皮。
+
+运行: python test_semantic_resolution.py（或 pytest test_semantic_resolution.py）
+"""
+import asyncio
+
+from loguru import logger
+
+from app.core.config import get_settings
+from app.services.knowledge_base import KnowledgeBaseService
+from app.services.semantic_search import SemanticHit
+
+logger.remove()
+
+# 与导入脚本写入的元数据一致：专业集合 category 为类别、material_type 为具体名称，
+# 基础集合 category 为具体名称
+PU_HIT = SemanticHit("leather_004", "furniture_materials_pro", "PU皮",
+                     {"category": "皮革类", "material_type": "PU皮", "risk_level": "中"}, 0.82)
+TECH_FABRIC_HIT = SemanticHit("leather_005", "furniture_materials_pro", "科技布",
+                              {"category": "皮革类", "material_type": "科技布", "risk_level": "低"}, 0.8)
+MDF_HIT = SemanticHit("material_002", "furniture_materials", "密度板",
+                      {"category": "密度板", "material_type": "人造板材", "risk_level": "中"}, 0.78)
+
+
+class FixedSemanticSearch:
+    """按查询文本返回固定命中的检索服务"""
+
+    def __init__(self, results):
+        self.results = results
+
+    async def search_many(self, queries, top_k):
+        return [self.results.get(query, []) for query in queries]
+
+
+def resolve(sub_types, results):
+    service = KnowledgeBaseService(
+        get_settings().KNOWLEDGE_BASE_PATH,
+        semantic_search=FixedSemanticSearch(results),
+        semantic_min_similarity=0.5
+    )
+    return asyncio.run(service.resolve_sub_types(sub_types))
+
+
+def test_pu_hit_not_resolved_to_leather():
+    """命中 PU皮 条目的"再生皮"不解析为真皮（知识库没有 PU皮，按未命中处理）"""
+    match, = resolve(["再生皮"], {"再生皮": [PU_HIT]})
+    print(f"再生皮 -> {match and match.sub_type}")
+    assert match is None or match.sub_type != "真皮"
+
+
+def test_tech_fabric_hit_resolved_by_name():
+    """命中科技布条目的"聚氨酯革"按具体名称解析为布艺面料，而不是真皮"""
+    match, = resolve(["聚氨酯革"], {"聚氨酯革": [TECH_FABRIC_HIT]})
+    print(f"聚氨酯革 -> {match and match.sub_type}")
+    assert match is not None and match.sub_type == "布艺面料"
+    assert match.method == "semantic"
+
+
+def test_class_only_hit_skipped_for_next_hit():
+    """只带类别的条目被跳过，继续采用后面可解析的条目"""
+    match, = resolve(["某种板材"], {"某种板材": [PU_HIT, MDF_HIT]})
+    print(f"某种板材 -> {match and match.sub_type}")
+    assert match is not None and match.sub_type == "密度板"
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("语义检索子类型解析测试")
+    print("=" * 60)
+    test_pu_hit_not_resolved_to_leather()
+    test_tech_fabric_hit_resolved_by_name()
+    test_class_only_hit_skipped_for_next_hit()
+    print("✅ 全部通过")
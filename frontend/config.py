@@ -140,8 +140,15 @@ SCRAPE_CONFIG = {
     "max_pages": 100,  # 每个数据源最多爬取页数
     "timeout": 30,  # 请求超时时间(秒)
     "retry_times": 3,  # 失败重试次数
-    "delay": 2,  # 请求间隔(秒)
-    "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    "backoff_factor": 1,  # 重试退避系数(秒),每次重试等待时间翻倍
+    "delay": 2,  # 同一主机的请求间隔(秒)
+    "per_host_concurrency": 2,  # 同一主机的最大并发请求数
+    "max_concurrency": 8,  # 同时爬取的数据源数
+    "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "cache_enabled": True,  # 响应磁盘缓存(GET 200),过期后用 ETag/Last-Modified 重新验证
+    "cache_dir": os.path.join(BASE_DIR, "cache", "http"),
+    "cache_max_age": 24 * 3600,  # 缓存在多少秒内直接使用,不访问网络
+    "offline": os.getenv('SCRAPER_OFFLINE', '') == '1'  # 离线模式:只读缓存
 }
 
 # 日志配置
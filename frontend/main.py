@@ -142,9 +142,25 @@ def main():
         action="store_true",
         help="显示详细日志"
     )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="离线模式,只使用 HTTP 缓存,不访问网络"
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="忽略缓存有效期,所有页面重新验证"
+    )
 
     args = parser.parse_args()
 
+    # HTTP 缓存配置在爬虫创建共享 Session 时读取
+    if args.offline:
+        SCRAPE_CONFIG["offline"] = True
+    if args.refresh:
+        SCRAPE_CONFIG["cache_max_age"] = 0
+
     # 创建目录
     create_directories()
 
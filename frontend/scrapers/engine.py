@@ -0,0 +1,260 @@
+"""并发爬取引擎
+
+各数据源位于不同主机，彼此之间不需要等待：数据源在线程池中并发爬取，
+礼貌限制改为按主机执行，由挂载在共享 Session 上的 PoliteAdapter 负责：
+
+- 每个主机一个令牌桶，平均每 SCRAPE_CONFIG['delay'] 秒一个请求
+- 每个主机的并发请求数不超过 SCRAPE_CONFIG['per_host_concurrency']
+- 连接池复用 TCP/TLS 连接，失败按 SCRAPE_CONFIG['retry_times'] 指数退避重试，
+  每次重试同样要从令牌桶取令牌，重试不会绕过主机限速
+
+各爬虫的解析代码是同步的，请求在线程中执行（等待网络时释放 GIL），
+asyncio 只负责调度各数据源；限速、重试与磁盘缓存都在 requests 适配器层完成，
+爬虫通过 fetch 或共享 Session 发出的请求都会经过这些限制。
+
+整体耗时接近最慢的单个主机，而不是所有数据源耗时与间隔之和。
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import SCRAPE_CONFIG
+
+
+class TokenBucket:
+    """令牌桶（线程安全）"""
+
+    def __init__(self, rate: float, capacity: float = 1):
+        """
+        Args:
+            rate: 每秒补充的令牌数，不大于 0 时不限速
+            capacity: 桶容量（允许的突发请求数）
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """取一个令牌，令牌不足时阻塞等待
+
+        Returns:
+            等待的秒数
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # 先预订令牌再在锁外等待，排队的线程按顺序错开
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class PoliteAdapter(HTTPAdapter):
+    """按主机限速、限并发、在限速内重试的 HTTPAdapter"""
+
+    # 可重试的响应状态码与请求方法（幂等请求）
+    RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+    RETRY_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+    # 单次重试的最长等待（秒），包括 Retry-After
+    BACKOFF_MAX = 120
+
+    def __init__(
+        self,
+        delay: float = SCRAPE_CONFIG['delay'],
+        per_host_concurrency: int = SCRAPE_CONFIG['per_host_concurrency'],
+        retry_times: int = SCRAPE_CONFIG['retry_times'],
+        backoff_factor: float = SCRAPE_CONFIG['backoff_factor'],
+        timeout: float = SCRAPE_CONFIG['timeout'],
+        pool_maxsize: int = SCRAPE_CONFIG['max_concurrency'],
+        **kwargs
+    ):
+        """
+        Args:
+            delay: 同一主机两次请求的平均间隔（秒）
+            per_host_concurrency: 同一主机的最大并发请求数
+            retry_times: 连接错误与 429/5xx 响应的重试次数
+            backoff_factor: 重试退避系数（第 n 次重试前等待 backoff_factor * 2^(n-1) 秒）
+            timeout: 未指定超时的请求使用的超时时间（秒）
+            pool_maxsize: 每个主机连接池的连接数
+        """
+        # 重试由 send 自己执行（每次都经过令牌桶），urllib3 不再重试
+        super().__init__(max_retries=0, pool_maxsize=pool_maxsize, **kwargs)
+        self.retry_times = retry_times
+        self.backoff_factor = backoff_factor
+        self.delay = delay
+        self.per_host_concurrency = per_host_concurrency
+        self.timeout = timeout
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._hosts_lock = threading.Lock()
+
+    def _host_limits(self, host: str):
+        with self._hosts_lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(1 / self.delay if self.delay > 0 else 0)
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host_concurrency)
+            return self._buckets[host], self._semaphores[host]
+
+    def _retry_wait(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """第 attempt + 1 次重试前的等待秒数，响应带 Retry-After（秒）时取较大者"""
+        wait = self.backoff_factor * (2 ** attempt)
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.strip().isdigit():
+            wait = max(wait, int(retry_after))
+        return min(wait, self.BACKOFF_MAX)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        bucket, semaphore = self._host_limits(urlsplit(request.url).netloc.lower())
+        retries = self.retry_times if request.method in self.RETRY_METHODS else 0
+        attempt = 0
+        while True:
+            response = None
+            with semaphore:
+                # 每次尝试（包括重试）都取一个令牌
+                bucket.acquire()
+                try:
+                    response = super().send(request, **kwargs)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                    if attempt >= retries:
+                        raise
+            if response is not None and (
+                response.status_code not in self.RETRY_STATUSES or attempt >= retries
+            ):
+                return response
+            wait = self._retry_wait(attempt, response)
+            if response is not None:
+                response.close()
+            # 退避等待不占用主机并发名额
+            time.sleep(wait)
+            attempt += 1
+
+
+def create_session(
+    user_agent: str = SCRAPE_CONFIG['user_agent'],
+    adapter: Optional[HTTPAdapter] = None
+) -> requests.Session:
+    """创建挂载 PoliteAdapter（或其子类）的 Session
+
+    Args:
+        user_agent: User-Agent 请求头
+        adapter: 挂载的适配器，为空时使用默认配置的 PoliteAdapter
+
+    Returns:
+        Session
+    """
+    session = requests.Session()
+    adapter = adapter or PoliteAdapter()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'User-Agent': user_agent})
+    return session
+
+
+_shared_session: Optional[requests.Session] = None
+_shared_session_lock = threading.Lock()
+
+
+def get_shared_session() -> requests.Session:
+    """所有爬虫共用的 Session，同一主机的限速在不同爬虫之间同样生效
+
+    SCRAPE_CONFIG['cache_enabled'] 为真时挂载带磁盘缓存的 CachingAdapter，
+    缓存与离线配置在首次调用时读取。
+    """
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            adapter = None
+            if SCRAPE_CONFIG['cache_enabled']:
+                # http_cache 依赖本模块，在这里导入
+                from scrapers.http_cache import CachingAdapter
+                adapter = CachingAdapter(
+                    cache_dir=SCRAPE_CONFIG['cache_dir'],
+                    max_age=SCRAPE_CONFIG['cache_max_age'],
+                    offline=SCRAPE_CONFIG['offline']
+                )
+            _shared_session = create_session(adapter=adapter)
+        return _shared_session
+
+
+def fetch(url: str, session: Optional[requests.Session] = None, **kwargs) -> requests.Response:
+    """GET 请求（经过主机限速、重试与磁盘缓存）
+
+    Args:
+        url: 请求地址
+        session: 使用的 Session，为空时使用 get_shared_session()
+        **kwargs: 传给 Session.get 的参数（params、headers、timeout 等）
+
+    Returns:
+        响应（缓存命中时 response.from_cache 为 True）
+
+    Raises:
+        requests.HTTPError: 响应状态码为 4xx/5xx
+        requests.ConnectionError: 网络错误，或离线模式下缓存未命中
+    """
+    response = (session or get_shared_session()).get(url, **kwargs)
+    response.raise_for_status()
+    return response
+
+
+async def scrape_sources_async(
+    sources: Dict[str, Dict],
+    scrape_source: Callable[[str, Dict], List[Dict[str, Any]]],
+    logger,
+    max_concurrency: int = SCRAPE_CONFIG['max_concurrency']
+) -> List[Dict[str, Any]]:
+    """并发爬取多个数据源
+
+    Args:
+        sources: 数据源配置（DATABASE_URLS 中的一个类别）
+        scrape_source: 爬取单个数据源的函数 (source_key, source_info) -> 数据列表
+        logger: 日志记录器
+        max_concurrency: 同时爬取的数据源数
+
+    Returns:
+        所有数据源的数据，按数据源配置顺序合并；单个数据源失败时记录日志并跳过
+    """
+    loop = asyncio.get_running_loop()
+
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix='scraper') as pool:
+        async def scrape_one(source_key: str, source_info: Dict) -> List[Dict[str, Any]]:
+            logger.info(f"正在爬取: {source_info['name']}")
+            try:
+                data = await loop.run_in_executor(pool, scrape_source, source_key, source_info)
+            except Exception as e:
+                logger.error(f"爬取 {source_info['name']} 失败: {str(e)}")
+                return []
+            if data:
+                logger.info(f"从 {source_info['name']} 爬取到 {len(data)} 条数据")
+            return data or []
+
+        results = await asyncio.gather(*[
+            scrape_one(source_key, source_info)
+            for source_key, source_info in sources.items()
+        ])
+
+    return [item for data in results for item in data]
+
+
+def scrape_sources(
+    sources: Dict[str, Dict],
+    scrape_source: Callable[[str, Dict], List[Dict[str, Any]]],
+    logger,
+    max_concurrency: int = SCRAPE_CONFIG['max_concurrency']
+) -> List[Dict[str, Any]]:
+    """scrape_sources_async 的同步入口（供各爬虫的 scrape_all 调用）"""
+    return asyncio.run(scrape_sources_async(sources, scrape_source, logger, max_concurrency))
@@ -1,10 +1,9 @@
 """食物数据爬虫模块"""
-import time
-import requests
 from bs4 import BeautifulSoup
 from typing import List, Dict, Any
 
-from config import DATABASE_URLS, SCRAPE_CONFIG
+from config import DATABASE_URLS
+from scrapers.engine import get_shared_session, scrape_sources
 from utils import create_material_entry, clean_text
 
 
@@ -13,10 +12,7 @@ class FoodScraper:
 
     def __init__(self, logger):
         self.logger = logger
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': SCRAPE_CONFIG['user_agent']
-        })
+        self.session = get_shared_session()
         self.all_data = []
 
     def scrape_all(self) -> List[Dict[str, Any]]:
@@ -25,17 +21,8 @@ class FoodScraper:
 
         self.logger.info(f"开始爬取 {len(food_sources)} 个食物数据源")
 
-        for source_key, source_info in food_sources.items():
-            self.logger.info(f"正在爬取: {source_info['name']}")
-            try:
-                data = self._scrape_source(source_key, source_info)
-                if data:
-                    self.all_data.extend(data)
-                    self.logger.info(f"从 {source_info['name']} 爬取到 {len(data)} 条数据")
-                time.sleep(SCRAPE_CONFIG['delay'])
-            except Exception as e:
-                self.logger.error(f"爬取 {source_info['name']} 失败: {str(e)}")
-                continue
+        # 各数据源并发爬取，同一主机的请求间隔由共享 Session 控制
+        self.all_data.extend(scrape_sources(food_sources, self._scrape_source, self.logger))
 
         return self.all_data
 
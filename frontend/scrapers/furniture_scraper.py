@@ -1,26 +1,41 @@
 """家具材质数据爬虫模块"""
-import time
-import requests
 from bs4 import BeautifulSoup
 from typing import List, Dict, Any
+from urllib.parse import quote
 import json
 
-from config import DATABASE_URLS, SCRAPE_CONFIG, FIRECRAWL_API_KEY
+import requests
+
+from config import DATABASE_URLS, FIRECRAWL_API_KEY
+from scrapers.engine import fetch, get_shared_session, scrape_sources
 from utils import (
     create_material_entry, clean_text, extract_risk_info,
     extract_health_advice, format_chemical_data, calculate_risk_score
 )
 
 
+# 家具材料中常见的有害化学物质（名称、CAS 号、危害等级），按 CAS 号查询 PubChem
+PUBCHEM_CHEMICALS = [
+    {"name": "甲醛", "cas": "50-00-0", "hazard": "高"},
+    {"name": "脲醛树脂", "cas": "9011-05-6", "hazard": "中"},
+    {"name": "六价铬", "cas": "18540-29-9", "hazard": "高"},
+    {"name": "邻苯二甲酸二(2-乙基己)酯", "cas": "117-81-7", "hazard": "高"},
+    {"name": "DMF", "cas": "68-12-2", "hazard": "高"},
+    {"name": "氯化氢", "cas": "7647-01-0", "hazard": "高"},
+    {"name": "苯", "cas": "71-43-2", "hazard": "高"},
+    {"name": "甲苯", "cas": "108-88-3", "hazard": "中"},
+]
+
+# PubChem PUG REST 返回的化合物属性
+PUBCHEM_PROPERTIES = "Title,MolecularFormula,MolecularWeight,IUPACName"
+
+
 class FurnitureScraper:
     """家具材质数据爬虫"""
 
     def __init__(self, logger):
         self.logger = logger
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': SCRAPE_CONFIG['user_agent']
-        })
+        self.session = get_shared_session()
         self.all_data = []
 
     def scrape_all(self) -> List[Dict[str, Any]]:
@@ -29,17 +44,8 @@ class FurnitureScraper:
 
         self.logger.info(f"开始爬取 {len(furniture_sources)} 个家具数据源")
 
-        for source_key, source_info in furniture_sources.items():
-            self.logger.info(f"正在爬取: {source_info['name']}")
-            try:
-                data = self._scrape_source(source_key, source_info)
-                if data:
-                    self.all_data.extend(data)
-                    self.logger.info(f"从 {source_info['name']} 爬取到 {len(data)} 条数据")
-                time.sleep(SCRAPE_CONFIG['delay'])
-            except Exception as e:
-                self.logger.error(f"爬取 {source_info['name']} 失败: {str(e)}")
-                continue
+        # 各数据源并发爬取，同一主机的请求间隔由共享 Session 控制
+        self.all_data.extend(scrape_sources(furniture_sources, self._scrape_source, self.logger))
 
         return self.all_data
 
@@ -226,10 +232,40 @@ class FurnitureScraper:
         return []
 
     def _scrape_pubchem(self, source_info: Dict) -> List[Dict[str, Any]]:
-        """爬取 PubChem 化学物质数据"""
+        """爬取 PubChem 化学物质数据
+
+        通过 PUG REST 接口按 CAS 号查询 PUBCHEM_CHEMICALS 中各物质的分子式、
+        分子量与 IUPAC 名称；单个物质查询失败时记录日志并跳过。
+        """
         self.logger.info("爬取 PubChem 化学物质数据")
-        # 这里可以查询具体化学物质的详细信息
-        return []
+        base_url = source_info["url"].rstrip("/")
+
+        results = []
+        for chemical in PUBCHEM_CHEMICALS:
+            url = (
+                f"{base_url}/rest/pug/compound/name/{quote(chemical['cas'])}"
+                f"/property/{PUBCHEM_PROPERTIES}/JSON"
+            )
+            try:
+                response = fetch(url, session=self.session)
+                properties = response.json()["PropertyTable"]["Properties"][0]
+            except (requests.RequestException, ValueError, KeyError, IndexError) as e:
+                self.logger.warning(f"PubChem 查询失败: {chemical['name']} ({chemical['cas']}): {str(e)}")
+                continue
+
+            data = format_chemical_data(chemical)
+            data.update({
+                "name": chemical["name"],
+                "type": "chemical",
+                "english_name": properties.get("Title", ""),
+                "iupac_name": properties.get("IUPACName", ""),
+                "molecular_formula": properties.get("MolecularFormula", ""),
+                "molecular_weight": properties.get("MolecularWeight", ""),
+                "pubchem_cid": properties.get("CID"),
+            })
+            results.append(create_material_entry(data, "化学物质", source_info["name"]))
+
+        return results
 
     def _scrape_greenguard(self, source_info: Dict) -> List[Dict[str, Any]]:
         """爬取 Greenguard 认证数据"""
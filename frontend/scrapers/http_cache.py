@@ -0,0 +1,190 @@
+"""爬虫 HTTP 响应磁盘缓存
+
+目录结构::
+
+    bodies/ab/<sha256>.gz   响应正文（gzip 压缩，按内容 SHA-256 寻址，相同内容只存一份）
+    entries/<sha256>.json   每个 URL 一个条目：状态码、响应头、正文哈希、ETag、Last-Modified、抓取时间
+
+CachingAdapter 挂载在爬虫的 Session 上：
+
+- 条目在 max_age 秒内直接返回缓存，不访问网络，也不占用主机限速
+- 过期后带 If-None-Match / If-Modified-Since 重新验证，304 时刷新抓取时间并返回缓存
+- 离线模式只读缓存，未命中时抛出 ConnectionError
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from config import SCRAPE_CONFIG
+from scrapers.engine import PoliteAdapter
+
+# 正文已解压保存，这些响应头不再适用
+DROPPED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class HTTPCache:
+    """按 URL 索引、正文按内容寻址的磁盘缓存"""
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: 缓存目录
+        """
+        self.directory = directory
+
+    @staticmethod
+    def key(method: str, url: str) -> str:
+        return hashlib.sha256(f"{method.upper()} {url}".encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, 'entries', f"{key}.json")
+
+    def _body_path(self, digest: str) -> str:
+        return os.path.join(self.directory, 'bodies', digest[:2], f"{digest}.gz")
+
+    def get(self, method: str, url: str) -> Optional[Dict]:
+        """读取缓存条目，不存在或正文缺失时返回 None
+
+        Returns:
+            条目字典（含 body 字段）
+        """
+        try:
+            with open(self._entry_path(self.key(method, url)), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            with gzip.open(self._body_path(entry['sha256']), 'rb') as f:
+                entry['body'] = f.read()
+        except (OSError, ValueError, KeyError):
+            return None
+        return entry
+
+    def put(self, method: str, url: str, status: int, reason: str, headers: Dict, body: bytes) -> Dict:
+        """保存响应
+
+        Returns:
+            新条目（含 body 字段）
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        body_path = self._body_path(digest)
+        if not os.path.exists(body_path):
+            _atomic_write(body_path, gzip.compress(body))
+
+        headers = {k: v for k, v in headers.items() if k.lower() not in DROPPED_HEADERS}
+        entry = {
+            'url': url,
+            'status': status,
+            'reason': reason,
+            'headers': headers,
+            'sha256': digest,
+            'etag': headers.get('ETag') or headers.get('etag'),
+            'last_modified': headers.get('Last-Modified') or headers.get('last-modified'),
+            'fetched_at': time.time(),
+        }
+        self._write_entry(method, url, entry)
+        return {**entry, 'body': body}
+
+    def touch(self, method: str, url: str, entry: Dict, headers: Dict) -> Dict:
+        """重新验证通过（304）后刷新抓取时间与校验头"""
+        entry = {k: v for k, v in entry.items() if k != 'body'}
+        entry['fetched_at'] = time.time()
+        for name, field in (('ETag', 'etag'), ('Last-Modified', 'last_modified')):
+            value = headers.get(name)
+            if value:
+                entry[field] = value
+                entry['headers'][name] = value
+        self._write_entry(method, url, entry)
+        return entry
+
+    def _write_entry(self, method: str, url: str, entry: Dict) -> None:
+        _atomic_write(
+            self._entry_path(self.key(method, url)),
+            json.dumps(entry, ensure_ascii=False).encode('utf-8')
+        )
+
+
+class CachingAdapter(PoliteAdapter):
+    """带磁盘缓存的 PoliteAdapter（只缓存 GET 的 200 响应）"""
+
+    def __init__(
+        self,
+        cache_dir: str = SCRAPE_CONFIG['cache_dir'],
+        max_age: float = SCRAPE_CONFIG['cache_max_age'],
+        offline: bool = SCRAPE_CONFIG['offline'],
+        **kwargs
+    ):
+        """
+        Args:
+            cache_dir: 缓存目录
+            max_age: 缓存在多少秒内无需重新验证，0 表示每次都重新验证
+            offline: 离线模式，只使用缓存
+            **kwargs: 见 PoliteAdapter
+        """
+        super().__init__(**kwargs)
+        self.cache = HTTPCache(cache_dir)
+        self.max_age = max_age
+        self.offline = offline
+
+    def send(self, request, **kwargs):
+        if request.method != 'GET':
+            return super().send(request, **kwargs)
+
+        entry = self.cache.get(request.method, request.url)
+        if self.offline:
+            if entry is None:
+                raise requests.exceptions.ConnectionError(
+                    f"离线模式下缓存未命中: {request.url}", request=request
+                )
+            return self._build_response(request, entry)
+        if entry is not None and time.time() - entry['fetched_at'] < self.max_age:
+            return self._build_response(request, entry)
+
+        if entry is not None:
+            if entry.get('etag'):
+                request.headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                request.headers['If-Modified-Since'] = entry['last_modified']
+
+        response = super().send(request, **kwargs)
+        if entry is not None and response.status_code == 304:
+            response.close()
+            entry = {**self.cache.touch(request.method, request.url, entry, response.headers),
+                     'body': entry['body']}
+            return self._build_response(request, entry)
+        if response.status_code == 200:
+            self.cache.put(
+                request.method, request.url, response.status_code, response.reason,
+                dict(response.headers), response.content
+            )
+        return response
+
+    @staticmethod
+    def _build_response(request, entry: Dict) -> requests.Response:
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.reason = entry.get('reason')
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = entry['body']
+        response.url = request.url
+        response.request = request
+        response.from_cache = True
+        return response
@@ -0,0 +1,148 @@
+"""爬虫 HTTP 缓存与礼貌限制集成测试
+
+在本地启动一个模拟 PubChem PUG REST 的 HTTP 服务器（带 ETag），用真实的
+FurnitureScraper._scrape_pubchem 爬取三次：
+
+1. 首次爬取：全部 200，响应写入磁盘缓存
+2. 再次爬取（max_age=0，每次重新验证）：请求带 If-None-Match，服务器返回 304，结果与首次一致
+3. 关闭服务器后离线爬取：全部从缓存重放，结果与首次一致
+
+另外检查同一主机的请求按 delay 间隔发出、503 重试同样经过主机限速。
+
+运行: python test_scraper_cache.py（或 pytest test_scraper_cache.py）
+"""
+import hashlib
+import json
+import logging
+import re
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scrapers.engine import PoliteAdapter, create_session, fetch
+from scrapers.furniture_scraper import PUBCHEM_CHEMICALS, FurnitureScraper
+from scrapers.http_cache import CachingAdapter
+
+PUG_PATH = re.compile(r"^/rest/pug/compound/name/([^/]+)/property/[^/]+/JSON$")
+
+
+class FakePubChem(BaseHTTPRequestHandler):
+    """按 CAS 号返回化合物属性，支持 If-None-Match；记录每个请求"""
+
+    requests_log = []  # (时间, 路径, 状态码)
+    fail_first = 0  # 前 n 个请求返回 503
+
+    def do_GET(self):
+        match = PUG_PATH.match(self.path)
+        if type(self).fail_first > 0:
+            type(self).fail_first -= 1
+            self._reply(503, b"busy")
+            return
+        if match is None:
+            self._reply(404, b"not found")
+            return
+        cas = match.group(1)
+        body = json.dumps({"PropertyTable": {"Properties": [{
+            "CID": int(hashlib.md5(cas.encode()).hexdigest()[:6], 16),
+            "Title": f"compound {cas}",
+            "MolecularFormula": "CH2O",
+            "MolecularWeight": "30.026",
+            "IUPACName": f"iupac {cas}",
+        }]}}).encode()
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag:
+            self._reply(304, b"", etag)
+        else:
+            self._reply(200, body, etag)
+
+    def _reply(self, status, body, etag=None):
+        self.requests_log.append((time.monotonic(), self.path, status))
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        if status != 304:
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server():
+    FakePubChem.requests_log = []
+    FakePubChem.fail_first = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakePubChem)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def scrape_pubchem(base_url, adapter):
+    scraper = FurnitureScraper(logging.getLogger("test_scraper_cache"))
+    scraper.session = create_session(adapter=adapter)
+    return scraper._scrape_pubchem({"name": "PubChem", "url": base_url})
+
+
+def strip_timestamps(entries):
+    return [{k: v for k, v in entry.items() if k != "last_updated"} for entry in entries]
+
+
+def test_revalidation_and_offline_replay():
+    """304 重新验证与离线重放的结果与首次爬取一致"""
+    cache_dir = tempfile.mkdtemp()
+    server, base_url = start_server()
+    try:
+        first = scrape_pubchem(base_url, CachingAdapter(cache_dir=cache_dir, max_age=0, delay=0))
+        statuses = [status for _, _, status in FakePubChem.requests_log]
+        print(f"首次爬取: {len(first)} 条，状态码 {statuses}")
+        assert len(first) == len(PUBCHEM_CHEMICALS)
+        assert statuses == [200] * len(PUBCHEM_CHEMICALS)
+
+        FakePubChem.requests_log.clear()
+        second = scrape_pubchem(base_url, CachingAdapter(cache_dir=cache_dir, max_age=0, delay=0))
+        statuses = [status for _, _, status in FakePubChem.requests_log]
+        print(f"重新验证: {len(second)} 条，状态码 {statuses}")
+        assert statuses == [304] * len(PUBCHEM_CHEMICALS)
+        assert strip_timestamps(second) == strip_timestamps(first)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    try:
+        offline = scrape_pubchem(base_url, CachingAdapter(cache_dir=cache_dir, offline=True, delay=0))
+        print(f"离线重放: {len(offline)} 条")
+        assert strip_timestamps(offline) == strip_timestamps(first)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def test_requests_spaced_per_host_including_retries():
+    """同一主机的请求（含 503 重试）按 delay 间隔发出"""
+    server, base_url = start_server()
+    try:
+        FakePubChem.fail_first = 2
+        session = create_session(adapter=PoliteAdapter(delay=0.2, backoff_factor=0, retry_times=3))
+        for cas in ("50-00-0", "71-43-2"):
+            fetch(f"{base_url}/rest/pug/compound/name/{cas}/property/Title/JSON", session=session)
+        times = [t for t, _, _ in FakePubChem.requests_log]
+        statuses = [status for _, _, status in FakePubChem.requests_log]
+        gaps = [round(b - a, 2) for a, b in zip(times, times[1:])]
+        print(f"状态码 {statuses}，请求间隔 {gaps}")
+        assert statuses == [503, 503, 200, 200]
+        assert all(gap >= 0.18 for gap in gaps)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("爬虫 HTTP 缓存与礼貌限制集成测试")
+    print("=" * 60)
+    test_revalidation_and_offline_replay()
+    test_requests_spaced_per_host_including_retries()
+    print("✅ 全部通过")
@@ -3,21 +3,7 @@
 将知识库数据导入 ChromaDB 向量数据库
 """
 
-import chromadb
-from chromadb.config import Settings
-import json
-
-# 初始化 ChromaDB 客户端
-client = chromadb.Client(Settings(
-    chroma_db_impl="duckdb+parquet",
-    persist_directory="./chroma_db"  # 数据持久化目录
-))
-
-# 创建或获取集合
-collection = client.get_or_create_collection(
-    name="furniture_knowledge",
-    metadata={"description": "家具材料检测知识库"}
-)
+from knowledge_ingest import run_import
 
 # 知识库数据
 knowledge_data = [
@@ -147,74 +133,11 @@ knowledge_data = [
     }
 ]
 
-# 导入数据到 ChromaDB
-print("开始导入知识库数据...")
-
-for item in knowledge_data:
-    # 构建文档内容
-    document = f"""
-    材料类别: {item['category']}
-    材料类型: {item['material_type']}
-    """
-
-    if 'risk_points' in item:
-        document += f"\n风险点: {', '.join(item['risk_points'])}"
-
-    if 'visual_cues' in item:
-        document += f"\n视觉特征: {', '.join(item['visual_cues'])}"
-
-    if 'health_advice' in item:
-        document += f"\n健康建议: {item['health_advice']}"
-
-    if 'advantages' in item:
-        document += f"\n优点: {item['advantages']}"
-
-    if 'disadvantages' in item:
-        document += f"\n缺点: {item['disadvantages']}"
-
-    if 'content' in item:
-        document += f"\n内容: {item['content']}"
-
-    # 构建元数据
-    metadata = {
-        "category": item['category'],
-        "material_type": item['material_type'],
-        "risk_level": item.get('risk_level', 'unknown')
-    }
-
-    # 添加到集合
-    collection.add(
-        ids=[item['id']],
-        documents=[document],
-        metadatas=[metadata]
-    )
-
-    print(f"✓ 已导入: {item['category']}")
-
-print(f"\n✅ 成功导入 {len(knowledge_data)} 条知识库数据！")
 
-# 测试查询
-print("\n" + "="*50)
-print("测试查询功能...")
-print("="*50)
-
-test_queries = [
-    "这个柜子是刨花板的，安全吗？",
-    "密度板有什么问题？",
-    "儿童房用什么板材好？",
-    "如何识别劣质板材？"
-]
-
-for query in test_queries:
-    print(f"\n查询: {query}")
-    results = collection.query(
-        query_texts=[query],
-        n_results=2
+if __name__ == "__main__":
+    run_import(
+        "furniture_knowledge",
+        "家具材料检测知识库",
+        knowledge_data,
+        "知识库"
     )
-
-    print("相关知识:")
-    for i, doc in enumerate(results['documents'][0], 1):
-        print(f"{i}. {doc[:200]}...")
-    print("-" * 50)
-
-print("\n✅ 知识库导入完成！可以开始使用了。")
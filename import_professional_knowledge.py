@@ -3,21 +3,7 @@
 将扩展的知识库数据导入 ChromaDB 向量数据库
 """
 
-import chromadb
-from chromadb.config import Settings
-import json
-
-# 初始化 ChromaDB 客户端
-client = chromadb.Client(Settings(
-    chroma_db_impl="duckdb+parquet",
-    persist_directory="./chroma_db"
-))
-
-# 创建或获取集合
-collection = client.get_or_create_collection(
-    name="furniture_knowledge_pro",
-    metadata={"description": "专业家具材料检测知识库"}
-)
+from knowledge_ingest import run_import
 
 # 扩展的专业知识库数据
 knowledge_data = [
@@ -522,84 +508,11 @@ knowledge_data = [
     }
 ]
 
-# 导入数据到 ChromaDB
-print("开始导入专业知识库数据...")
-
-for item in knowledge_data:
-    # 构建文档内容
-    document = f"""
-    材料类别: {item['category']}
-    材料类型: {item['material_type']}
-    """
-
-    if 'alternative_names' in item and item['alternative_names']:
-        document += f"\n别名: {', '.join(item['alternative_names'])}"
-
-    if 'visual_cues' in item:
-        document += f"\n视觉特征: {', '.join(item['visual_cues'])}"
-
-    if 'risk_points' in item:
-        risk_descriptions = [f"{r['type']}({r['severity']}): {r['description']}" for r in item['risk_points']]
-        document += f"\n风险点: {'; '.join(risk_descriptions)}"
 
-    if 'health_advice' in item:
-        if isinstance(item['health_advice'], dict):
-            document += f"\n健康建议-通用: {item['health_advice']['general']}"
-            document += f"\n健康建议-孕妇: {item['health_advice']['pregnant']}"
-            document += f"\n健康建议-儿童: {item['health_advice']['children']}"
-        else:
-            document += f"\n健康建议: {item['health_advice']}"
-
-    if 'advantages' in item:
-        document += f"\n优点: {item['advantages']}"
-
-    if 'disadvantages' in item:
-        document += f"\n缺点: {item['disadvantages']}"
-
-    if 'price_range' in item:
-        document += f"\n价格区间: {item['price_range']}"
-
-    # 构建元数据
-    metadata = {
-        "category": item['category'],
-        "material_type": item['material_type'],
-        "risk_level": item.get('risk_level', 'unknown')
-    }
-
-    # 添加到集合
-    collection.add(
-        ids=[item['id']],
-        documents=[document],
-        metadatas=[metadata]
-    )
-
-    print(f"✓ 已导入: {item['category']} - {item['material_type']}")
-
-print(f"\n✅ 成功导入 {len(knowledge_data)} 条专业知识库数据！")
-
-# 测试查询
-print("\n" + "="*50)
-print("测试查询功能...")
-print("="*50)
-
-test_queries = [
-    "橡木家具有什么特点？",
-    "胡桃木适合儿童房吗？",
-    "真皮沙发和科技布沙发哪个好？",
-    "棉麻沙发容易清洁吗？",
-    "什么材料最环保？"
-]
-
-for query in test_queries:
-    print(f"\n查询: {query}")
-    results = collection.query(
-        query_texts=[query],
-        n_results=2
+if __name__ == "__main__":
+    run_import(
+        "furniture_knowledge_pro",
+        "专业家具材料检测知识库",
+        knowledge_data,
+        "专业知识库"
     )
-
-    print("相关知识:")
-    for i, doc in enumerate(results['documents'][0], 1):
-        print(f"{i}. {doc[:200]}...")
-    print("-" * 50)
-
-print("\n✅ 专业知识库导入完成！可以开始使用了。")
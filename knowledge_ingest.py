@@ -0,0 +1,735 @@
+"""
+知识库导入引擎
+流式读取知识条目，在进程池中按批构建文档、计算嵌入向量，再批量写入 ChromaDB
+
+- 条目以迭代器读取，同时在途的批次数有上限，内存占用与语料总量无关
+- 每个工作进程只加载一次嵌入模型，每批只做一次推理、一次写入
+- 工作进程以 spawn 方式启动，在导入 ChromaDB / NumPy 之前设置线程环境变量，
+  并把 ONNX 推理线程数限制为 CPU 核数 / 进程数，避免进程间线程争抢
+- 导入过程中输出进度与吞吐量 (docs/sec)
+- 增量导入：按导入清单 (SQLite 中的 id -> 内容哈希) 只嵌入并 upsert 新增或变更的
+  条目，删除已移除的条目；清单按批查询、在磁盘上求差集。先在主进程中只按清单求
+  差集，没有变更时直接返回，不导入 ChromaDB、不启动进程池、不加载嵌入模型
+
+用法（在导入脚本中）:
+    client, collection = open_collection("furniture_knowledge", "家具材料检测知识库")
+    manifest = ImportManifest(manifest_path("furniture_knowledge"))
+    stats = KnowledgeIngestor(collection, workers=4, manifest=manifest).ingest(knowledge_data)
+
+大规模语料可保存为 JSON Lines，用 JsonlSource 流式读取（可重复迭代，先求差集再导入）:
+    KnowledgeIngestor(collection).ingest(JsonlSource("corpus.jsonl"))
+
+集合也可以传入打开函数，只在有条目需要写入或删除时才调用:
+    KnowledgeIngestor(lambda: open_collection(...)[1], manifest=manifest)
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+# 导入脚本使用的持久化目录（仓库根目录下的 chroma_db，与运行目录无关）
+PERSIST_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chroma_db")
+# 导入清单（id -> 内容哈希）保存在持久化目录下的子目录中
+MANIFEST_DIRECTORY = "manifests"
+MANIFEST_VERSION = 2
+
+# 工作进程内的批处理状态：嵌入模型、构建函数与只读清单（由 _init_worker 设置）
+_worker: Dict = {}
+
+
+def build_document(item: Dict) -> str:
+    """将知识条目拼接为用于嵌入与检索的文档文本
+
+    兼容三个导入脚本的数据格式：risk_points 可以是字符串列表或
+    {type, severity, description} 列表，health_advice 可以是字符串或
+    {general, pregnant, children} 字典。
+    """
+    document = f"""
+    材料类别: {item['category']}
+    材料类型: {item['material_type']}
+    """
+
+    if item.get('alternative_names'):
+        document += f"\n别名: {', '.join(item['alternative_names'])}"
+
+    if 'visual_cues' in item:
+        document += f"\n视觉特征: {', '.join(item['visual_cues'])}"
+
+    if 'risk_points' in item:
+        risk_points = item['risk_points']
+        if risk_points and isinstance(risk_points[0], dict):
+            risk_descriptions = [f"{r['type']}({r['severity']}): {r['description']}" for r in risk_points]
+            document += f"\n风险点: {'; '.join(risk_descriptions)}"
+        else:
+            document += f"\n风险点: {', '.join(risk_points)}"
+
+    if 'health_advice' in item:
+        if isinstance(item['health_advice'], dict):
+            document += f"\n健康建议-通用: {item['health_advice']['general']}"
+            document += f"\n健康建议-孕妇: {item['health_advice']['pregnant']}"
+            document += f"\n健康建议-儿童: {item['health_advice']['children']}"
+        else:
+            document += f"\n健康建议: {item['health_advice']}"
+
+    if 'advantages' in item:
+        document += f"\n优点: {item['advantages']}"
+
+    if 'disadvantages' in item:
+        document += f"\n缺点: {item['disadvantages']}"
+
+    if 'price_range' in item:
+        document += f"\n价格区间: {item['price_range']}"
+
+    if 'content' in item:
+        document += f"\n内容: {item['content']}"
+
+    return document
+
+
+def build_metadata(item: Dict) -> Dict:
+    """知识条目的检索元数据"""
+    return {
+        "category": item['category'],
+        "material_type": item['material_type'],
+        "risk_level": item.get('risk_level', 'unknown')
+    }
+
+
+def create_embedding_function(model_name: str = "", threads: int = 0):
+    """创建嵌入模型，留空使用 ChromaDB 默认模型（与后端语义检索一致）
+
+    Args:
+        model_name: sentence-transformers 模型名，留空使用 ChromaDB 默认的 ONNX 模型
+        threads: 单次推理的线程数，0 表示不限制
+    """
+    from chromadb.utils import embedding_functions
+
+    if model_name:
+        if threads > 0:
+            import torch
+            torch.set_num_threads(threads)
+        return embedding_functions.SentenceTransformerEmbeddingFunction(model_name=model_name)
+
+    function = embedding_functions.DefaultEmbeddingFunction()
+    if threads > 0:
+        _limit_onnx_threads(function, threads)
+    return function
+
+
+def _limit_onnx_threads(function, threads: int) -> None:
+    """预先创建限制线程数的 ONNX 会话
+
+    onnxruntime 不读取 OMP_NUM_THREADS，线程数只能通过 SessionOptions 设置；
+    ChromaDB 的默认模型不接受会话参数，这里按它的方式加载分词器与模型。
+    """
+    from tokenizers import Tokenizer
+
+    function._download_model_if_not_exists()
+    model_dir = function.DOWNLOAD_PATH / function.EXTRACTED_FOLDER_NAME
+    # 与 ONNXMiniLM_L6_V2._init_model_and_tokenizer 的设置相同
+    tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+    tokenizer.enable_truncation(max_length=256)
+    tokenizer.enable_padding(pad_id=0, pad_token="[PAD]", length=256)
+
+    options = function.ort.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = 1
+    function.tokenizer = tokenizer
+    function.model = function.ort.InferenceSession(str(model_dir / "model.onnx"), sess_options=options)
+
+
+class LazyEmbeddingFunction:
+    """首次调用时才加载模型，没有变更的导入不必加载"""
+
+    def __init__(self, model_name: str, threads: int = 0):
+        self.model_name = model_name
+        self.threads = threads
+        self._function = None
+
+    def __call__(self, texts):
+        if self._function is None:
+            self._function = create_embedding_function(self.model_name, self.threads)
+        return self._function(texts)
+
+
+def content_hash(document: str, metadata: Dict) -> str:
+    """文档与元数据的内容哈希，用于判断条目是否变更"""
+    payload = json.dumps([document, metadata], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class BatchResult(NamedTuple):
+    """一批条目在工作进程中的处理结果"""
+    ids: List[str]  # 需要写入的条目（新增或变更）
+    documents: List[str]
+    metadatas: List[Dict]
+    embeddings: List[List[float]]
+    digests: List[Tuple[str, str]]  # 本批全部条目的 (id, 内容哈希)
+    added: int
+    updated: int
+    unchanged: int
+
+
+def _init_worker(
+    model_name: str,
+    threads: int,
+    document_builder: Callable[[Dict], str],
+    metadata_builder: Callable[[Dict], Dict],
+    manifest_file: Optional[str],
+    force: bool
+) -> None:
+    """工作进程初始化：限制推理线程数，记录构建函数并只读打开导入清单
+
+    进程以 spawn 方式启动，此时尚未导入 NumPy / ChromaDB，线程环境变量能够生效。
+    嵌入模型在第一批有变更的条目到来时才加载。
+    """
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[name] = str(threads)
+    _setup_process(model_name, threads, document_builder, metadata_builder, manifest_file, force)
+
+
+def _setup_process(
+    model_name: str,
+    threads: int,
+    document_builder: Callable[[Dict], str],
+    metadata_builder: Callable[[Dict], Dict],
+    manifest_file: Optional[str],
+    force: bool
+) -> None:
+    """设置当前进程的批处理状态（--workers 0 时在主进程内调用）"""
+    global _worker
+    _worker = {
+        'embedding_function': LazyEmbeddingFunction(model_name, threads),
+        'document_builder': document_builder,
+        'metadata_builder': metadata_builder,
+        'manifest': ImportManifest.open_reader(manifest_file) if manifest_file else None,
+        'force': force,
+    }
+
+
+def _process_batch(items: List[Dict]) -> BatchResult:
+    """构建一批条目的文档与元数据，与清单比较后只对变更的条目计算嵌入向量"""
+    build_doc = _worker['document_builder']
+    build_meta = _worker['metadata_builder']
+    ids: List[str] = []
+    documents: List[str] = []
+    metadatas: List[Dict] = []
+    digests: List[Tuple[str, str]] = []
+    added = updated = unchanged = 0
+
+    item_ids = [str(item['id']) for item in items]
+    reader = _worker['manifest']
+    previous = ImportManifest.lookup(reader, item_ids) if reader is not None else {}
+    for item_id, item in zip(item_ids, items):
+        document = build_doc(item)
+        metadata = build_meta(item)
+        digest = content_hash(document, metadata)
+        digests.append((item_id, digest))
+
+        old = previous.get(item_id)
+        if old == digest and not _worker['force']:
+            unchanged += 1
+            continue
+        if old is None:
+            added += 1
+        else:
+            updated += 1
+        ids.append(item_id)
+        documents.append(document)
+        metadatas.append(metadata)
+
+    embeddings = (
+        [list(map(float, v)) for v in _worker['embedding_function'](documents)]
+        if documents else []
+    )
+    return BatchResult(ids, documents, metadatas, embeddings, digests, added, updated, unchanged)
+
+
+def iter_jsonl(path: str) -> Iterator[Dict]:
+    """逐行读取 JSON Lines 语料，不一次性载入内存"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+class JsonlSource:
+    """可重复迭代的 JSON Lines 语料，每次迭代重新打开文件流式读取"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter_jsonl(self.path)
+
+
+def batched(items: Iterable, batch_size: int) -> Iterator[List]:
+    """将条目流切分为批"""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def open_collection(
+    name: str,
+    description: str,
+    persist_directory: str = PERSIST_DIRECTORY,
+    embedding_model: str = ""
+):
+    """创建或获取集合
+
+    Args:
+        name: 集合名
+        description: 集合描述
+        persist_directory: 数据持久化目录
+        embedding_model: 嵌入模型名，需与导入时一致（集合用它计算 query_texts 的向量）
+
+    Returns:
+        (client, collection)
+    """
+    import chromadb
+    from chromadb.config import Settings
+
+    client = chromadb.Client(Settings(
+        chroma_db_impl="duckdb+parquet",
+        persist_directory=persist_directory  # 数据持久化目录
+    ))
+    kwargs = {}
+    if embedding_model:
+        kwargs["embedding_function"] = LazyEmbeddingFunction(embedding_model)
+    collection = client.get_or_create_collection(
+        name=name,
+        metadata={"description": description},
+        **kwargs
+    )
+    return client, collection
+
+
+def manifest_path(collection_name: str, persist_directory: str = PERSIST_DIRECTORY) -> Path:
+    """集合的导入清单路径（保存在 ChromaDB 持久化目录下）"""
+    return Path(persist_directory) / MANIFEST_DIRECTORY / f"{collection_name}.sqlite"
+
+
+class ImportManifest:
+    """导入清单：记录已导入条目的 id -> 内容哈希（SQLite）
+
+    清单保存在磁盘上，导入时逐批按 id 查询旧哈希，本次出现的条目写入临时表，
+    结束时用 SQL 求出已移除的条目并流式返回，内存占用与条目总数无关。
+    嵌入模型变更或清单格式不符时清空清单（全部重新嵌入）。
+    """
+
+    # SQLite 单条语句的参数个数上限（旧版本为 999）
+    LOOKUP_CHUNK = 900
+
+    def __init__(self, path: Path, embedding_model: str = ""):
+        self.path = Path(path)
+        self.embedding_model = embedding_model
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def open(self) -> None:
+        """打开（必要时创建）清单，并准备本次导入的临时表"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("CREATE TABLE IF NOT EXISTS items (id TEXT PRIMARY KEY, digest TEXT NOT NULL)")
+        conn.execute("CREATE TEMP TABLE seen (id TEXT PRIMARY KEY, digest TEXT)")
+        meta = dict(conn.execute("SELECT key, value FROM meta"))
+        expected = {'version': str(MANIFEST_VERSION), 'embedding_model': self.embedding_model}
+        if meta != expected:
+            with conn:
+                conn.execute("DELETE FROM items")
+                conn.execute("DELETE FROM meta")
+                conn.executemany("INSERT INTO meta VALUES (?, ?)", expected.items())
+        self._conn = conn
+        self._migrate_json()
+
+    def _migrate_json(self) -> None:
+        """导入旧版 JSON 清单（一次性）"""
+        legacy = self.path.with_suffix('.json')
+        if not legacy.exists():
+            return
+        try:
+            with open(legacy, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠ 旧版导入清单无法读取，已忽略: {e}")
+            data = {}
+        if data.get('embedding_model') == self.embedding_model and not self.count():
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO items VALUES (?, ?)", data.get('items', {}).items()
+                )
+        legacy.unlink()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def reset(self) -> None:
+        """清空清单（集合被清空或重建时清单不再可信）"""
+        with self._conn:
+            self._conn.execute("DELETE FROM items")
+
+    def rewind(self) -> None:
+        """清空本次导入已登记的条目（求差集后重新遍历条目导入）"""
+        self._conn.execute("DELETE FROM seen")
+
+    def digests(self, item_ids: List[str]) -> Dict[str, str]:
+        """按 id 批量查询旧哈希"""
+        return self.lookup(self._conn, item_ids)
+
+    def claim(self, item_id: str) -> bool:
+        """登记本次导入的条目，返回 False 表示 ID 重复"""
+        cursor = self._conn.execute("INSERT OR IGNORE INTO seen (id) VALUES (?)", (item_id,))
+        return cursor.rowcount == 1
+
+    def record(self, digests: Iterable[Tuple[str, str]]) -> None:
+        """记录本次导入条目的内容哈希"""
+        self._conn.executemany(
+            "UPDATE seen SET digest = ? WHERE id = ?",
+            ((digest, item_id) for item_id, digest in digests)
+        )
+
+    def removed(self) -> Iterator[str]:
+        """清单中有而本次导入中没有的条目"""
+        cursor = self._conn.execute(
+            "SELECT id FROM items WHERE id NOT IN (SELECT id FROM seen) ORDER BY id"
+        )
+        for (item_id,) in cursor:
+            yield item_id
+
+    def commit(self, prune: bool) -> None:
+        """用本次导入的结果更新清单
+
+        Args:
+            prune: 是否同时删除已移除的条目（不删除时保留其旧哈希）
+        """
+        with self._conn:
+            if prune:
+                self._conn.execute("DELETE FROM items WHERE id NOT IN (SELECT id FROM seen)")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO items SELECT id, digest FROM seen WHERE digest IS NOT NULL"
+            )
+            self._conn.execute("DELETE FROM seen")
+
+    @staticmethod
+    def open_reader(path: str) -> sqlite3.Connection:
+        """只读打开清单（工作进程中按 id 查询旧哈希）"""
+        return sqlite3.connect(f"file:{Path(path).as_posix()}?mode=ro", uri=True, timeout=30)
+
+    @classmethod
+    def lookup(cls, conn: sqlite3.Connection, item_ids: List[str]) -> Dict[str, str]:
+        """按 id 批量查询旧哈希"""
+        digests: Dict[str, str] = {}
+        for start in range(0, len(item_ids), cls.LOOKUP_CHUNK):
+            chunk = item_ids[start:start + cls.LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            digests.update(conn.execute(
+                f"SELECT id, digest FROM items WHERE id IN ({placeholders})", chunk
+            ))
+        return digests
+
+
+@dataclass
+class IngestStats:
+    """导入统计"""
+    documents: int = 0  # 嵌入并写入的条数（新增 + 更新）
+    batches: int = 0
+    seconds: float = 0.0
+    added: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.documents / self.seconds if self.seconds else 0.0
+
+
+class KnowledgeIngestor:
+    """批量、并行嵌入的增量知识库导入引擎
+
+    有清单且条目可重复迭代时，先在主进程中构建文档、计算内容哈希并与清单比较，
+    没有新增、变更或需要删除的条目时直接返回：不打开集合、不启动进程池、
+    不改写清单。有变更时再遍历一次条目：主进程只读取条目、登记 ID 并写入集合，
+    文档构建、清单比较、嵌入推理都在工作进程中按批完成，只有新增或变更的条目
+    才会嵌入并 upsert。导入结束后删除清单中有而本次数据中没有的条目。
+    """
+
+    def __init__(
+        self,
+        collection,
+        batch_size: int = 256,
+        workers: Optional[int] = None,
+        embedding_model: str = "",
+        max_pending: Optional[int] = None,
+        document_builder: Callable[[Dict], str] = build_document,
+        metadata_builder: Callable[[Dict], Dict] = build_metadata,
+        progress_every: int = 10000,
+        manifest: Optional[ImportManifest] = None,
+        prune: bool = True,
+        force: bool = False
+    ):
+        """
+        Args:
+            collection: ChromaDB 集合，或返回集合的无参函数（第一次需要集合时才调用）
+            batch_size: 每批条目数（一次推理、一次写入）
+            workers: 嵌入进程数，0 表示在当前进程内计算，默认 min(CPU 核数, 4)
+            embedding_model: 嵌入模型名，留空使用 ChromaDB 默认模型
+            max_pending: 同时在途的最大批次数，默认为进程数的 2 倍，决定内存上限
+            document_builder: 文档构建函数（需为模块级函数，以便传给工作进程）
+            metadata_builder: 元数据构建函数（同上）
+            progress_every: 每导入多少条输出一次进度，0 表示不输出
+            manifest: 导入清单，为空时每次全部导入
+            prune: 是否删除本次数据中已不存在的条目（需要导入清单）
+            force: 忽略清单中的哈希，全部重新嵌入（仍按清单删除已移除的条目）
+        """
+        if hasattr(collection, 'upsert'):
+            self._collection, self._open_collection = collection, None
+        else:
+            self._collection, self._open_collection = None, collection
+        self.batch_size = batch_size
+        self.workers = min(os.cpu_count() or 1, 4) if workers is None else workers
+        self.embedding_model = embedding_model
+        self.max_pending = max_pending or max(2 * self.workers, 1)
+        self.document_builder = document_builder
+        self.metadata_builder = metadata_builder
+        self.progress_every = progress_every
+        self.manifest = manifest
+        self.prune = prune
+        self.force = force
+
+    @property
+    def collection(self):
+        """ChromaDB 集合（传入打开函数时在第一次访问时打开）"""
+        if self._collection is None:
+            self._collection = self._open_collection()
+        return self._collection
+
+    def ingest(self, items: Iterable[Dict]) -> IngestStats:
+        """导入知识条目
+
+        Args:
+            items: 知识条目（列表、JsonlSource 或一次性迭代器），每条需有 id、category、
+                material_type；一次性迭代器无法先求差集，直接走完整导入流程
+
+        Returns:
+            导入统计（耗时包含打开集合、启动进程池的时间）
+        """
+        stats = IngestStats()
+        start = time.perf_counter()
+        pool: Optional[ProcessPoolExecutor] = None
+        diffed = False
+        try:
+            manifest_file = None
+            if self.manifest:
+                self.manifest.open()
+                # 只按清单判断，集合被清空而清单仍在时需用 force（--full）重新导入
+                if not self.force and self.manifest.count() and iter(items) is not items:
+                    diffed = True
+                    if not self._diff(items, stats):
+                        stats.seconds = time.perf_counter() - start
+                        return stats
+                    stats = IngestStats()
+                    self.manifest.rewind()
+                if self.manifest.count() and not self.collection.count():
+                    # 集合已被清空或重建，清单不再可信
+                    self.manifest.reset()
+                manifest_file = str(self.manifest.path)
+            builders = (self.document_builder, self.metadata_builder, manifest_file, self.force)
+            unique_items = self._unique(items, warn=not diffed)
+
+            if self.workers <= 0:
+                _setup_process(self.embedding_model, 0, *builders)
+                for batch in batched(unique_items, self.batch_size):
+                    self._write(_process_batch(batch), stats, start)
+            else:
+                # spawn: fork 出的子进程已继承父进程导入的 NumPy / ChromaDB，线程设置不再生效
+                pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(
+                        self.embedding_model,
+                        max((os.cpu_count() or 1) // self.workers, 1),
+                        *builders
+                    )
+                )
+                pending: "deque[Future]" = deque()
+                for batch in batched(unique_items, self.batch_size):
+                    # 在途批次达到上限时先写入最早的一批，限制内存占用并保持写入顺序
+                    if len(pending) >= self.max_pending:
+                        self._write(pending.popleft().result(), stats, start)
+                    pending.append(pool.submit(_process_batch, batch))
+                while pending:
+                    self._write(pending.popleft().result(), stats, start)
+
+            if self.manifest:
+                if self.prune:
+                    for ids in batched(self.manifest.removed(), self.batch_size):
+                        self.collection.delete(ids=ids)
+                        stats.deleted += len(ids)
+                self.manifest.commit(self.prune)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            if self.manifest:
+                self.manifest.close()
+
+        stats.seconds = time.perf_counter() - start
+        return stats
+
+    def _diff(self, items: Iterable[Dict], stats: IngestStats) -> bool:
+        """在主进程中按清单求差集，统计新增、变更与未变的条目
+
+        只构建文档与内容哈希，不打开集合、不加载嵌入模型。
+
+        Returns:
+            是否有需要写入或删除的条目
+        """
+        for batch in batched(self._unique(items, warn=True), self.batch_size):
+            item_ids = [str(item['id']) for item in batch]
+            previous = self.manifest.digests(item_ids)
+            for item_id, item in zip(item_ids, batch):
+                digest = content_hash(self.document_builder(item), self.metadata_builder(item))
+                old = previous.get(item_id)
+                if old is None:
+                    stats.added += 1
+                elif old != digest:
+                    stats.updated += 1
+                else:
+                    stats.unchanged += 1
+        if stats.added or stats.updated:
+            return True
+        return self.prune and next(self.manifest.removed(), None) is not None
+
+    def _unique(self, items: Iterable[Dict], warn: bool = True) -> Iterator[Dict]:
+        """跳过重复 ID 的条目（有清单时登记在清单的临时表中，不占用内存）
+
+        Args:
+            items: 知识条目
+            warn: 是否提示重复的 ID（求差集时已提示过的不再重复提示）
+        """
+        seen: Set[str] = set()
+        for item in items:
+            item_id = str(item['id'])
+            if self.manifest:
+                is_new = self.manifest.claim(item_id)
+            else:
+                is_new = item_id not in seen
+                seen.add(item_id)
+            if not is_new:
+                if warn:
+                    print(f"⚠ 重复的条目 ID，已跳过: {item_id}")
+                continue
+            yield item
+
+    def _write(self, batch: BatchResult, stats: IngestStats, start: float) -> None:
+        if self.manifest:
+            self.manifest.record(batch.digests)
+        stats.added += batch.added
+        stats.updated += batch.updated
+        stats.unchanged += batch.unchanged
+        if not batch.ids:
+            return
+        # upsert: 已存在的 ID 覆盖更新（清单缺失或与集合不一致时也能重复导入）
+        self.collection.upsert(
+            ids=batch.ids,
+            embeddings=batch.embeddings,
+            documents=batch.documents,
+            metadatas=batch.metadatas
+        )
+        previous = stats.documents
+        stats.documents += len(batch.ids)
+        stats.batches += 1
+        if self.progress_every and stats.documents // self.progress_every > previous // self.progress_every:
+            elapsed = time.perf_counter() - start
+            print(f"  已导入 {stats.documents} 条，{stats.documents / elapsed:.0f} docs/sec")
+
+
+def run_import(
+    collection_name: str,
+    description: str,
+    knowledge_data: Iterable[Dict],
+    label: str = "知识库"
+) -> None:
+    """导入脚本的公共入口：解析命令行参数、导入并用标注查询集自检
+
+    Args:
+        collection_name: 集合名
+        description: 集合描述
+        knowledge_data: 知识条目
+        label: 输出中使用的知识库名称
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description=f"导入{label}数据到 ChromaDB")
+    parser.add_argument("--source", help="从 JSON Lines 文件流式导入，替代脚本内置数据")
+    parser.add_argument("--batch-size", type=int, default=256, help="每批条目数")
+    parser.add_argument("--workers", type=int, default=None, help="嵌入进程数，0 表示在当前进程内计算")
+    parser.add_argument("--embedding-model", default="", help="嵌入模型名，留空使用 ChromaDB 默认模型")
+    parser.add_argument("--full", action="store_true", help="全部重新嵌入（仍按导入清单删除已移除的条目）")
+    parser.add_argument("--no-prune", action="store_true", help="不删除本次数据中已不存在的条目")
+    args = parser.parse_args()
+
+    if args.source:
+        knowledge_data = JsonlSource(args.source)
+
+    # 集合在有条目需要写入或删除时才打开，没有变更时不导入 ChromaDB
+    opened: Dict = {}
+
+    def get_collection():
+        if not opened:
+            opened['client'], opened['collection'] = open_collection(
+                collection_name, description, embedding_model=args.embedding_model
+            )
+        return opened['collection']
+
+    manifest = ImportManifest(manifest_path(collection_name), args.embedding_model)
+
+    print(f"开始导入{label}数据...")
+    stats = KnowledgeIngestor(
+        get_collection,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        embedding_model=args.embedding_model,
+        manifest=manifest,
+        prune=not args.no_prune,
+        force=args.full
+    ).ingest(knowledge_data)
+    if (stats.documents or stats.deleted) and hasattr(opened['client'], "persist"):
+        opened['client'].persist()
+    print(
+        f"\n✅ {label}数据已同步: 新增 {stats.added}，更新 {stats.updated}，"
+        f"未变 {stats.unchanged}，删除 {stats.deleted}"
+        f"（嵌入 {stats.documents} 条，{stats.seconds:.2f} 秒）"
+    )
+    if stats.documents:
+        print(f"  {stats.batches} 批，{stats.docs_per_second:.0f} docs/sec")
+
+    if not stats.documents and not stats.deleted:
+        print("没有变更，跳过检索自检")
+        return
+    # 标注查询集见 retrieval_queries.json，完整的分层评估: python retrieval_benchmark.py
+    from retrieval_benchmark import print_collection_check
+
+    print_collection_check(opened['collection'], collection_name)
+    print(f"\n✅ {label}导入完成！可以开始使用了。")
@@ -0,0 +1,328 @@
+"""
+知识库检索质量与延迟基准测试
+用标注查询集 (retrieval_queries.json) 评估三个导入脚本所建知识集合上的各检索层：
+
+- resolver: 后端 SubTypeResolver 把查询解析到知识库材料（backend/app/data/knowledge_base.json），
+  返回类别对应该材料的知识条目
+- ngram: 字符二元组 BM25（后端 app.services.text_index）
+- vector: ChromaDB 语义检索（后端 SemanticSearchService，需要已导入的 chroma_db）
+- numpy: 内存映射向量索引（后端 build_vector_index.py 导出，需要索引目录）
+
+每层统计 recall@k、MRR 与单次查询延迟 p50/p99，结果写入 JSON 报告；
+提供 --baseline 时与上次报告比较，质量指标下降超过容差或延迟显著变慢时返回非零退出码。
+
+用法:
+    python retrieval_benchmark.py
+    python retrieval_benchmark.py --output reports/retrieval.json --baseline reports/retrieval_last.json
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+ROOT_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(ROOT_DIRECTORY, "backend"))
+
+from knowledge_ingest import PERSIST_DIRECTORY, build_document  # noqa: E402
+from app.utils.stats import percentile  # noqa: E402
+
+QUERIES_PATH = os.path.join(ROOT_DIRECTORY, "retrieval_queries.json")
+KNOWLEDGE_BASE_PATH = os.path.join(ROOT_DIRECTORY, "backend", "app", "data", "knowledge_base.json")
+DEFAULT_INDEX_DIRECTORY = os.path.join(ROOT_DIRECTORY, "backend", "data", "vector_index")
+
+# (集合名, 导入脚本模块)
+SOURCES = (
+    ("furniture_knowledge", "import_knowledge"),
+    ("furniture_knowledge_pro", "import_professional_knowledge"),
+    ("furniture_knowledge_polymer", "import_polymer_knowledge"),
+)
+K_VALUES = (1, 3, 5)
+MRR_CUTOFF = 10
+QUALITY_METRICS = tuple(f"recall@{k}" for k in K_VALUES) + ("mrr",)
+
+
+def load_knowledge_items() -> List[Tuple[str, Dict]]:
+    """读取导入脚本中的知识条目
+
+    Returns:
+        [(集合名, 条目)]
+    """
+    items = []
+    for collection_name, module_name in SOURCES:
+        module = importlib.import_module(module_name)
+        items.extend((collection_name, item) for item in module.knowledge_data)
+    return items
+
+
+def load_labelled_queries(path: str = QUERIES_PATH, collection: Optional[str] = None) -> List[Dict]:
+    """读取标注查询集
+
+    Args:
+        path: 查询集文件，每条为 {query, relevant: [条目 id], collection}
+        collection: 只返回该集合的查询，为空返回全部
+
+    Returns:
+        标注查询列表
+    """
+    with open(path, encoding='utf-8') as f:
+        queries = json.load(f)
+    if collection:
+        queries = [q for q in queries if q.get('collection') == collection]
+    return queries
+
+
+class ResolverRetriever:
+    """后端 SubTypeResolver（精确 / 别名 / 子串匹配，基于 backend/app/data/knowledge_base.json）
+
+    与材料问答服务相同：查询解析到知识库材料（不采用模糊匹配），再返回类别解析到
+    同一材料的知识条目，按导入脚本中的顺序排列。
+    """
+
+    def __init__(self, items: Sequence[Tuple[str, Dict]], knowledge_base_path: str = KNOWLEDGE_BASE_PATH):
+        from app.services.knowledge_base import KnowledgeBaseSnapshot
+
+        with open(knowledge_base_path, encoding='utf-8') as f:
+            materials = json.load(f).get('materials', [])
+        self.resolver = KnowledgeBaseSnapshot.from_materials(materials).sub_type_resolver
+        self.items_by_material: Dict[str, List[str]] = {}
+        for _, item in items:
+            material_id = self._resolve(item['category'])
+            if material_id:
+                self.items_by_material.setdefault(material_id, []).append(item['id'])
+
+    def _resolve(self, text: str) -> Optional[str]:
+        match = self.resolver.resolve(text)
+        if match is None or match.method == 'fuzzy':
+            return None
+        return match.material.id
+
+    def search(self, query: str, top_k: int) -> List[str]:
+        material_id = self._resolve(query)
+        return self.items_by_material.get(material_id, [])[:top_k] if material_id else []
+
+
+class NgramRetriever:
+    """字符二元组 BM25（与后端视觉特征检索相同的索引）"""
+
+    def __init__(self, items: Sequence[Tuple[str, Dict]]):
+        from app.services.text_index import BM25Index
+
+        self.ids = [item['id'] for _, item in items]
+        self.index = BM25Index([build_document(item) for _, item in items])
+
+    def search(self, query: str, top_k: int) -> List[str]:
+        return [self.ids[doc_id] for doc_id, _ in self.index.search(query, top_k)]
+
+
+class SemanticRetriever:
+    """后端语义检索服务（ChromaDB 或内存映射向量索引），不使用查询向量缓存"""
+
+    def __init__(self, service):
+        self.service = service
+        if not service._load():
+            raise RuntimeError(f"语义检索不可用: {service.persist_directory}")
+
+    def search(self, query: str, top_k: int) -> List[str]:
+        return [hit.id for hit in self.service.search_many_sync([query], top_k)[0]]
+
+
+class CollectionRetriever:
+    """直接查询 ChromaDB 集合（导入脚本导入后的自检）"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def search(self, query: str, top_k: int) -> List[str]:
+        return self.collection.query(query_texts=[query], n_results=top_k)['ids'][0]
+
+
+def create_retrievers(
+    tiers: Sequence[str],
+    persist_directory: str,
+    index_directory: str
+) -> Tuple[Dict[str, object], Dict[str, str]]:
+    """创建各检索层，不可用的层记录原因后跳过
+
+    Returns:
+        (检索层, 跳过原因)
+    """
+    factories: Dict[str, Callable[[], object]] = {
+        "resolver": lambda: ResolverRetriever(load_knowledge_items()),
+        "ngram": lambda: NgramRetriever(load_knowledge_items()),
+        "vector": lambda: SemanticRetriever(_semantic_service(persist_directory)),
+        "numpy": lambda: SemanticRetriever(_vector_index_service(index_directory)),
+    }
+    retrievers, skipped = {}, {}
+    for tier in tiers:
+        try:
+            retrievers[tier] = factories[tier]()
+        except Exception as e:
+            skipped[tier] = str(e)
+    return retrievers, skipped
+
+
+def _semantic_service(persist_directory: str):
+    from app.services.semantic_search import SemanticSearchService
+
+    return SemanticSearchService(
+        persist_directory, [name for name, _ in SOURCES], cache_size=0
+    )
+
+
+def _vector_index_service(index_directory: str):
+    from app.services.vector_index import VectorIndexSearchService
+
+    return VectorIndexSearchService(index_directory, cache_size=0)
+
+
+def evaluate(retriever, queries: Sequence[Dict]) -> Dict:
+    """评估一个检索层
+
+    Args:
+        retriever: 提供 search(query, top_k) -> [条目 id] 的检索器
+        queries: 标注查询
+
+    Returns:
+        recall@k、MRR、延迟 (毫秒) 与未命中的查询
+    """
+    top_k = max(max(K_VALUES), MRR_CUTOFF)
+    recalls = {k: [] for k in K_VALUES}
+    reciprocal_ranks, timings, misses = [], [], []
+
+    for labelled in queries:
+        relevant = set(labelled['relevant'])
+        start = time.perf_counter()
+        found = retriever.search(labelled['query'], top_k)
+        timings.append((time.perf_counter() - start) * 1000)
+
+        for k in K_VALUES:
+            recalls[k].append(len(relevant & set(found[:k])) / len(relevant))
+        rank = next((i for i, item_id in enumerate(found[:MRR_CUTOFF], 1) if item_id in relevant), None)
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+        if rank is None:
+            misses.append(labelled['query'])
+
+    result = {f"recall@{k}": round(sum(values) / len(values), 4) for k, values in recalls.items()}
+    result.update({
+        "mrr": round(sum(reciprocal_ranks) / len(reciprocal_ranks), 4),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+        "misses": misses,
+    })
+    return result
+
+
+def find_regressions(
+    report: Dict,
+    baseline: Dict,
+    tolerance: float,
+    latency_ratio: float
+) -> List[str]:
+    """与基线报告比较
+
+    Args:
+        report: 本次报告
+        baseline: 基线报告
+        tolerance: 质量指标允许下降的绝对值
+        latency_ratio: p99 延迟允许变为基线的倍数
+
+    Returns:
+        回退说明列表
+    """
+    regressions = []
+    for tier, previous in baseline.get("tiers", {}).items():
+        current = report["tiers"].get(tier)
+        if current is None:
+            regressions.append(f"{tier}: 本次未运行（{report['skipped'].get(tier, '未选择')}）")
+            continue
+        for metric in QUALITY_METRICS:
+            if current[metric] < previous[metric] - tolerance:
+                regressions.append(f"{tier} {metric}: {previous[metric]:.4f} -> {current[metric]:.4f}")
+        if current["p99_ms"] > previous["p99_ms"] * latency_ratio:
+            regressions.append(f"{tier} p99: {previous['p99_ms']:.3f} ms -> {current['p99_ms']:.3f} ms")
+    return regressions
+
+
+def print_table(tiers: Dict[str, Dict]) -> None:
+    columns = [f"recall@{k}" for k in K_VALUES] + ["mrr", "p50_ms", "p99_ms"]
+    print(f"{'tier':<10}" + "".join(f"{c:>11}" for c in columns))
+    print("-" * (10 + 11 * len(columns)))
+    for tier, result in tiers.items():
+        print(f"{tier:<10}" + "".join(f"{result[c]:>11.3f}" for c in columns))
+
+
+def print_collection_check(collection, collection_name: str, path: str = QUERIES_PATH) -> None:
+    """导入后用该集合的标注查询做一次检索自检"""
+    queries = load_labelled_queries(path, collection_name)
+    if not queries:
+        return
+    print("\n" + "="*50)
+    print(f"检索自检（{len(queries)} 条标注查询）")
+    print("="*50)
+    result = evaluate(CollectionRetriever(collection), queries)
+    print_table({"chroma": result})
+    for query in result["misses"]:
+        print(f"  未命中: {query}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="知识库检索质量与延迟基准测试")
+    parser.add_argument("--queries", default=QUERIES_PATH, help="标注查询集")
+    parser.add_argument("--tiers", nargs="+", default=["resolver", "ngram", "vector", "numpy"],
+                        choices=["resolver", "ngram", "vector", "numpy"], help="评估的检索层")
+    parser.add_argument("--persist-dir", default=PERSIST_DIRECTORY, help="ChromaDB 持久化目录")
+    parser.add_argument("--index-dir", default=DEFAULT_INDEX_DIRECTORY, help="内存映射向量索引目录")
+    parser.add_argument("--output", default="retrieval_report.json", help="JSON 报告路径")
+    parser.add_argument("--baseline", help="基线报告，指标回退时返回非零退出码")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="质量指标允许下降的绝对值")
+    parser.add_argument("--latency-ratio", type=float, default=2.0, help="p99 延迟允许变为基线的倍数")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+
+    queries = load_labelled_queries(args.queries)
+    retrievers, skipped = create_retrievers(args.tiers, args.persist_dir, args.index_dir)
+
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "queries": len(queries),
+        "k": list(K_VALUES),
+        "mrr_cutoff": MRR_CUTOFF,
+        "tiers": {tier: evaluate(retriever, queries) for tier, retriever in retrievers.items()},
+        "skipped": skipped,
+    }
+
+    print("=" * 76)
+    print(f"labelled queries: {len(queries)}")
+    print_table(report["tiers"])
+    for tier, reason in skipped.items():
+        print(f"skipped {tier}: {reason}")
+    print("=" * 76)
+
+    output_directory = os.path.dirname(args.output)
+    if output_directory:
+        os.makedirs(output_directory, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"报告已写入: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = find_regressions(report, baseline, args.tolerance, args.latency_ratio)
+        if regressions:
+            print("检索指标回退:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("与基线相比没有回退")
+
+
+if __name__ == "__main__":
+    main()